@@ -0,0 +1,372 @@
+"""
+압축 블록 히스토리 저장소
+
+보관 기간이 지난 원본 히스토리를 (메트릭, 시간 범위, job, 모델, 날짜)마다 하나의 BLOB으로 묶어
+ModelMetricBlock에 보관합니다. 하루치 한 모델은 행 하나로 읽힙니다.
+
+블록 형식 (zlib 압축 전):
+    헤더: 매직(4바이트) + 포인트 수(uint32, little-endian)
+    타임스탬프: 에포크 마이크로초의 delta-of-delta를 zigzag 변환한 uint64 배열
+    값: float64 비트를 바로 앞 값과 XOR한 uint64 배열
+    두 배열 모두 바이트 위치별로 나눠(byte stream split) 이어 붙임
+
+수집 간격이 일정하면 delta-of-delta는 거의 0이고, 비슷한 값끼리 XOR하면 부호·지수 바이트가 0이 되므로
+바이트 위치별로 모인 0이 zlib으로 거의 사라집니다. 비트 단위 패킹 대신 바이트 단위로 나눈 것은
+인코딩/디코딩을 NumPy 배열 연산만으로 처리하기 위해서입니다.
+"""
+
+import heapq
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from api.models import ModelMetricBlock, ModelMetricHistory
+import logging
+
+logger = logging.getLogger(__name__)
+
+BLOCK_MAGIC = b'SBK1'
+_HEADER = struct.Struct('<4sI')
+
+# bulk_create 한 번에 보낼 최대 행 수
+BULK_BATCH_SIZE = 500
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_SERIES_FIELDS = ('metric_name', 'time_range', 'job', 'model_name')
+
+
+def to_micros(timestamp: datetime) -> int:
+    """datetime을 에포크 마이크로초로 바꿉니다 (float를 거치지 않아 정확함)."""
+    return (timestamp - _EPOCH) // _MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    """에포크 마이크로초를 UTC datetime으로 바꿉니다."""
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def day_start(timestamp: datetime) -> datetime:
+    """timestamp가 속한 날의 UTC 0시"""
+    return timestamp.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _split_bytes(words: np.ndarray) -> bytes:
+    # (n, 8) 바이트 행렬을 전치해서 같은 자리의 바이트끼리 모음
+    return words.astype('<u8').view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def _join_bytes(buffer: bytes, count: int) -> np.ndarray:
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(8, count).T.copy().view('<u8').ravel()
+
+
+def encode_block(timestamps: np.ndarray, values: np.ndarray) -> bytes:
+    """
+    시간 순으로 정렬된 포인트를 블록 바이트로 인코딩합니다.
+
+    Args:
+        timestamps: 에포크 마이크로초 int64 배열 (오름차순)
+        values: float64 값 배열
+
+    Returns:
+        zlib으로 압축된 블록
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+
+    deltas = np.diff(timestamps, prepend=np.int64(0))
+    dods = np.diff(deltas, prepend=np.int64(0))
+    zigzag = (dods << 1) ^ (dods >> 63)
+
+    bits = values.view(np.uint64)
+    xored = bits ^ np.concatenate(([np.uint64(0)], bits[:-1]))
+
+    body = _HEADER.pack(BLOCK_MAGIC, len(timestamps)) + _split_bytes(zigzag.view(np.uint64)) + _split_bytes(xored)
+    return zlib.compress(body, 6)
+
+
+def decode_block(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    블록 바이트를 배열로 디코딩합니다.
+
+    Args:
+        data: encode_block()으로 만든 블록
+
+    Returns:
+        (에포크 마이크로초 int64 배열, float64 값 배열)
+
+    Raises:
+        ValueError: 블록 형식이 아닌 경우
+    """
+    body = zlib.decompress(bytes(data))
+    magic, count = _HEADER.unpack_from(body)
+    if magic != BLOCK_MAGIC or len(body) != _HEADER.size + count * 16:
+        raise ValueError('히스토리 블록 형식이 아닙니다')
+
+    offset = _HEADER.size
+    zigzag = _join_bytes(body[offset:offset + count * 8], count)
+    xored = _join_bytes(body[offset + count * 8:], count)
+
+    dods = (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+    timestamps = np.cumsum(np.cumsum(dods))
+    values = np.bitwise_xor.accumulate(xored).view(np.float64)
+    return timestamps, values
+
+
+def pack_history_day(day: datetime) -> int:
+    """
+    하루치 원본 히스토리를 시리즈별 블록으로 묶어 저장합니다.
+
+    이미 블록이 있으면(이전 실행이 원본 삭제 중에 멈춘 경우 등) 블록의 포인트와 합친 뒤
+    같은 타임스탬프는 하나만 남기므로 여러 번 실행해도 결과가 같습니다.
+
+    Args:
+        day: 날짜 (UTC 0시)
+
+    Returns:
+        저장한 블록 수
+    """
+    day_end = day + timedelta(days=1)
+    rows = ModelMetricHistory.objects.filter(
+        timestamp__gte=day,
+        timestamp__lt=day_end,
+    ).values_list(*_SERIES_FIELDS, 'timestamp', 'p95_latency_ms')
+
+    series = {}
+    for metric_name, time_range, job, model_name, timestamp, value in rows.iterator(chunk_size=BULK_BATCH_SIZE):
+        series.setdefault((metric_name, time_range, job, model_name), {})[to_micros(timestamp)] = value
+    if not series:
+        return 0
+
+    existing = ModelMetricBlock.objects.filter(
+        day_start=day,
+        metric_name__in={key[0] for key in series},
+    ).values_list(*_SERIES_FIELDS, 'data')
+    for *key, data in existing:
+        points = series.get(tuple(key))
+        if points is None:
+            continue
+        timestamps, values = decode_block(data)
+        for timestamp, value in zip(timestamps.tolist(), values.tolist()):
+            points.setdefault(timestamp, value)
+
+    blocks = []
+    for key, points in series.items():
+        timestamps = np.array(sorted(points), dtype=np.int64)
+        values = np.array([points[timestamp] for timestamp in timestamps.tolist()], dtype=np.float64)
+        blocks.append(ModelMetricBlock(
+            **dict(zip(_SERIES_FIELDS, key)),
+            day_start=day,
+            point_count=len(timestamps),
+            data=encode_block(timestamps, values),
+        ))
+
+    ModelMetricBlock.objects.bulk_create(
+        blocks,
+        batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=[*_SERIES_FIELDS, 'day_start'],
+        update_fields=['point_count', 'data'],
+    )
+    return len(blocks)
+
+
+def _block_filters(filters: Dict) -> Dict:
+    return {key: value for key, value in filters.items() if not key.startswith('timestamp')}
+
+
+def load_block_points(
+    filters: Dict,
+    start_time: datetime,
+    end_time: datetime
+) -> Tuple[Dict[str, List[Tuple[datetime, float]]], Set[Tuple[str, datetime]]]:
+    """
+    [start_time, end_time] 구간에 걸친 블록을 읽어 포인트로 펼칩니다.
+
+    Args:
+        filters: 히스토리 조회 필터 (timestamp__* 조건은 무시)
+        start_time: 구간 시작
+        end_time: 구간 끝 (포함)
+
+    Returns:
+        (모델 이름별 시간 순 (시각, P95) 리스트, 블록이 있는 (모델, 날짜) 집합)
+    """
+    blocks = ModelMetricBlock.objects.filter(
+        day_start__gt=start_time - timedelta(days=1),
+        day_start__lte=end_time,
+        **_block_filters(filters),
+    ).order_by('model_name', 'day_start').values_list('model_name', 'day_start', 'data')
+
+    start_us, end_us = to_micros(start_time), to_micros(end_time)
+    model_points = {}
+    covered = set()
+    for model_name, block_day, data in blocks:
+        covered.add((model_name, block_day))
+        timestamps, values = decode_block(data)
+        mask = (timestamps >= start_us) & (timestamps <= end_us)
+        model_points.setdefault(model_name, []).extend(
+            (from_micros(timestamp), value)
+            for timestamp, value in zip(timestamps[mask].tolist(), values[mask].tolist())
+        )
+    return model_points, covered
+
+
+def history_points(filters: Dict, start_time: datetime, end_time: datetime) -> Dict[str, List[Tuple[datetime, float]]]:
+    """
+    원본 히스토리와 블록을 합쳐 구간의 포인트를 읽습니다.
+
+    같은 날이 원본과 블록에 모두 있으면(묶은 뒤 원본 삭제 전) 블록을 사용합니다.
+
+    Args:
+        filters: timestamp__gte/lte를 포함한 히스토리 조회 필터
+        start_time: 구간 시작
+        end_time: 구간 끝
+
+    Returns:
+        모델 이름별 시간 순 (시각, P95) 리스트 (모델은 처음 등장한 순서)
+    """
+    rows = ModelMetricHistory.objects.filter(**filters).order_by('timestamp').values_list(
+        'model_name', 'timestamp', 'p95_latency_ms'
+    )
+    model_points = {}
+    for model_name, timestamp, value in rows:
+        model_points.setdefault(model_name, []).append((timestamp, value))
+
+    block_points, covered = load_block_points(filters, start_time, end_time)
+    if not block_points:
+        return model_points
+
+    for model_name, points in block_points.items():
+        raw = [
+            point for point in model_points.get(model_name, [])
+            if (model_name, day_start(point[0])) not in covered
+        ]
+        model_points[model_name] = sorted(points + raw, key=lambda point: point[0])
+
+    return dict(sorted(model_points.items(), key=lambda item: item[1][0][0] if item[1] else end_time))
+
+
+def iter_series_points(
+    metric_name: str,
+    time_range: str,
+    job: str,
+    model_name: str,
+    since: datetime
+) -> Iterator[Tuple[datetime, float]]:
+    """
+    시리즈 하나의 since 이후 포인트를 블록 → 원본 순서로 시간 순으로 넘깁니다 (롤업 재생성용).
+
+    Yields:
+        (시각, P95) 튜플
+    """
+    series_filters = {
+        'metric_name': metric_name,
+        'time_range': time_range,
+        'job': job,
+        'model_name': model_name,
+    }
+    blocks = ModelMetricBlock.objects.filter(
+        day_start__gte=since, **series_filters
+    ).order_by('day_start').values_list('day_start', 'data')
+
+    covered = set()
+    for block_day, data in blocks.iterator(chunk_size=BULK_BATCH_SIZE):
+        covered.add(block_day)
+        timestamps, values = decode_block(data)
+        for timestamp, value in zip(timestamps.tolist(), values.tolist()):
+            yield from_micros(timestamp), value
+
+    rows = ModelMetricHistory.objects.filter(
+        timestamp__gte=since, **series_filters
+    ).order_by('timestamp').values_list('timestamp', 'p95_latency_ms')
+    for timestamp, value in rows.iterator(chunk_size=BULK_BATCH_SIZE):
+        if day_start(timestamp) not in covered:
+            yield timestamp, value
+
+
+def iter_model_points(filters: Dict, start_time: datetime, end_time: datetime) -> Iterator[Tuple[str, datetime, float]]:
+    """
+    구간의 원본 히스토리와 블록을 (모델, 시각) 순서로 하나씩 넘깁니다 (히스토리 내보내기용).
+
+    history_points()와 같은 규칙(같은 날이 원본과 블록에 모두 있으면 블록)을 따르지만
+    전체를 모으지 않고 블록은 (모델, 날짜) 단위로, 원본은 DB 커서에서 조금씩 읽으므로
+    구간 길이와 관계없이 메모리가 일정합니다.
+
+    Args:
+        filters: timestamp__gte/lte를 포함한 히스토리 조회 필터
+        start_time: 구간 시작
+        end_time: 구간 끝 (포함)
+
+    Yields:
+        (모델 이름, 시각, P95) 튜플
+    """
+    blocks = ModelMetricBlock.objects.filter(
+        day_start__gt=start_time - timedelta(days=1),
+        day_start__lte=end_time,
+        **_block_filters(filters),
+    )
+    covered = set(blocks.values_list('model_name', 'day_start'))
+
+    def block_points():
+        start_us, end_us = to_micros(start_time), to_micros(end_time)
+        rows = blocks.order_by('model_name', 'day_start').values_list('model_name', 'day_start', 'data')
+        # job을 지정하지 않으면 같은 (모델, 날짜)에 job별 블록이 여러 개일 수 있어 함께 정렬
+        for (model_name, _), group in groupby(
+            rows.iterator(chunk_size=BULK_BATCH_SIZE), key=lambda row: row[:2]
+        ):
+            decoded = [decode_block(data) for _, _, data in group]
+            timestamps = np.concatenate([timestamps for timestamps, _ in decoded])
+            values = np.concatenate([values for _, values in decoded])
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[order]
+            mask = (timestamps >= start_us) & (timestamps <= end_us)
+            for timestamp, value in zip(timestamps[mask].tolist(), values[mask].tolist()):
+                yield model_name, from_micros(timestamp), value
+
+    def raw_points():
+        rows = ModelMetricHistory.objects.filter(**filters).order_by('model_name', 'timestamp').values_list(
+            'model_name', 'timestamp', 'p95_latency_ms'
+        )
+        for model_name, timestamp, value in rows.iterator(chunk_size=BULK_BATCH_SIZE):
+            if not covered or (model_name, day_start(timestamp)) not in covered:
+                yield model_name, timestamp, value
+
+    if not covered:
+        return raw_points()
+    return heapq.merge(block_points(), raw_points(), key=lambda point: point[:2])
+
+
+def series_keys(since: Optional[datetime] = None, metric_name: Optional[str] = None) -> List[Tuple[str, str, str, str]]:
+    """원본 또는 블록이 있는 (메트릭, 시간 범위, job, 모델) 목록"""
+    history = ModelMetricHistory.objects.all()
+    blocks = ModelMetricBlock.objects.all()
+    if since is not None:
+        history = history.filter(timestamp__gte=since)
+        blocks = blocks.filter(day_start__gte=since)
+    if metric_name:
+        history = history.filter(metric_name=metric_name)
+        blocks = blocks.filter(metric_name=metric_name)
+
+    keys = set(history.values_list(*_SERIES_FIELDS).distinct())
+    keys.update(blocks.values_list(*_SERIES_FIELDS).distinct())
+    return sorted(keys)
+
+
+def earliest_day(metric_name: Optional[str] = None) -> Optional[datetime]:
+    """원본 또는 블록이 있는 가장 이른 날짜 (없으면 None)"""
+    history = ModelMetricHistory.objects.all()
+    blocks = ModelMetricBlock.objects.all()
+    if metric_name:
+        history = history.filter(metric_name=metric_name)
+        blocks = blocks.filter(metric_name=metric_name)
+
+    candidates = [
+        history.order_by('timestamp').values_list('timestamp', flat=True).first(),
+        blocks.order_by('day_start').values_list('day_start', flat=True).first(),
+    ]
+    candidates = [candidate for candidate in candidates if candidate is not None]
+    return day_start(min(candidates)) if candidates else None
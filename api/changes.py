@@ -0,0 +1,106 @@
+"""
+최신 메트릭 변경 추적
+
+수집기는 ModelMetric을 저장할 때 P95가 의미 있게 바뀐 행에만 그 세대를 `changed_generation`으로
+기록하고, 수집 결과에서 사라진 모델은 행을 지우면서 ModelMetricTombstone에 남깁니다.
+/api/metrics/, /api/metrics/p95/의 `since=` 조회는 이 두 테이블을 인덱스로 범위 검색해서
+바뀐 모델과 사라진 모델만 돌려줍니다.
+
+- 의미 있는 변경: 마지막으로 알린 P95(`changed_p95_latency_ms`)와의 차이가
+  settings.METRICS_CHANGE_MIN_DELTA_MS 이상이면서 그 값의 settings.METRICS_CHANGE_MIN_RATIO 이상.
+  매번 직전 값이 아니라 마지막으로 알린 값과 비교하므로 조금씩 움직여도 오차가 쌓이지 않습니다.
+- 삭제 기록은 settings.METRICS_TOMBSTONE_RETENTION_DAYS 동안 보관하고(compact_metrics),
+  그보다 오래된 since는 전체 응답으로 다시 맞춥니다.
+"""
+
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+
+from api.config import DEFAULT_METRIC_NAME, DEFAULT_TIME_RANGE
+from api.models import ModelMetric, ModelMetricTombstone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def tombstone_retention() -> timedelta:
+    """삭제 기록 보관 기간 (settings.METRICS_TOMBSTONE_RETENTION_DAYS)"""
+    return timedelta(days=getattr(settings, 'METRICS_TOMBSTONE_RETENTION_DAYS', 7))
+
+
+def is_significant_change(reported: Optional[float], current: Optional[float]) -> bool:
+    """
+    마지막으로 알린 P95와 비교해서 변경으로 알릴지 판단합니다.
+
+    Args:
+        reported: 마지막으로 변경을 알린 시점의 P95 (ms)
+        current: 이번에 수집한 P95 (ms)
+
+    Returns:
+        변경으로 볼지 여부 (값이 생기거나 없어지면 항상 변경)
+    """
+    if reported is None or current is None:
+        return reported != current
+
+    difference = abs(current - reported)
+    return (
+        difference > 0
+        and difference >= getattr(settings, 'METRICS_CHANGE_MIN_DELTA_MS', 1.0)
+        and difference >= abs(reported) * getattr(settings, 'METRICS_CHANGE_MIN_RATIO', 0.02)
+    )
+
+
+def load_changes(
+    metric_name: str,
+    time_range: str,
+    job: Optional[str],
+    since: int
+) -> Tuple[List[ModelMetric], List[str]]:
+    """
+    since 세대 이후에 바뀐 모델과 사라진 모델을 조회합니다.
+
+    Args:
+        metric_name: 메트릭 이름
+        time_range: 시간 범위
+        job: Prometheus job (None이면 모든 job)
+        since: 클라이언트가 마지막으로 받은 세대
+
+    Returns:
+        (모델 이름 순 ModelMetric 리스트, 사라진 모델 이름 리스트)
+    """
+    filters = {
+        'metric_name': metric_name or DEFAULT_METRIC_NAME,
+        'time_range': time_range or DEFAULT_TIME_RANGE,
+    }
+    if job:
+        filters['job'] = job
+
+    changed = list(
+        ModelMetric.objects.filter(changed_generation__gt=since, **filters).order_by('model_name')
+    )
+    removed = set(
+        ModelMetricTombstone.objects.filter(removed_generation__gt=since, **filters)
+        .values_list('model_name', flat=True)
+    )
+    if removed and not job:
+        # job을 지정하지 않은 조회에서는 다른 job에 아직 남아 있는 모델을 사라진 것으로 알리지 않음
+        removed -= set(
+            ModelMetric.objects.filter(model_name__in=removed, **filters).values_list('model_name', flat=True)
+        )
+    return changed, sorted(removed)
+
+
+def expire_tombstones(before_generation: int, dry_run: bool = False) -> int:
+    """
+    before_generation 이전에 기록된 삭제 기록을 지웁니다.
+
+    Returns:
+        지운(dry_run이면 지울) 행 수
+    """
+    expired = ModelMetricTombstone.objects.filter(removed_generation__lt=before_generation)
+    if dry_run:
+        return expired.count()
+    count, _ = expired.delete()
+    return count
@@ -0,0 +1,386 @@
+"""
+메트릭 수집 서비스
+
+Prometheus 조회, 결과 파싱, DB 저장을 담당합니다.
+collect_metrics 명령은 이 모듈을 사용해 설정된 모든
+(메트릭, 시간 범위, job) 조합을 한 번에 수집합니다.
+"""
+
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.instrumentation import (
+    collector_phase,
+    observe_collector_run,
+    observe_prometheus_query,
+)
+from api.changes import is_significant_change
+from api.events import notify_generation
+from api.ledger import QueryCounter, record_run
+from api.models import ModelMetric, ModelMetricHistory, ModelMetricTombstone
+from api.rollups import apply_history
+from api.sla import SlaEngine
+from api.slo import SloTracker
+from api.snapshots import generation_for, publish_snapshots
+from query_p95_metrics import PrometheusP95Query
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 수집하는 백분위수 (ModelMetric의 p50/p95/p99 컬럼에 대응)
+PERCENTILES = [0.50, 0.95, 0.99]
+
+# bulk_create 한 번에 보낼 최대 행 수
+BULK_BATCH_SIZE = 500
+
+
+def parse_model_stats(results: Dict[float, Dict], model_label: str) -> Dict[str, Dict]:
+    """
+    백분위수별 Prometheus 응답을 모델별 통계로 재구성합니다.
+
+    Args:
+        results: query_multiple_percentiles() 형식의 백분위수별 응답
+        model_label: 모델을 구분하는 레이블 이름
+
+    Returns:
+        모델 이름별 `p50`, `p95`, `p99` (밀리초, NaN/Inf는 None), `prometheus_timestamp`
+    """
+    model_stats = {}
+
+    for percentile, result in results.items():
+        if result.get('status') != 'success':
+            continue
+
+        for item in result.get('data', {}).get('result', []):
+            metric = item.get('metric', {})
+            model_name = metric.get(model_label, 'Unknown')
+
+            if 'value' in item:
+                timestamp, value = item['value']
+                value_ms = float(value) * 1000  # 초를 밀리초로 변환
+                # 요청이 없어 버킷 rate가 모두 0이면 NaN - 값 없음(NULL)으로 저장하고 히스토리는 남기지 않음
+                if not math.isfinite(value_ms):
+                    value_ms = None
+
+                if model_name not in model_stats:
+                    model_stats[model_name] = {
+                        'prometheus_timestamp': timestamp,
+                    }
+
+                percentile_key = f'p{int(percentile*100)}'
+                model_stats[model_name][percentile_key] = round(value_ms, 2) if value_ms is not None else None
+
+    return model_stats
+
+
+def save_collections(collections: List[Dict], collected_at) -> Dict[str, int]:
+    """
+    여러 조합의 수집 결과를 하나의 트랜잭션 안에서 일괄 저장합니다.
+
+    ModelMetric은 (model_name, metric_name, time_range, job) 유니크 키 기준으로
+    bulk upsert하고, ModelMetricHistory는 한 번의 bulk insert로 기록한 뒤
+    같은 트랜잭션에서 해당 시간/일 롤업을 증분 갱신합니다.
+    P95가 의미 있게 바뀐 행에는 변경 세대를 기록하고, 수집 결과에서 사라진 모델은
+    지우면서 삭제 기록을 남깁니다 (api/changes.py).
+    각 collection에는 이번에 새로 생성된 모델 이름 집합이 `created`로 채워집니다.
+
+    Args:
+        collections: `target`, `model_stats` 키를 가진 수집 결과 리스트
+        collected_at: 수집 시간
+
+    Returns:
+        테이블별 저장한 행 수 (`model_metric`, `model_metric_history`, `model_metric_rollup`,
+        `model_metric_tombstone`)
+    """
+    latest_rows = []
+    history_rows = []
+
+    for collection in collections:
+        target = collection['target']
+        for model_name, stats in collection['model_stats'].items():
+            latest_rows.append(ModelMetric(
+                model_name=model_name,
+                metric_name=target['metric_name'],
+                job=target['job'],
+                time_range=target['time_range'],
+                p50_latency_ms=stats.get('p50'),
+                p95_latency_ms=stats.get('p95'),
+                p99_latency_ms=stats.get('p99'),
+                prometheus_timestamp=stats.get('prometheus_timestamp'),
+                collected_at=collected_at,
+            ))
+
+            if stats.get('p95') is not None:
+                history_rows.append(ModelMetricHistory(
+                    model_name=model_name,
+                    metric_name=target['metric_name'],
+                    job=target['job'],
+                    time_range=target['time_range'],
+                    p95_latency_ms=stats.get('p95'),
+                    timestamp=collected_at,
+                    prometheus_timestamp=stats.get('prometheus_timestamp'),
+                ))
+
+    if not latest_rows:
+        for collection in collections:
+            collection['created'] = set()
+        return {'model_metric': 0, 'model_metric_history': 0, 'model_metric_rollup': 0, 'model_metric_tombstone': 0}
+
+    metric_names = {collection['target']['metric_name'] for collection in collections}
+    generation = generation_for(collected_at)
+
+    with transaction.atomic():
+        existing = {
+            (metric_name, time_range, job, model_name): (pk, changed_generation, changed_p95)
+            for pk, metric_name, time_range, job, model_name, changed_generation, changed_p95
+            in ModelMetric.objects.filter(metric_name__in=metric_names).values_list(
+                'pk', 'metric_name', 'time_range', 'job', 'model_name',
+                'changed_generation', 'changed_p95_latency_ms',
+            )
+        }
+
+        # P95가 의미 있게 바뀐 행만 이번 세대를 변경 세대로 기록 (since= 변경분 조회용)
+        for row in latest_rows:
+            previous = existing.get((row.metric_name, row.time_range, row.job, row.model_name))
+            if previous is None or is_significant_change(previous[2], row.p95_latency_ms):
+                row.changed_generation = generation
+                row.changed_p95_latency_ms = row.p95_latency_ms
+            else:
+                row.changed_generation, row.changed_p95_latency_ms = previous[1:]
+
+        ModelMetric.objects.bulk_create(
+            latest_rows,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['model_name', 'metric_name', 'time_range', 'job'],
+            update_fields=[
+                'p50_latency_ms',
+                'p95_latency_ms',
+                'p99_latency_ms',
+                'prometheus_timestamp',
+                'collected_at',
+                'updated_at',
+                'changed_generation',
+                'changed_p95_latency_ms',
+            ],
+        )
+        ModelMetricHistory.objects.bulk_create(history_rows, batch_size=BULK_BATCH_SIZE)
+        rollup_count = apply_history(history_rows)
+        tombstone_count = _track_removed_models(collections, existing, generation)
+
+    for collection in collections:
+        target = collection['target']
+        key = (target['metric_name'], target['time_range'], target['job'])
+        collection['created'] = {
+            model_name for model_name in collection['model_stats']
+            if key + (model_name,) not in existing
+        }
+
+    return {
+        'model_metric': len(latest_rows),
+        'model_metric_history': len(history_rows),
+        'model_metric_rollup': rollup_count,
+        'model_metric_tombstone': tombstone_count,
+    }
+
+
+def _track_removed_models(collections: List[Dict], existing: Dict[Tuple, Tuple], generation: int) -> int:
+    """
+    빠짐없이 조회한 조합(`complete`)에서 사라진 모델의 ModelMetric 행을 지우고 삭제 기록을 남깁니다.
+    일부 백분위수나 샤드가 실패한 조합은 빠진 모델이 실제로 사라졌는지 알 수 없으므로 지우지 않습니다.
+
+    다시 나타난 모델의 삭제 기록은 지웁니다 (그 모델은 이번 세대의 변경분으로 나감).
+    settings.METRICS_PRUNE_MISSING_MODELS가 꺼져 있으면 사라진 모델도 마지막 값으로 남겨 둡니다.
+
+    Returns:
+        새로 기록한 삭제 기록 수
+    """
+    prune = getattr(settings, 'METRICS_PRUNE_MISSING_MODELS', True)
+    collected = {}
+    incomplete = set()
+    for collection in collections:
+        target = collection['target']
+        key = (target['metric_name'], target['time_range'], target['job'])
+        collected.setdefault(key, set()).update(collection['model_stats'])
+        # 조회에 (일부라도) 실패했거나 결과가 비어 있는 조합은 모델이 사라졌는지 알 수 없음
+        if not collection.get('complete', collection.get('succeeded', True)) or not collection['model_stats']:
+            incomplete.add(key)
+
+    removed_ids = []
+    tombstones = []
+    for metric_key, (pk, _, _) in existing.items():
+        models_seen = collected.get(metric_key[:3])
+        if (
+            prune and models_seen is not None and metric_key[:3] not in incomplete
+            and metric_key[3] not in models_seen
+        ):
+            removed_ids.append(pk)
+            tombstones.append(ModelMetricTombstone(
+                metric_name=metric_key[0],
+                time_range=metric_key[1],
+                job=metric_key[2],
+                model_name=metric_key[3],
+                removed_generation=generation,
+            ))
+
+    reappeared = Q()
+    for (metric_name, time_range, job), model_names in collected.items():
+        new_models = [name for name in model_names if (metric_name, time_range, job, name) not in existing]
+        if new_models:
+            reappeared |= Q(metric_name=metric_name, time_range=time_range, job=job, model_name__in=new_models)
+    if reappeared:
+        ModelMetricTombstone.objects.filter(reappeared).delete()
+
+    if removed_ids:
+        for start in range(0, len(removed_ids), BULK_BATCH_SIZE):
+            ModelMetric.objects.filter(pk__in=removed_ids[start:start + BULK_BATCH_SIZE]).delete()
+        ModelMetricTombstone.objects.bulk_create(
+            tombstones,
+            batch_size=BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['model_name', 'metric_name', 'time_range', 'job'],
+            update_fields=['removed_generation'],
+        )
+        logger.info(f'Removed {len(removed_ids)} models missing from collection at generation {generation}')
+
+    return len(tombstones)
+
+
+def build_prometheus_client(prometheus_url: str, config: Dict) -> PrometheusP95Query:
+    """
+    설정의 prometheus 섹션(timeout, max_concurrency)으로 Prometheus 클라이언트를 만듭니다.
+
+    Args:
+        prometheus_url: Prometheus 서버 URL
+        config: load_config()로 읽은 설정
+
+    Returns:
+        커넥션 풀을 가진 Prometheus 클라이언트
+    """
+    prometheus_config = config.get('prometheus') or {}
+    return PrometheusP95Query(
+        prometheus_url,
+        timeout=prometheus_config.get('timeout', 10),
+        max_concurrency=prometheus_config.get('max_concurrency', 8),
+        on_query=observe_prometheus_query,
+    )
+
+
+class MetricsCollector:
+    """설정된 모든 수집 조합을 동시에 조회하고 한 번에 저장하는 클래스"""
+
+    def __init__(
+        self,
+        prom_query: PrometheusP95Query,
+        local_quantiles: bool = True,
+        sla: Optional[SlaEngine] = None,
+        slo: Optional[SloTracker] = None
+    ):
+        """
+        Args:
+            prom_query: 커넥션 풀을 가진 Prometheus 클라이언트
+            local_quantiles: True이면 버킷 rate를 한 번만 조회하고 백분위수는 로컬에서 계산
+            sla: 수집 직후 P95 SLA를 평가할 엔진 (None이면 평가하지 않음)
+            slo: 수집 직후 SLO 소진율 창을 갱신할 추적기 (None이면 갱신하지 않음)
+        """
+        self.prom_query = prom_query
+        self.local_quantiles = local_quantiles
+        self.sla = sla
+        self.slo = slo
+
+    def collect(self, targets: List[Dict]) -> List[Dict]:
+        """
+        모든 조합을 조회해서 저장합니다.
+
+        Args:
+            targets: `metric_name`, `model_label`, `time_range`, `job` 키를 가진 딕셔너리 리스트
+
+        Returns:
+            조합별 `target`, `model_stats`, `created`, `succeeded`, `complete` 를 담은 리스트
+            (`succeeded`는 백분위수 하나라도 조회에 성공한 경우, `complete`는 모든 백분위수와 샤드가
+            성공한 경우)
+        """
+        started_at = timezone.now()
+        started = time.perf_counter()
+
+        # 이번 실행의 Prometheus 쿼리 수/실패 수를 실행 기록에 남김
+        counter = QueryCounter(self.prom_query.on_query)
+        self.prom_query.on_query = counter
+        collections = []
+        rows_written = {}
+        model_count = 0
+        generation = None
+        error = ''
+
+        try:
+            with collector_phase('query'):
+                results = self.prom_query.query_percentiles_for_targets(
+                    targets, PERCENTILES, local=self.local_quantiles
+                )
+
+            # 수집 시간
+            collected_at = timezone.now()
+
+            with collector_phase('parse'):
+                for target, result in zip(targets, results):
+                    collections.append({
+                        'target': target,
+                        'model_stats': parse_model_stats(result, target['model_label']),
+                        'succeeded': any(r.get('status') == 'success' for r in result.values()),
+                        'complete': all(
+                            r.get('status') == 'success' and not r.get('failed_shards') for r in result.values()
+                        ),
+                    })
+
+            with collector_phase('write'):
+                rows_written = save_collections(collections, collected_at)
+                # 헬스 체크가 메트릭 테이블을 읽지 않도록 전체 모델 수를 실행 기록에 남김
+                model_count = ModelMetric.objects.values('model_name').distinct().count()
+
+            # 알림 전송은 백그라운드에서 하므로 평가만 기다림 (실패해도 수집은 성공으로 처리)
+            # /api/slo/ 등도 세대 ETag를 쓰므로 SlaState/SloState를 먼저 저장한 뒤 세대를 올림
+            if self.sla is not None:
+                with collector_phase('sla'):
+                    self.sla.check(collections, collected_at)
+            if self.slo is not None:
+                with collector_phase('slo'):
+                    self.slo.check(collections, collected_at)
+
+            # API가 바로 내려줄 수 있도록 새 세대의 응답 본문을 미리 만들어 둠
+            with collector_phase('publish'):
+                generation = publish_snapshots(targets, collected_at)
+                notify_generation(generation)
+
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            raise
+
+        finally:
+            self.prom_query.on_query = counter.inner
+            record_run(
+                started_at=started_at,
+                finished_at=timezone.now(),
+                duration_seconds=time.perf_counter() - started,
+                targets=len(targets),
+                targets_failed=sum(1 for c in collections if not c['succeeded']),
+                models_written=rows_written.get('model_metric', 0),
+                model_count=model_count,
+                queries_issued=counter.issued,
+                queries_failed=counter.failed,
+                generation=generation,
+                error=error,
+            )
+
+        observe_collector_run(time.perf_counter() - started, rows_written)
+
+        logger.info(
+            f'Metrics collected: {sum(len(c["model_stats"]) for c in collections)} rows, '
+            f'{len(targets)} targets'
+        )
+        return collections
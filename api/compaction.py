@@ -0,0 +1,211 @@
+"""
+히스토리 보관 정책 / DB 정리
+
+- 원본 히스토리(ModelMetricHistory)는 보관 기간이 지나면 롤업으로 남기고 지웁니다.
+  지우기 전에 그 날의 롤업이 있는지 확인해서 빠진 구간은 원본에서 만들어 두고,
+  settings.METRICS_PACK_EXPIRED_HISTORY가 켜져 있으면 원본 포인트를 압축 블록으로 묶어 둡니다
+  (api/blockstore.py).
+- 1시간 롤업은 별도 보관 기간이 지나면 지우고, 1일 롤업은 계속 보관합니다.
+- 삭제는 짧은 시간 구간 단위의 개별 트랜잭션으로 나눠 실행하고 사이사이 쉬므로
+  수집기의 쓰기가 오래 막히지 않습니다.
+- 삭제 후 통계 갱신(ANALYZE)과, 필요하면 공간 회수(VACUUM)를 DB 종류에 맞게 실행합니다.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Min
+
+from api.blockstore import pack_history_day
+from api.models import ModelMetricBlock, ModelMetricHistory, ModelMetricRollup
+from api.rollups import RESOLUTIONS, bucket_start, fill_missing_rollups
+import logging
+
+logger = logging.getLogger(__name__)
+
+DAY = timedelta(days=1)
+
+# 정리 대상 테이블 (ANALYZE/VACUUM 대상)
+COMPACTED_MODELS = [ModelMetricHistory, ModelMetricRollup, ModelMetricBlock]
+
+
+def raw_retention() -> timedelta:
+    """원본 히스토리 보관 기간 (settings.METRICS_RAW_RETENTION_DAYS)"""
+    return timedelta(days=getattr(settings, 'METRICS_RAW_RETENTION_DAYS', 30))
+
+
+def hourly_rollup_retention() -> Optional[timedelta]:
+    """1시간 롤업 보관 기간 (settings.METRICS_HOURLY_ROLLUP_RETENTION_DAYS, None이면 계속 보관)"""
+    days = getattr(settings, 'METRICS_HOURLY_ROLLUP_RETENTION_DAYS', 400)
+    return timedelta(days=days) if days else None
+
+
+def _day_floor(timestamp: datetime) -> datetime:
+    return bucket_start(timestamp, RESOLUTIONS['1d'])
+
+
+def _delete_in_batches(
+    queryset_for: Callable[[datetime, datetime], object],
+    start: datetime,
+    end: datetime,
+    batch: timedelta,
+    pause: float,
+    dry_run: bool
+) -> int:
+    """[start, end)를 batch 길이 구간으로 나눠 구간마다 한 번의 DELETE(개별 트랜잭션)를 실행합니다."""
+    deleted = 0
+    batch_start = start
+    while batch_start < end:
+        batch_end = min(batch_start + batch, end)
+        queryset = queryset_for(batch_start, batch_end)
+        if dry_run:
+            deleted += queryset.count()
+        else:
+            count, _ = queryset.delete()
+            deleted += count
+            if count and pause:
+                time.sleep(pause)
+        batch_start = batch_end
+    return deleted
+
+
+def expire_raw_history(
+    now: datetime,
+    retention: timedelta,
+    batch: timedelta,
+    pause: float = 0.0,
+    dry_run: bool = False,
+    on_day: Optional[Callable[[datetime, int], None]] = None
+) -> int:
+    """
+    보관 기간이 지난 원본 히스토리를 오래된 날부터 하루씩 롤업(과 압축 블록)으로 남기고 지웁니다.
+
+    기준 시각은 일 경계로 내리므로 항상 하루 단위로만 지워지고,
+    1일 롤업이 일부만 남은 원본으로 만들어지는 일이 없습니다.
+
+    Args:
+        now: 기준 시각
+        retention: 원본 보관 기간
+        batch: 한 번의 DELETE로 지울 시간 구간 길이
+        pause: DELETE 사이 대기 시간 (초)
+        dry_run: True면 지울 행 수만 셈
+        on_day: 하루 처리가 끝날 때마다 (날짜, 지운 행 수)로 호출되는 콜백
+
+    Returns:
+        지운(dry_run이면 지울) 원본 행 수
+    """
+    cutoff = _day_floor(now - retention)
+    earliest = ModelMetricHistory.objects.filter(timestamp__lt=cutoff).aggregate(
+        earliest=Min('timestamp')
+    )['earliest']
+    if earliest is None:
+        return 0
+
+    pack = getattr(settings, 'METRICS_PACK_EXPIRED_HISTORY', True)
+    total = 0
+    day = _day_floor(earliest)
+    while day < cutoff:
+        day_end = day + DAY
+        if not dry_run:
+            # 지우기 전에 증분 갱신이 빠진 롤업 구간을 원본에서 채우고,
+            # 설정에 따라 원본 포인트를 압축 블록으로 보관 (하루치 읽기, 짧은 트랜잭션)
+            with transaction.atomic():
+                fill_missing_rollups(day, day_end)
+                if pack:
+                    pack_history_day(day)
+
+        deleted = _delete_in_batches(
+            lambda start, end: ModelMetricHistory.objects.filter(timestamp__gte=start, timestamp__lt=end),
+            day, day_end, batch, pause, dry_run,
+        )
+        total += deleted
+        if on_day:
+            on_day(day, deleted)
+        day = day_end
+
+    return total
+
+
+def expire_hourly_rollups(
+    now: datetime,
+    retention: timedelta,
+    pause: float = 0.0,
+    dry_run: bool = False
+) -> int:
+    """
+    보관 기간이 지난 1시간 롤업을 하루 단위 DELETE로 지웁니다 (1일 롤업은 남김).
+
+    Returns:
+        지운(dry_run이면 지울) 롤업 행 수
+    """
+    cutoff = _day_floor(now - retention)
+    hourly = ModelMetricRollup.objects.filter(resolution='1h')
+    earliest = hourly.filter(bucket_start__lt=cutoff).aggregate(earliest=Min('bucket_start'))['earliest']
+    if earliest is None:
+        return 0
+
+    return _delete_in_batches(
+        lambda start, end: hourly.filter(bucket_start__gte=start, bucket_start__lt=end),
+        _day_floor(earliest), cutoff, DAY, pause, dry_run,
+    )
+
+
+def optimize_database(vacuum: bool = False) -> List[str]:
+    """
+    정리한 테이블의 통계를 갱신하고, 필요하면 빈 공간을 회수합니다.
+
+    - SQLite: ANALYZE, 빈 페이지 비율이 settings.METRICS_VACUUM_FREE_RATIO 이상이거나
+      vacuum=True면 VACUUM (DB 전체를 다시 쓰므로 그동안 쓰기가 막힘)
+    - PostgreSQL: ANALYZE, vacuum=True면 VACUUM (ANALYZE) (평소에는 autovacuum에 맡김)
+    - MySQL: ANALYZE TABLE, vacuum=True면 OPTIMIZE TABLE
+
+    Args:
+        vacuum: 조건과 관계없이 공간 회수를 실행
+
+    Returns:
+        실행한 SQL 문 리스트
+    """
+    tables = [model._meta.db_table for model in COMPACTED_MODELS]
+    vendor = connection.vendor
+    statements = []
+
+    if vendor == 'sqlite':
+        if vacuum or _sqlite_free_ratio() >= getattr(settings, 'METRICS_VACUUM_FREE_RATIO', 0.2):
+            statements.append('VACUUM')
+        statements.extend(f'ANALYZE {table}' for table in tables)
+    elif vendor == 'postgresql':
+        keyword = 'VACUUM (ANALYZE)' if vacuum else 'ANALYZE'
+        statements.extend(f'{keyword} {table}' for table in tables)
+    elif vendor == 'mysql':
+        statements.append(f'ANALYZE TABLE {", ".join(tables)}')
+        if vacuum:
+            statements.append(f'OPTIMIZE TABLE {", ".join(tables)}')
+    else:
+        logger.warning(f'DB maintenance is not supported for vendor {vendor}')
+        return statements
+
+    with connection.cursor() as cursor:
+        for statement in statements:
+            started = time.monotonic()
+            cursor.execute(statement)
+            logger.info(f'{statement} took {time.monotonic() - started:.2f}s')
+
+    return statements
+
+
+def _sqlite_free_ratio() -> float:
+    """SQLite DB 파일에서 비어 있는 페이지 비율"""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        page_count = cursor.fetchone()[0]
+        cursor.execute('PRAGMA freelist_count')
+        free_count = cursor.fetchone()[0]
+    return free_count / page_count if page_count else 0.0
+
+
+def table_row_counts() -> Dict[str, int]:
+    """정리 대상 테이블별 행 수"""
+    return {model._meta.db_table: model.objects.count() for model in COMPACTED_MODELS}
@@ -0,0 +1,150 @@
+"""
+메트릭 수집 설정 로더
+
+config.yaml(config.yaml.example 참고)을 읽어 수집기가 사용할
+(메트릭, 시간 범위, job) 조합 목록을 만듭니다.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+from django.conf import settings
+
+
+DEFAULT_METRIC_NAME = 'request_duration_seconds'
+DEFAULT_MODEL_LABEL = 'model'
+DEFAULT_TIME_RANGE = '5m'
+DEFAULT_JOB = 'api'
+
+
+def load_config(path: Optional[str] = None) -> Dict:
+    """
+    YAML 설정 파일을 읽습니다.
+    
+    Args:
+        path: 설정 파일 경로 (기본값: settings.METRICS_CONFIG_PATH)
+        
+    Returns:
+        설정 딕셔너리 (파일이 없으면 빈 딕셔너리)
+    """
+    config_path = Path(path or getattr(settings, 'METRICS_CONFIG_PATH', 'config.yaml'))
+    
+    if not config_path.exists():
+        return {}
+    
+    with open(config_path, encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_collection_targets(config: Dict) -> List[Dict]:
+    """
+    설정에서 수집할 (메트릭, 시간 범위, job) 조합을 펼칩니다.
+    
+    메트릭별 `time_ranges`, `jobs`가 없으면 `query.time_ranges`, `query.jobs`를,
+    그것도 없으면 `query.default_time_range`와 job="api"를 사용합니다.
+    
+    Args:
+        config: load_config()로 읽은 설정
+        
+    Returns:
+        `metric_name`, `model_label`, `time_range`, `job` 키를 가진 딕셔너리 리스트
+        
+    Raises:
+        ValueError: tracked_metrics 항목에 name이 없는 경우
+    """
+    metrics_config = config.get('metrics') or {}
+    query_config = config.get('query') or {}
+    
+    default_time_ranges = (
+        query_config.get('time_ranges')
+        or [query_config.get('default_time_range', DEFAULT_TIME_RANGE)]
+    )
+    default_jobs = query_config.get('jobs') or [DEFAULT_JOB]
+    
+    tracked_metrics = metrics_config.get('tracked_metrics') or [
+        {'name': metrics_config.get('default_metric', DEFAULT_METRIC_NAME)}
+    ]
+    
+    targets = []
+    seen = set()
+    for index, metric in enumerate(tracked_metrics):
+        if not isinstance(metric, dict) or not metric.get('name'):
+            raise ValueError(f'metrics.tracked_metrics[{index}]에 name이 없습니다')
+        for time_range in metric.get('time_ranges') or default_time_ranges:
+            for job in metric.get('jobs') or default_jobs:
+                key = (metric['name'], time_range, job)
+                if key in seen:
+                    continue
+                seen.add(key)
+                targets.append({
+                    'metric_name': metric['name'],
+                    'model_label': metric.get('model_label', DEFAULT_MODEL_LABEL),
+                    'time_range': time_range,
+                    'job': job,
+                })
+    
+    return targets
+
+
+def resolve_targets(
+    config: Dict,
+    metric_name: Optional[str] = None,
+    time_range: Optional[str] = None,
+    model_label: Optional[str] = None,
+    job: Optional[str] = None
+) -> List[Dict]:
+    """
+    명령줄 옵션과 설정으로 수집할 조합 목록을 결정합니다.
+    
+    metric_name을 지정하면 그 조합 하나만, 아니면 설정 파일의 tracked_metrics
+    전체를 수집합니다. 설정 파일도 없으면 기본 메트릭 하나를 수집합니다.
+    나머지 옵션은 지정된 경우 모든 조합의 값을 덮어씁니다.
+    
+    Args:
+        config: load_config()로 읽은 설정
+        metric_name: 수집할 메트릭 이름
+        time_range: 시간 범위
+        model_label: 모델 레이블 이름
+        job: Prometheus job 레이블 값
+        
+    Returns:
+        `metric_name`, `model_label`, `time_range`, `job` 키를 가진 딕셔너리 리스트
+    """
+    if metric_name or not config:
+        return [{
+            'metric_name': metric_name or DEFAULT_METRIC_NAME,
+            'model_label': model_label or DEFAULT_MODEL_LABEL,
+            'time_range': time_range or DEFAULT_TIME_RANGE,
+            'job': job or DEFAULT_JOB,
+        }]
+    
+    targets = {}
+    for target in get_collection_targets(config):
+        if time_range:
+            target['time_range'] = time_range
+        if model_label:
+            target['model_label'] = model_label
+        if job:
+            target['job'] = job
+        # 덮어쓴 값 때문에 같은 조합이 중복되지 않도록 정리
+        targets.setdefault((target['metric_name'], target['time_range'], target['job']), target)
+    return list(targets.values())
+
+
+def get_prometheus_url(config: Dict, override: Optional[str] = None) -> str:
+    """
+    Prometheus URL을 결정합니다 (명령줄 > 설정 파일 > settings.PROMETHEUS_URL).
+    
+    Args:
+        config: load_config()로 읽은 설정
+        override: 명령줄에서 지정한 URL
+        
+    Returns:
+        Prometheus 서버 URL
+    """
+    return (
+        override
+        or (config.get('prometheus') or {}).get('url')
+        or getattr(settings, 'PROMETHEUS_URL', 'http://localhost:9090')
+    )
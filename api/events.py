@@ -0,0 +1,239 @@
+"""
+실시간 상태 스트림 (Server-Sent Events)
+
+수집기가 새 세대를 게시할 때마다 알림을 보내고, 웹 서버 프로세스마다 하나인 브로드캐스터가
+알림을 받아 P95 스냅샷의 변경분(delta)을 한 번만 인코딩해 연결된 모든 클라이언트에 보냅니다.
+백엔드 부하는 보는 사람 수가 아니라 수집 횟수에 비례합니다.
+
+알림 채널:
+- settings.METRICS_EVENTS_REDIS_URL이 있으면 Redis pub/sub (여러 서버/워커)
+- 없으면 settings.METRICS_EVENTS_FILE에 세대 번호를 쓰고, 브로드캐스터가 파일 변경을 감시
+  (수집기와 웹 서버가 같은 호스트인 경우)
+
+이벤트 형식:
+- snapshot: 연결 직후 한 번, /api/metrics/p95/와 같은 본문
+- delta: 새 세대마다, P95가 바뀐 모델(`changed`)과 사라진 모델(`removed`), `last_updated`
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from api import snapshots
+import logging
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL = 'springboard:generation'
+
+# 파일 감시 주기 (초)
+FILE_POLL_SECONDS = 1.0
+
+# Redis 연결이 끊겼을 때 재연결 대기 (초)
+REDIS_RETRY_SECONDS = 5.0
+
+# 클라이언트별로 쌓아 둘 최대 이벤트 수 (넘치면 연결을 끊어 재접속 시 snapshot으로 다시 맞춤)
+CLIENT_QUEUE_SIZE = 8
+
+# 브라우저 EventSource 재접속 대기 (밀리초)
+RETRY_MILLISECONDS = 5000
+
+# 구독 키: (metric_name, time_range, job)
+ChannelKey = Tuple[str, str, Optional[str]]
+
+
+def _events_file() -> Path:
+    return Path(getattr(settings, 'METRICS_EVENTS_FILE', settings.BASE_DIR / '.cache' / 'generation'))
+
+
+def notify_generation(generation: int) -> None:
+    """
+    새 세대가 게시되었음을 웹 서버에 알립니다 (수집기에서 호출, 동기).
+
+    알림 실패는 로그만 남깁니다. 클라이언트는 다음 알림이나 재접속 시 snapshot으로 따라잡습니다.
+
+    Args:
+        generation: 새 세대 번호
+    """
+    redis_url = getattr(settings, 'METRICS_EVENTS_REDIS_URL', None)
+    try:
+        if redis_url:
+            import redis
+
+            client = redis.Redis.from_url(redis_url)
+            try:
+                client.publish(REDIS_CHANNEL, str(generation))
+            finally:
+                client.close()
+        else:
+            path = _events_file()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 감시하는 쪽이 쓰다 만 내용을 읽지 않도록 임시 파일에 쓴 뒤 교체
+            temp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            temp_path.write_text(str(generation))
+            os.replace(temp_path, path)
+    except Exception as e:
+        logger.warning(f'Failed to notify generation {generation}: {e}')
+
+
+def _load_snapshot(key: ChannelKey, generation: int) -> bytes:
+    metric_name, time_range, job = key
+    try:
+        return snapshots.get_snapshot(snapshots.P95, metric_name, time_range, job, generation)
+    finally:
+        close_old_connections()
+
+
+def _frame(event: str, payload: Dict, generation: int) -> bytes:
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return f'id: {generation}\nevent: {event}\ndata: {data}\n\n'.encode('utf-8')
+
+
+class _Channel:
+    """(메트릭, 시간 범위, job) 하나의 구독자와 마지막으로 보낸 상태"""
+
+    def __init__(self, key: ChannelKey):
+        self.key = key
+        self.subscribers = set()
+        self.generation = None
+        self.payload = None
+        self.items = {}
+
+    async def _load(self, generation: int) -> Dict:
+        # 알림 수신 태스크는 특정 요청의 스레드에 묶이지 않도록 별도 스레드에서 읽음
+        body = await sync_to_async(_load_snapshot, thread_sensitive=False)(self.key, generation)
+        return json.loads(body)
+
+    async def snapshot_frame(self) -> bytes:
+        """현재 세대의 전체 본문 (새 구독자용)"""
+        generation = await sync_to_async(snapshots.current_generation)()
+        if self.payload is None or self.generation != generation:
+            self._remember(generation, await self._load(generation))
+        return _frame('snapshot', self.payload, self.generation)
+
+    def _remember(self, generation: int, payload: Dict) -> None:
+        self.generation = generation
+        self.payload = payload
+        self.items = {item['model']: item for item in payload.get('data', [])}
+
+    async def advance(self, generation: int) -> None:
+        """새 세대의 변경분을 한 번 인코딩해서 모든 구독자 큐에 넣습니다."""
+        if not self.subscribers or generation == self.generation:
+            return
+
+        previous = self.items
+        self._remember(generation, await self._load(generation))
+
+        changed = [
+            item for model, item in self.items.items()
+            if model not in previous or previous[model]['p95_latency_ms'] != item['p95_latency_ms']
+        ]
+        removed = [model for model in previous if model not in self.items]
+        frame = _frame('delta', {
+            'changed': changed,
+            'removed': removed,
+            'last_updated': self.payload.get('last_updated'),
+        }, generation)
+
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # 따라오지 못하는 클라이언트는 끊음 (재접속하면 snapshot부터 다시 받음)
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+class Broadcaster:
+    """
+    프로세스당 하나인 알림 수신기 겸 팬아웃
+
+    첫 구독자가 생길 때 이벤트 루프에 알림 수신 태스크를 하나 띄우고,
+    새 세대를 받으면 구독자가 있는 채널마다 변경분을 한 번씩만 만듭니다.
+    """
+
+    def __init__(self):
+        self._channels: Dict[ChannelKey, _Channel] = {}
+        self._task = None
+        self._loop = None
+
+    async def subscribe(self, key: ChannelKey) -> Tuple[_Channel, asyncio.Queue, bytes]:
+        """
+        채널을 구독합니다.
+
+        Returns:
+            (채널, 이벤트 큐 - None을 받으면 연결 종료, 첫 snapshot 프레임)
+        """
+        self._ensure_listener()
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel(key)
+
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        frame = await channel.snapshot_frame()
+        channel.subscribers.add(queue)
+        return channel, queue, frame
+
+    def unsubscribe(self, channel: _Channel, queue: asyncio.Queue) -> None:
+        channel.subscribers.discard(queue)
+        if not channel.subscribers:
+            self._channels.pop(channel.key, None)
+
+    def _ensure_listener(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._task = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        redis_url = getattr(settings, 'METRICS_EVENTS_REDIS_URL', None)
+        source = self._redis_generations(redis_url) if redis_url else self._file_generations()
+        async for generation in source:
+            for channel in list(self._channels.values()):
+                try:
+                    await channel.advance(generation)
+                except Exception as e:
+                    logger.error(f'Failed to broadcast generation {generation} for {channel.key}: {e}', exc_info=True)
+
+    async def _file_generations(self):
+        path = _events_file()
+        last_mtime = None
+        while True:
+            try:
+                mtime = path.stat().st_mtime_ns
+                if mtime != last_mtime:
+                    last_mtime = mtime
+                    yield int(path.read_text())
+            except (OSError, ValueError):
+                pass
+            await asyncio.sleep(FILE_POLL_SECONDS)
+
+    async def _redis_generations(self, redis_url: str):
+        from redis import asyncio as redis_asyncio
+
+        while True:
+            client = redis_asyncio.Redis.from_url(redis_url)
+            try:
+                pubsub = client.pubsub()
+                await pubsub.subscribe(REDIS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        yield int(message['data'])
+            except Exception as e:
+                # redis.exceptions.ConnectionError 등 - 잠시 후 다시 구독
+                logger.warning(f'Redis event subscription failed, retrying: {e}')
+            finally:
+                await client.aclose()
+            await asyncio.sleep(REDIS_RETRY_SECONDS)
+
+
+broadcaster = Broadcaster()
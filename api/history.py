@@ -0,0 +1,275 @@
+"""
+히스토리 조회 공통 로직
+
+/api/metrics/history/와 배치 조회(/api/metrics/history/batch/)가 함께 쓰는
+옵션 검증, 포인트 읽기(원본/블록/롤업), 응답 형식 변환을 모아 둡니다.
+
+배치 조회는 쿼리들을 (메트릭, 시간 범위, job, 읽을 곳, 전체 모델 여부)로 묶어 묶음마다 한 번만 읽습니다.
+- 원본: 묶음에서 가장 긴 구간과 모델 목록 전체를 한 번에 읽고 쿼리마다 구간/모델을 잘라 씀
+- 롤업: 경계 구간 처리가 구간에 따라 달라지므로 같은 구간(hours)끼리만 묶음
+"""
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from api.blockstore import history_points
+from api.config import DEFAULT_METRIC_NAME, DEFAULT_TIME_RANGE
+from api.downsampling import bucket_seconds_for, minmax_downsample
+from api.rollups import load_rollup_points, pick_resolution
+from query_p95_metrics import parse_duration
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 다운샘플링 시 모델당 최대 포인트 수 상한
+MAX_HISTORY_POINTS = 10000
+
+# 응답 형식 (rows: 포인트마다 객체, columnar: 모델마다 병렬 배열)
+HISTORY_FORMATS = ['rows', 'columnar']
+
+Points = Dict[str, List[Tuple[datetime, float]]]
+
+
+def max_history_hours() -> int:
+    """hours 파라미터 상한 (settings.METRICS_HISTORY_MAX_DAYS)"""
+    return getattr(settings, 'METRICS_HISTORY_MAX_DAYS', 400) * 24
+
+
+def parse_hours(value) -> int:
+    """
+    조회 구간(hours)을 검증합니다.
+
+    Returns:
+        1 이상 max_history_hours() 이하의 시간 수
+
+    Raises:
+        ValueError: 정수가 아니거나 범위를 벗어난 경우
+    """
+    limit = max_history_hours()
+    try:
+        hours = int(value)
+    except (TypeError, ValueError):
+        hours = None
+    if hours is None or isinstance(value, bool) or not 0 < hours <= limit:
+        raise ValueError(f'hours must be an integer between 1 and {limit}')
+    return hours
+
+
+def parse_history_options(params) -> Dict:
+    """
+    히스토리 조회 옵션을 검증합니다 (GET 파라미터 또는 배치 쿼리 딕셔너리).
+
+    Args:
+        params: `hours`, `max_points`, `resolution` 키를 가질 수 있는 매핑
+
+    Returns:
+        `hours`(parse_hours), `max_points`(상한 적용), `bucket_seconds`(다운샘플링 안 하면 None)
+
+    Raises:
+        ValueError: 잘못된 값 (메시지에 설명)
+    """
+    hours = parse_hours(params.get('hours', 1))
+
+    try:
+        max_points = int(params['max_points']) if params.get('max_points') is not None else None
+        resolution = parse_duration(str(params['resolution'])) if params.get('resolution') is not None else None
+        if (max_points is not None and max_points < 2) or (resolution is not None and resolution <= 0):
+            raise ValueError
+    except (TypeError, ValueError, IndexError):
+        raise ValueError('max_points must be an integer >= 2 and resolution a duration like 5m')
+
+    if max_points is not None:
+        max_points = min(max_points, MAX_HISTORY_POINTS)
+
+    return {
+        'hours': hours,
+        'max_points': max_points,
+        'bucket_seconds': bucket_seconds_for(hours * 3600, max_points, resolution),
+    }
+
+
+def load_points(filters: Dict, start_time: datetime, end_time: datetime, bucket_seconds: Optional[float]) -> Tuple[Points, str]:
+    """
+    구간의 포인트를 읽습니다. 다운샘플링 버킷이 집계 단위보다 넓으면 롤업의 최솟값·최댓값 포인트를 읽습니다.
+
+    Returns:
+        (모델 이름별 시간 순 (시각, P95) 리스트, 읽은 곳: 'raw', '1h', '1d')
+    """
+    source = pick_resolution(bucket_seconds)
+    model_rows = load_rollup_points(filters, start_time, end_time, source) if source else None
+    if model_rows is None:
+        # 원본 히스토리 + 보관 기간이 지나 블록으로 묶인 날 (모델별, 처음 등장한 순서)
+        return history_points(filters, start_time, end_time), 'raw'
+    return model_rows, source
+
+
+def format_series(
+    model_rows: Points,
+    start_time: datetime,
+    end_time: datetime,
+    bucket_seconds: Optional[float],
+    columnar: bool
+) -> List[Dict]:
+    """
+    모델별 포인트를 응답 항목으로 바꿉니다 (필요하면 min/max 다운샘플링).
+
+    Returns:
+        rows: {'model', 'data_points': [{'timestamp', 'p95_latency_ms'}, ...]} 리스트
+        columnar: {'model', 'timestamps': [에포크 밀리초], 'p95_latency_ms': [...]} 리스트
+    """
+    formatted_data = []
+    for model, points in model_rows.items():
+        if bucket_seconds or columnar:
+            timestamps = np.fromiter((t.timestamp() for t, _ in points), dtype=np.float64, count=len(points))
+            values = np.fromiter((v for _, v in points), dtype=np.float64, count=len(points))
+
+        if bucket_seconds:
+            # 버킷마다 최솟값/최댓값만 남김 (스파이크 보존)
+            keep = minmax_downsample(
+                timestamps, values, start_time.timestamp(), end_time.timestamp(), bucket_seconds
+            )
+            if columnar:
+                timestamps, values = timestamps[keep], values[keep]
+            else:
+                points = [points[i] for i in keep.tolist()]
+
+        if columnar:
+            # 포인트마다 딕셔너리/ISO 문자열을 만들지 않고 배열 단위로 변환
+            formatted_data.append({
+                'model': model,
+                'timestamps': np.rint(timestamps * 1000).astype(np.int64).tolist(),
+                'p95_latency_ms': np.round(values, 2).tolist(),
+            })
+            continue
+
+        formatted_data.append({
+            'model': model,
+            'data_points': [
+                {
+                    'timestamp': timestamp.isoformat(),
+                    'p95_latency_ms': round(p95, 2)
+                }
+                for timestamp, p95 in points
+            ]
+        })
+    return formatted_data
+
+
+def history_payload(
+    formatted_data: List[Dict],
+    start_time: datetime,
+    end_time: datetime,
+    options: Dict,
+    source: str,
+    columnar: bool
+) -> Dict:
+    """/api/metrics/history/ 응답 본문 (배치 조회는 쿼리마다 같은 형태)"""
+    if not formatted_data:
+        return {
+            'status': 'success',
+            'data': [],
+            'count': 0
+        }
+
+    payload = {
+        'status': 'success',
+        'data': formatted_data,
+        'count': len(formatted_data),
+        'time_range': {
+            'start': start_time.isoformat(),
+            'end': end_time.isoformat(),
+            'hours': options['hours']
+        }
+    }
+    if columnar:
+        payload['format'] = 'columnar'
+    if options['bucket_seconds']:
+        payload['downsampling'] = {
+            'method': 'minmax',
+            'bucket_seconds': round(options['bucket_seconds'], 3),
+            'max_points': options['max_points'],
+            'source': source,
+        }
+    return payload
+
+
+def run_batch(queries: List[Dict], end_time: datetime, columnar: bool) -> List[Dict]:
+    """
+    여러 히스토리 쿼리를 묶어서 최소한의 조회로 실행합니다.
+
+    Args:
+        queries: parse_history_options() 결과에 `model_name`, `metric_name`, `time_range`, `job`을
+            더한 쿼리 리스트
+        end_time: 모든 쿼리의 구간 끝 (마지막 수집 시각)
+        columnar: 열 형식으로 응답
+
+    Returns:
+        쿼리 순서대로 history_payload() 형태의 응답 리스트
+    """
+    groups = {}
+    for index, query in enumerate(queries):
+        series = (
+            query.get('metric_name') or DEFAULT_METRIC_NAME,
+            query.get('time_range') or DEFAULT_TIME_RANGE,
+            query.get('job') or None,
+        )
+        resolution = pick_resolution(query['bucket_seconds'])
+        # 롤업 조회는 구간 경계 처리가 hours마다 다르므로 같은 hours끼리만 묶고,
+        # 모든 모델을 읽는 쿼리는 특정 모델 쿼리들의 구간을 넓히지 않도록 따로 묶음
+        group_key = series + (
+            (resolution, query['hours']) if resolution else ('raw', None),
+            not query.get('model_name'),
+        )
+        groups.setdefault(group_key, []).append(index)
+
+    results = [None] * len(queries)
+    for (metric_name, time_range, job, (source, _), _), indexes in groups.items():
+        hours = max(queries[index]['hours'] for index in indexes)
+        start_time = end_time - timedelta(hours=hours)
+        filters = {
+            'metric_name': metric_name,
+            'time_range': time_range,
+            'timestamp__gte': start_time,
+            'timestamp__lte': end_time,
+        }
+        if job:
+            filters['job'] = job
+        model_names = {queries[index].get('model_name') or None for index in indexes}
+        if None not in model_names:
+            filters['model_name__in'] = sorted(model_names)
+
+        if source == 'raw':
+            model_rows = history_points(filters, start_time, end_time)
+        else:
+            model_rows = load_rollup_points(filters, start_time, end_time, source)
+            if model_rows is None:
+                source = 'raw'
+                model_rows = history_points(filters, start_time, end_time)
+
+        for index in indexes:
+            query = queries[index]
+            query_start = end_time - timedelta(hours=query['hours'])
+            selected = _slice_points(model_rows, query.get('model_name') or None, query_start)
+            results[index] = history_payload(
+                format_series(selected, query_start, end_time, query['bucket_seconds'], columnar),
+                query_start, end_time, query, source, columnar,
+            )
+
+    return results
+
+
+def _slice_points(model_rows: Points, model_name: Optional[str], start_time: datetime) -> Points:
+    """묶음으로 읽은 포인트에서 쿼리 하나의 모델과 구간 시작 이후만 고릅니다 (포인트는 시간 순)."""
+    selected = {}
+    for model, points in model_rows.items():
+        if model_name and model != model_name:
+            continue
+        first = bisect_left(points, start_time, key=lambda point: point[0])
+        if first < len(points):
+            selected[model] = points[first:] if first else points
+    # 단독 조회와 같이 구간 안에서 먼저 등장한 모델부터
+    return dict(sorted(selected.items(), key=lambda item: item[1][0][0]))
@@ -0,0 +1,159 @@
+"""
+springboard 자체 계측 (Prometheus 메트릭)
+
+수집기와 API가 스스로 얼마나 걸리는지를 Prometheus 형식으로 노출합니다.
+
+- HTTP 메트릭(뷰별 지연 시간, SQL 쿼리 수)은 기본 레지스트리에 등록되어
+  Django의 `/metrics` 엔드포인트로 노출됩니다.
+- 수집기 메트릭(쿼리 지연, 단계별 소요 시간, 저장 행 수)은 COLLECTOR_REGISTRY에 등록되어
+  `/metrics`와 함께 textfile 또는 Pushgateway로 내보낼 수 있습니다.
+  collect_metrics처럼 짧게 끝나는 프로세스는 스크레이프될 틈이 없기 때문입니다.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from django.conf import settings
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    push_to_gateway,
+    write_to_textfile,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 수집기 메트릭 전용 레지스트리 (textfile/Pushgateway로 내보내는 단위)
+COLLECTOR_REGISTRY = CollectorRegistry()
+
+# Prometheus 쿼리는 수 ms ~ 수십 초까지 분포
+QUERY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+PROMETHEUS_QUERY_DURATION = Histogram(
+    'springboard_prometheus_query_duration_seconds',
+    'Prometheus HTTP API 요청 소요 시간 (재시도 포함)',
+    ['endpoint', 'percentile', 'outcome'],
+    buckets=QUERY_BUCKETS,
+    registry=COLLECTOR_REGISTRY,
+)
+COLLECTOR_PHASE_DURATION = Histogram(
+    'springboard_collector_phase_duration_seconds',
+    '수집 단계(query, parse, write)별 소요 시간',
+    ['phase'],
+    buckets=QUERY_BUCKETS,
+    registry=COLLECTOR_REGISTRY,
+)
+COLLECTOR_RUN_DURATION = Histogram(
+    'springboard_collector_run_duration_seconds',
+    '수집 1회 전체 소요 시간',
+    buckets=QUERY_BUCKETS,
+    registry=COLLECTOR_REGISTRY,
+)
+COLLECTOR_ROWS_WRITTEN = Histogram(
+    'springboard_collector_rows_written',
+    '수집 1회에 저장한 테이블별 행 수',
+    ['table'],
+    buckets=ROW_BUCKETS,
+    registry=COLLECTOR_REGISTRY,
+)
+COLLECTOR_LAST_SUCCESS = Gauge(
+    'springboard_collector_last_success_timestamp_seconds',
+    '마지막으로 수집에 성공한 시각 (에포크 초)',
+    registry=COLLECTOR_REGISTRY,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    'springboard_http_request_duration_seconds',
+    '뷰별 HTTP 요청 처리 시간',
+    ['view', 'method', 'status'],
+)
+HTTP_DB_QUERIES = Histogram(
+    'springboard_http_db_queries',
+    '뷰별 HTTP 요청 1회에 실행된 SQL 쿼리 수',
+    ['view'],
+    buckets=DB_QUERY_BUCKETS,
+)
+
+_QUANTILE_PATTERN = re.compile(r'^histogram_quantile\(([0-9.]+),')
+
+
+def observe_prometheus_query(endpoint: str, params: Dict, elapsed: float, outcome: str) -> None:
+    """
+    PrometheusP95Query의 on_query 콜백. 쿼리 지연을 백분위수별로 기록합니다.
+
+    버킷 rate를 한 번 조회해서 로컬로 계산하는 쿼리는 percentile="buckets"로 기록합니다.
+
+    Args:
+        endpoint: API 경로 (query, query_range 등)
+        params: 요청 파라미터
+        elapsed: 소요 시간 (초)
+        outcome: 요청 결과 (success, error, sharded)
+    """
+    match = _QUANTILE_PATTERN.match(params.get('query', ''))
+    PROMETHEUS_QUERY_DURATION.labels(
+        endpoint=endpoint,
+        percentile=match.group(1) if match else 'buckets',
+        outcome=outcome,
+    ).observe(elapsed)
+
+
+@contextmanager
+def collector_phase(phase: str):
+    """with 블록의 소요 시간을 수집 단계 히스토그램에 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        COLLECTOR_PHASE_DURATION.labels(phase=phase).observe(time.perf_counter() - started)
+
+
+def observe_collector_run(elapsed: float, rows_written: Dict[str, int]) -> None:
+    """
+    수집 1회의 결과를 기록합니다.
+
+    Args:
+        elapsed: 전체 소요 시간 (초)
+        rows_written: 테이블 이름별 저장한 행 수
+    """
+    COLLECTOR_RUN_DURATION.observe(elapsed)
+    for table, count in rows_written.items():
+        COLLECTOR_ROWS_WRITTEN.labels(table=table).observe(count)
+    COLLECTOR_LAST_SUCCESS.set_to_current_time()
+
+
+def export_collector_metrics() -> None:
+    """
+    수집기 메트릭을 설정된 곳으로 내보냅니다. 실패해도 수집에는 영향을 주지 않습니다.
+
+    - settings.COLLECTOR_METRICS_TEXTFILE: node_exporter textfile collector가 읽을 .prom 파일 경로
+    - settings.COLLECTOR_PUSHGATEWAY_URL: Pushgateway 주소 (job="springboard_collector")
+    """
+    textfile = getattr(settings, 'COLLECTOR_METRICS_TEXTFILE', None)
+    pushgateway_url = getattr(settings, 'COLLECTOR_PUSHGATEWAY_URL', None)
+
+    if textfile:
+        try:
+            # 임시 파일에 쓴 뒤 rename하므로 반쯤 쓰인 파일이 읽히지 않음
+            write_to_textfile(str(textfile), COLLECTOR_REGISTRY)
+        except OSError as e:
+            logger.warning(f'Failed to write collector metrics to {textfile}: {e}')
+
+    if pushgateway_url:
+        try:
+            push_to_gateway(pushgateway_url, job='springboard_collector', registry=COLLECTOR_REGISTRY)
+        except Exception as e:
+            logger.warning(f'Failed to push collector metrics to {pushgateway_url}: {e}')
+
+
+def render_metrics() -> bytes:
+    """`/metrics` 응답 본문 (HTTP 메트릭 + 이 프로세스의 수집기 메트릭)"""
+    return generate_latest(REGISTRY) + generate_latest(COLLECTOR_REGISTRY)
+
@@ -0,0 +1,178 @@
+"""
+수집기 실행 기록 (CollectorRun)
+
+수집기는 실행이 끝날 때마다(실패해도) 시작·종료 시각, 소요 시간, 저장한 모델 수,
+Prometheus 쿼리 수와 실패 수를 CollectorRun에 한 행씩 남기고,
+헬스 체크가 쓸 요약(마지막 실행, 마지막 성공, 최근 소요 시간 추이)을 캐시에 저장합니다.
+
+/api/health/는 캐시의 요약만 읽으므로 메트릭 테이블을 조회하지 않고,
+캐시가 비어 있으면 최근 실행 기록 몇 행으로 요약을 다시 만듭니다.
+"""
+
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.models import CollectorRun
+from query_p95_metrics import QUERY_ERROR, QUERY_SHARDED
+import logging
+
+logger = logging.getLogger(__name__)
+
+HEALTH_SUMMARY_KEY = 'springboard:collector_run:summary'
+
+# 소요 시간 추이를 계산할 최근 실행 수
+TREND_RUNS = 20
+
+
+class QueryCounter:
+    """
+    PrometheusP95Query의 on_query 콜백을 감싸 실행 1회의 쿼리 수와 실패 수를 셉니다.
+
+    너무 커서 샤드로 나눠 다시 조회한 쿼리(sharded)는 실패가 아니므로 따로 셉니다.
+    쿼리는 스레드 풀에서 동시에 끝나므로 잠금으로 셉니다.
+    """
+
+    def __init__(self, inner: Optional[Callable] = None):
+        self.inner = inner
+        self.issued = 0
+        self.failed = 0
+        self.sharded = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, endpoint: str, params: Dict, elapsed: float, outcome: str) -> None:
+        with self._lock:
+            self.issued += 1
+            if outcome == QUERY_ERROR:
+                self.failed += 1
+            elif outcome == QUERY_SHARDED:
+                self.sharded += 1
+        if self.inner is not None:
+            self.inner(endpoint, params, elapsed, outcome)
+
+
+def run_status(targets_failed: int, targets: int, queries_failed: int, error: str) -> str:
+    """
+    실행 결과: 예외가 났거나 모든 조합이 실패하면 failed, 복구되지 않은 실패가 있으면 partial
+
+    queries_failed는 QueryCounter가 센 최종 실패만 포함합니다. 재시도로 성공한 요청이나
+    샤드로 나눠 다시 조회한 요청(sharded)은 세지 않으므로, 샤딩이 모두 성공한 실행은 success입니다.
+    """
+    if error or (targets and targets_failed >= targets):
+        return 'failed'
+    if targets_failed or queries_failed:
+        return 'partial'
+    return 'success'
+
+
+def record_run(**fields) -> Optional[CollectorRun]:
+    """
+    실행 기록을 저장하고 헬스 체크 요약을 갱신합니다. 실패해도 수집에는 영향을 주지 않습니다.
+
+    Args:
+        fields: CollectorRun 필드 (status 제외 - targets/targets_failed/queries_failed/error로 계산)
+
+    Returns:
+        저장한 CollectorRun (저장에 실패하면 None)
+    """
+    fields['status'] = run_status(
+        fields.get('targets_failed', 0),
+        fields.get('targets', 0),
+        fields.get('queries_failed', 0),
+        fields.get('error', ''),
+    )
+    try:
+        run = CollectorRun.objects.create(**fields)
+        cache.set(HEALTH_SUMMARY_KEY, build_summary(), timeout=None)
+        return run
+    except Exception as e:
+        logger.error(f'Failed to record collector run: {e}', exc_info=True)
+        return None
+
+
+def health_summary() -> Optional[Dict]:
+    """
+    헬스 체크용 요약을 반환합니다 (캐시에 없으면 최근 실행 기록으로 다시 만듦).
+
+    Returns:
+        요약 딕셔너리 (실행 기록이 없으면 None)
+    """
+    summary = cache.get(HEALTH_SUMMARY_KEY)
+    if summary is None:
+        summary = build_summary()
+        if summary is not None:
+            cache.add(HEALTH_SUMMARY_KEY, summary, timeout=None)
+    return summary
+
+
+def build_summary() -> Optional[Dict]:
+    """
+    최근 TREND_RUNS개 실행 기록으로 요약을 만듭니다 (started_at 인덱스로 몇 행만 읽음).
+
+    Returns:
+        `last_run`, `last_success`, `trend` 를 담은 딕셔너리 (실행 기록이 없으면 None)
+    """
+    runs = list(CollectorRun.objects.order_by('-started_at')[:TREND_RUNS])
+    if not runs:
+        return None
+
+    last_success = next((run for run in runs if run.status != 'failed'), None)
+    if last_success is None:
+        last_success = CollectorRun.objects.exclude(status='failed').order_by('-started_at').first()
+
+    return {
+        'last_run': _run_dict(runs[0]),
+        'last_success': _run_dict(last_success) if last_success else None,
+        'trend': _trend(runs),
+    }
+
+
+def expire_runs(now, dry_run: bool = False) -> int:
+    """
+    settings.METRICS_COLLECTOR_RUN_RETENTION_DAYS가 지난 실행 기록을 지웁니다.
+
+    Returns:
+        지운(dry_run이면 지울) 행 수
+    """
+    cutoff = now - timedelta(days=getattr(settings, 'METRICS_COLLECTOR_RUN_RETENTION_DAYS', 30))
+    expired = CollectorRun.objects.filter(started_at__lt=cutoff)
+    if dry_run:
+        return expired.count()
+    count, _ = expired.delete()
+    return count
+
+
+def _run_dict(run: CollectorRun) -> Dict:
+    return {
+        'started_at': run.started_at.isoformat(),
+        'finished_at': run.finished_at.isoformat(),
+        'duration_seconds': round(run.duration_seconds, 3),
+        'status': run.status,
+        'targets': run.targets,
+        'targets_failed': run.targets_failed,
+        'models_written': run.models_written,
+        'model_count': run.model_count,
+        'queries_issued': run.queries_issued,
+        'queries_failed': run.queries_failed,
+        'error': run.error,
+    }
+
+
+def _trend(runs: List[CollectorRun]) -> Dict:
+    """최근 실행들의 소요 시간 추이 (runs는 최신순)"""
+    durations = [run.duration_seconds for run in runs]
+    half = len(durations) // 2
+    recent, earlier = durations[:half], durations[half:]
+    return {
+        'runs': len(runs),
+        'avg_duration_seconds': round(sum(durations) / len(durations), 3),
+        'max_duration_seconds': round(max(durations), 3),
+        # 최근 절반의 평균 / 이전 절반의 평균 (1보다 크면 느려지는 중)
+        'duration_ratio': round((sum(recent) / len(recent)) / (sum(earlier) / len(earlier)), 2)
+        if recent and sum(earlier) else None,
+        'failed_runs': sum(1 for run in runs if run.status == 'failed'),
+        'partial_runs': sum(1 for run in runs if run.status == 'partial'),
+    }
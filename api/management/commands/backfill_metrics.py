@@ -0,0 +1,275 @@
+"""
+메트릭 히스토리 백필 Management Command
+
+수집기가 멈춰 있던 구간의 ModelMetricHistory를 Prometheus range 쿼리로 채웁니다.
+구간을 시간 청크로 나눠 동시에 조회하고, 응답은 스트리밍으로 읽어 시리즈별 배열로만 보관한 뒤
+끝나는 청크부터 바로 일괄 insert하므로 전체 구간을 메모리에 올리지 않습니다. 이미 저장된 시점(스텝 단위)은 건너뜁니다.
+
+사용법:
+    python3 manage.py backfill_metrics --from 7d
+    python3 manage.py backfill_metrics --from 2025-10-01T00:00:00+09:00 --to 2025-10-02T00:00:00+09:00 --step 1m
+
+--step을 생략하면 수집 주기(settings.COLLECTOR_INTERVAL)와 같은 간격으로 채우므로
+백필한 구간도 수집기가 남긴 히스토리와 포인트 밀도가 같습니다.
+    python3 manage.py backfill_metrics --from 24h --metric-name api_latency_seconds --model-label model_name
+"""
+
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api.collector import BULK_BATCH_SIZE, build_prometheus_client
+from api.config import get_prometheus_url, load_config, resolve_targets
+from api.models import ModelMetricHistory
+from api.rollups import apply_history
+from api.snapshots import bump_generation
+from matrix_stream import iter_series_points
+from query_p95_metrics import parse_duration
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Prometheus가 한 시리즈에 대해 반환하는 최대 포인트 수
+MAX_POINTS_PER_QUERY = 11000
+
+
+class Command(BaseCommand):
+    help = 'Prometheus range 쿼리로 지나간 구간의 메트릭 히스토리를 채웁니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='start',
+            type=str,
+            required=True,
+            help='시작 시각 (ISO 8601 또는 현재 기준 상대 시간, 예: 7d, 12h)'
+        )
+        parser.add_argument(
+            '--to',
+            dest='end',
+            type=str,
+            default=None,
+            help='종료 시각 (ISO 8601 또는 상대 시간, 기본값: 현재)'
+        )
+        parser.add_argument(
+            '--step',
+            type=str,
+            default=None,
+            help='데이터 포인트 간격 (예: 1m, 기본값: 수집 주기 settings.COLLECTOR_INTERVAL)'
+        )
+        parser.add_argument(
+            '--chunk',
+            type=str,
+            default='6h',
+            help='한 번의 range 쿼리로 조회할 구간 길이 (기본값: 6h)'
+        )
+        parser.add_argument(
+            '--prometheus-url',
+            type=str,
+            default=None,
+            help='Prometheus 서버 URL (기본값: config.yaml 또는 settings.PROMETHEUS_URL)'
+        )
+        parser.add_argument(
+            '--config',
+            type=str,
+            default=None,
+            help='수집 설정 파일 경로 (기본값: settings.METRICS_CONFIG_PATH)'
+        )
+        parser.add_argument(
+            '--metric-name',
+            type=str,
+            default=None,
+            help='백필할 메트릭 이름 (지정하면 설정 파일 대신 이 조합만 백필)'
+        )
+        parser.add_argument(
+            '--time-range',
+            type=str,
+            default=None,
+            help='rate 윈도우'
+        )
+        parser.add_argument(
+            '--model-label',
+            type=str,
+            default=None,
+            help='모델 레이블 이름'
+        )
+        parser.add_argument(
+            '--job',
+            type=str,
+            default=None,
+            help='Prometheus job 레이블 값'
+        )
+
+    def handle(self, *args, **options):
+        config = load_config(options['config'])
+        targets = resolve_targets(
+            config,
+            metric_name=options['metric_name'],
+            time_range=options['time_range'],
+            model_label=options['model_label'],
+            job=options['job'],
+        )
+        prometheus_url = get_prometheus_url(config, options['prometheus_url'])
+
+        now = timezone.now().timestamp()
+        if options['step']:
+            step = parse_duration(options['step'])
+        else:
+            step = int(getattr(settings, 'COLLECTOR_INTERVAL', 300))
+        chunk = parse_duration(options['chunk'])
+        start = self._parse_time(options['start'], now)
+        end = self._parse_time(options['end'], now) if options['end'] else now
+
+        if start >= end:
+            raise CommandError('--from은 --to보다 이전이어야 합니다')
+        if chunk // step > MAX_POINTS_PER_QUERY:
+            raise CommandError(
+                f'--chunk/--step은 {MAX_POINTS_PER_QUERY} 포인트 이하여야 합니다'
+            )
+
+        prom_query = build_prometheus_client(prometheus_url, config)
+
+        # 스텝 경계에 맞춰 재실행해도 같은 시점이 조회되도록 정렬
+        start = math.floor(start / step) * step
+        chunks = []
+        for target in targets:
+            chunk_start = start
+            while chunk_start <= end:
+                chunk_end = min(chunk_start + chunk - step, end)
+                chunks.append((target, chunk_start, chunk_end))
+                chunk_start += chunk
+
+        params_list = [
+            {
+                'query': prom_query.quantile_expr(
+                    0.95,
+                    target['metric_name'],
+                    target['time_range'],
+                    target['model_label'],
+                    target['job'],
+                ),
+                'start': chunk_start,
+                'end': chunk_end,
+                'step': step,
+            }
+            for target, chunk_start, chunk_end in chunks
+        ]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{"="*60}\n'
+            f'🚀 메트릭 백필 시작: {self._format_time(start)} ~ {self._format_time(end)}\n'
+            f'{"="*60}'
+        ))
+        self.stdout.write(f'Prometheus URL: {prometheus_url}')
+        self.stdout.write(f'{len(targets)}개 조합, {len(chunks)}개 청크 (스텝 {step}초)\n')
+
+        written_total = skipped_total = failed = 0
+        with prom_query:
+            # 끝나는 청크부터 바로 저장 (진행 중인 청크 수는 max_concurrency로 제한)
+            for index, series in prom_query.iter_range_series_many(params_list, timeout=60):
+                target, chunk_start, chunk_end = chunks[index]
+
+                if series is None:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(
+                        f'❌ {target["metric_name"]} {self._format_time(chunk_start)} 청크 조회 실패'
+                    ))
+                    continue
+
+                written, skipped = self._store_chunk(target, chunk_start, chunk_end, step, series)
+                written_total += written
+                skipped_total += skipped
+                self.stdout.write(
+                    f'📥 {target["metric_name"]} [{target["time_range"]}, job={target["job"]}] '
+                    f'{self._format_time(chunk_start)}: {written}개 저장, {skipped}개 건너뜀'
+                )
+
+        if written_total:
+            # 히스토리가 바뀌었으므로 API의 ETag/스냅샷을 무효화
+            bump_generation()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{"="*60}\n'
+            f'✅ 백필 완료: {written_total}개 저장, {skipped_total}개 건너뜀, 실패 청크 {failed}개\n'
+            f'{"="*60}\n'
+        ))
+        logger.info(
+            f'Backfill finished: written={written_total}, skipped={skipped_total}, '
+            f'failed_chunks={failed}'
+        )
+
+    def _store_chunk(self, target, chunk_start, chunk_end, step, series):
+        """
+        청크 하나의 포인트를 이미 저장된 시점을 제외하고 일괄 insert하고 롤업에 반영합니다.
+
+        Returns:
+            (저장한 포인트 수, 건너뛴 포인트 수)
+        """
+        filters = {
+            'metric_name': target['metric_name'],
+            'time_range': target['time_range'],
+            'job': target['job'],
+        }
+
+        # 이 청크 구간에 이미 있는 (모델, 스텝 번호) - 수집기가 저장한 시점도 포함
+        existing = set()
+        stored = ModelMetricHistory.objects.filter(
+            timestamp__gte=self._to_datetime(chunk_start - step / 2),
+            timestamp__lt=self._to_datetime(chunk_end + step / 2),
+            **filters,
+        ).values_list('model_name', 'timestamp')
+        for model_name, timestamp in stored.iterator(chunk_size=BULK_BATCH_SIZE):
+            existing.add((model_name, round((timestamp.timestamp() - chunk_start) / step)))
+
+        written = skipped = 0
+        batch = []
+        with transaction.atomic():
+            for model_name, timestamp, value in iter_series_points(series, target['model_label']):
+                if not math.isfinite(value):
+                    continue
+                if (model_name, round((timestamp - chunk_start) / step)) in existing:
+                    skipped += 1
+                    continue
+
+                batch.append(ModelMetricHistory(
+                    model_name=model_name,
+                    p95_latency_ms=round(value * 1000, 2),  # 초를 밀리초로 변환
+                    timestamp=self._to_datetime(timestamp),
+                    prometheus_timestamp=timestamp,
+                    **filters,
+                ))
+                if len(batch) >= BULK_BATCH_SIZE:
+                    ModelMetricHistory.objects.bulk_create(batch)
+                    apply_history(batch)
+                    written += len(batch)
+                    batch = []
+
+            if batch:
+                ModelMetricHistory.objects.bulk_create(batch)
+                apply_history(batch)
+                written += len(batch)
+
+        return written, skipped
+
+    def _parse_time(self, value, now):
+        """ISO 8601 시각 또는 현재 기준 상대 시간(예: 7d)을 에포크 초로 변환합니다."""
+        parsed = parse_datetime(value)
+        if parsed is not None:
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            return parsed.timestamp()
+
+        try:
+            return now - parse_duration(value)
+        except ValueError:
+            raise CommandError(f'시각을 해석할 수 없습니다: {value}')
+
+    def _to_datetime(self, timestamp):
+        return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+    def _format_time(self, timestamp):
+        return timezone.localtime(self._to_datetime(timestamp)).strftime('%Y-%m-%d %H:%M')
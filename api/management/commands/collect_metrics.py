@@ -2,17 +2,22 @@
 Prometheus 메트릭 수집 Management Command
 
 5분마다 실행되어 Prometheus에서 메트릭을 수집하고 DB에 저장합니다.
+config.yaml의 tracked_metrics에 정의된 모든 (메트릭, 시간 범위, job) 조합을
+한 번의 실행에서 동시에 조회합니다.
 
 사용법:
     python3 manage.py collect_metrics
     python3 manage.py collect_metrics --prometheus-url http://prometheus:9090
+    python3 manage.py collect_metrics --config /etc/springboard/config.yaml
+    python3 manage.py collect_metrics --metric-name api_latency_seconds --model-label model_name
 """
 
 from django.core.management.base import BaseCommand
-from django.conf import settings
-from django.utils import timezone
-from api.models import ModelMetric, ModelMetricHistory
-from query_p95_metrics import PrometheusP95Query
+from api.collector import MetricsCollector, build_prometheus_client
+from api.config import get_prometheus_url, load_config, resolve_targets
+from api.instrumentation import export_collector_metrics
+from api.sla import SlaEngine
+from api.slo import SloTracker
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,136 +30,114 @@ class Command(BaseCommand):
         parser.add_argument(
             '--prometheus-url',
             type=str,
-            default=getattr(settings, 'PROMETHEUS_URL', 'http://localhost:9090'),
-            help='Prometheus 서버 URL'
+            default=None,
+            help='Prometheus 서버 URL (기본값: config.yaml 또는 settings.PROMETHEUS_URL)'
+        )
+        parser.add_argument(
+            '--config',
+            type=str,
+            default=None,
+            help='수집 설정 파일 경로 (기본값: settings.METRICS_CONFIG_PATH)'
         )
         parser.add_argument(
             '--metric-name',
             type=str,
-            default='request_duration_seconds',
-            help='수집할 메트릭 이름'
+            default=None,
+            help='수집할 메트릭 이름 (지정하면 설정 파일 대신 이 조합만 수집)'
         )
         parser.add_argument(
             '--time-range',
             type=str,
-            default='5m',
+            default=None,
             help='시간 범위'
         )
         parser.add_argument(
             '--model-label',
             type=str,
-            default='model',
+            default=None,
             help='모델 레이블 이름'
         )
+        parser.add_argument(
+            '--job',
+            type=str,
+            default=None,
+            help='Prometheus job 레이블 값'
+        )
+        parser.add_argument(
+            '--server-quantiles',
+            action='store_true',
+            help='백분위수마다 histogram_quantile 쿼리를 보냄 (기본: 버킷 rate 1회 조회 후 로컬 계산)'
+        )
 
     def handle(self, *args, **options):
-        prometheus_url = options['prometheus_url']
-        metric_name = options['metric_name']
-        time_range = options['time_range']
-        model_label = options['model_label']
-        
+        config = load_config(options['config'])
+        targets = resolve_targets(
+            config,
+            metric_name=options['metric_name'],
+            time_range=options['time_range'],
+            model_label=options['model_label'],
+            job=options['job'],
+        )
+        prometheus_url = get_prometheus_url(config, options['prometheus_url'])
+        local_quantiles = not options['server_quantiles']
+        sla = SlaEngine.from_config(config)
+        slo = SloTracker.from_config(config, dispatcher=sla.dispatcher if sla else None)
+
         self.stdout.write(self.style.SUCCESS(
             f'\n{"="*60}\n'
             f'🚀 메트릭 수집 시작\n'
             f'{"="*60}'
         ))
         self.stdout.write(f'Prometheus URL: {prometheus_url}')
-        self.stdout.write(f'메트릭: {metric_name}')
-        self.stdout.write(f'시간 범위: {time_range}\n')
-        
-        try:
-            # PrometheusP95Query 인스턴스 생성
-            prom_query = PrometheusP95Query(prometheus_url)
-            
-            # 여러 백분위수 조회 (P50, P95, P99)
-            percentiles = [0.50, 0.95, 0.99]
-            results = prom_query.query_multiple_percentiles(
-                metric_name=metric_name,
-                percentiles=percentiles,
-                time_range=time_range,
-                model_label=model_label
+        for target in targets:
+            self.stdout.write(
+                f'메트릭: {target["metric_name"]} '
+                f'(시간 범위: {target["time_range"]}, job: {target["job"]})'
             )
-            
-            # 수집 시간
-            collected_at = timezone.now()
-            
-            # 모델별로 데이터 재구성
-            model_stats = {}
-            
-            for percentile, result in results.items():
-                if result.get('status') == 'success':
-                    data = result.get('data', {})
-                    result_list = data.get('result', [])
-                    
-                    for item in result_list:
-                        metric = item.get('metric', {})
-                        model_name = metric.get(model_label, 'Unknown')
-                        
-                        if 'value' in item:
-                            timestamp, value = item['value']
-                            value_ms = float(value) * 1000  # 초를 밀리초로 변환
-                            
-                            if model_name not in model_stats:
-                                model_stats[model_name] = {
-                                    'prometheus_timestamp': timestamp,
-                                }
-                            
-                            percentile_key = f'p{int(percentile*100)}'
-                            model_stats[model_name][percentile_key] = round(value_ms, 2)
-            
-            # DB에 저장
+        self.stdout.write('')
+
+        try:
+            # 모든 조합을 하나의 커넥션 풀 위에서 동시에 조회
+            with build_prometheus_client(prometheus_url, config) as prom_query:
+                collector = MetricsCollector(prom_query, local_quantiles=local_quantiles, sla=sla, slo=slo)
+                collections = collector.collect(targets)
+
             saved_count = 0
-            for model_name, stats in model_stats.items():
-                # ModelMetric 저장 (최신 데이터)
-                metric, created = ModelMetric.objects.update_or_create(
-                    model_name=model_name,
-                    metric_name=metric_name,
-                    time_range=time_range,
-                    defaults={
-                        'p50_latency_ms': stats.get('p50'),
-                        'p95_latency_ms': stats.get('p95'),
-                        'p99_latency_ms': stats.get('p99'),
-                        'prometheus_timestamp': stats.get('prometheus_timestamp'),
-                        'collected_at': collected_at,
-                    }
-                )
-                
-                # ModelMetricHistory 저장 (히스토리)
-                if stats.get('p95'):
-                    ModelMetricHistory.objects.create(
-                        model_name=model_name,
-                        metric_name=metric_name,
-                        p95_latency_ms=stats.get('p95'),
-                        timestamp=collected_at,
-                        prometheus_timestamp=stats.get('prometheus_timestamp'),
-                    )
-                
-                saved_count += 1
-                
-                status_icon = "✨" if created else "🔄"
+            for collection in collections:
+                target = collection['target']
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f'{status_icon} {model_name}: '
-                        f'P50={stats.get("p50")}ms, '
-                        f'P95={stats.get("p95")}ms, '
-                        f'P99={stats.get("p99")}ms'
-                    )
+                    f'\n📊 {target["metric_name"]} [{target["time_range"]}, job={target["job"]}]'
                 )
-            
+                if not collection['succeeded']:
+                    self.stdout.write(self.style.WARNING('⚠️  조회 실패'))
+
+                for model_name, stats in collection['model_stats'].items():
+                    status_icon = "✨" if model_name in collection['created'] else "🔄"
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'{status_icon} {model_name}: '
+                            f'P50={stats.get("p50")}ms, '
+                            f'P95={stats.get("p95")}ms, '
+                            f'P99={stats.get("p99")}ms'
+                        )
+                    )
+                    saved_count += 1
+
             self.stdout.write(self.style.SUCCESS(
                 f'\n{"="*60}\n'
-                f'✅ 메트릭 수집 완료: {saved_count}개 모델\n'
+                f'✅ 메트릭 수집 완료: {saved_count}개 모델 ({len(targets)}개 조합)\n'
                 f'{"="*60}\n'
             ))
-            
-            # 로그 기록
-            logger.info(
-                f'Metrics collected: {saved_count} models, '
-                f'metric={metric_name}, time_range={time_range}'
-            )
-            
+
         except Exception as e:
             error_msg = f'메트릭 수집 실패: {str(e)}'
             self.stdout.write(self.style.ERROR(f'\n❌ {error_msg}\n'))
             logger.error(error_msg, exc_info=True)
             raise
+
+        finally:
+            # 짧게 끝나는 프로세스라 스크레이프 대신 textfile/Pushgateway로 내보냄
+            export_collector_metrics()
+            # 백그라운드에서 보내는 SLA 알림이 프로세스와 함께 사라지지 않도록 기다림
+            if sla is not None and not sla.flush():
+                self.stdout.write(self.style.WARNING('⚠️  전송하지 못한 SLA 알림이 남아 있습니다'))
@@ -0,0 +1,138 @@
+"""
+히스토리 보관 정책 적용 Management Command
+
+보관 기간이 지난 원본 히스토리를 롤업으로 남기고 지우고, 오래된 1시간 롤업과
+모델 삭제 기록, 수집 실행 기록을 정리한 뒤 DB 통계 갱신(ANALYZE)과
+필요 시 공간 회수(VACUUM)를 실행합니다 (api/compaction.py).
+하루 한 번 실행하면 DB 크기와 insert 지연이 시간이 지나도 일정하게 유지됩니다.
+
+사용법:
+    python3 manage.py compact_metrics
+    python3 manage.py compact_metrics --raw-retention 14d --hourly-retention 180d
+    python3 manage.py compact_metrics --dry-run
+    python3 manage.py compact_metrics --vacuum
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.changes import expire_tombstones, tombstone_retention
+from api.compaction import (
+    expire_hourly_rollups,
+    expire_raw_history,
+    hourly_rollup_retention,
+    optimize_database,
+    raw_retention,
+    table_row_counts,
+)
+from api.ledger import expire_runs
+from api.snapshots import bump_generation, generation_for
+from query_p95_metrics import parse_duration
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '보관 기간이 지난 메트릭 히스토리를 롤업으로 남기고 정리합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--raw-retention',
+            type=str,
+            default=None,
+            help='원본 히스토리 보관 기간 (예: 30d, 기본값: settings.METRICS_RAW_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--hourly-retention',
+            type=str,
+            default=None,
+            help='1시간 롤업 보관 기간 (예: 400d, 기본값: settings.METRICS_HOURLY_ROLLUP_RETENTION_DAYS)'
+        )
+        parser.add_argument(
+            '--batch',
+            type=str,
+            default='1h',
+            help='한 번의 DELETE로 지울 원본 구간 길이 (기본값: 1h)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.05,
+            help='DELETE 사이 대기 시간 (초, 기본값: 0.05)'
+        )
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='빈 공간 비율과 관계없이 VACUUM/OPTIMIZE 실행'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='지울 행 수만 출력하고 아무것도 바꾸지 않음'
+        )
+
+    def handle(self, *args, **options):
+        raw_keep = self._parse_retention(options['raw_retention']) or raw_retention()
+        hourly_keep = self._parse_retention(options['hourly_retention']) or hourly_rollup_retention()
+        batch = self._parse_retention(options['batch'])
+        dry_run = options['dry_run']
+        now = timezone.now()
+
+        if hourly_keep is not None and hourly_keep < raw_keep:
+            raise CommandError('1시간 롤업 보관 기간은 원본 보관 기간보다 짧을 수 없습니다')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{"="*60}\n'
+            f'🧹 히스토리 정리 시작{" (dry-run)" if dry_run else ""}: '
+            f'원본 {raw_keep.days}일, 1시간 롤업 {hourly_keep.days if hourly_keep else "무기한"}일 보관\n'
+            f'{"="*60}'
+        ))
+
+        def report_day(day, deleted):
+            if deleted:
+                self.stdout.write(f'🗑️  {timezone.localtime(day):%Y-%m-%d}: 원본 {deleted}개')
+
+        raw_deleted = expire_raw_history(
+            now, raw_keep, batch, pause=options['pause'], dry_run=dry_run, on_day=report_day
+        )
+        hourly_deleted = 0
+        if hourly_keep is not None:
+            hourly_deleted = expire_hourly_rollups(now, hourly_keep, pause=options['pause'], dry_run=dry_run)
+        # since= 변경분 조회가 더는 쓰지 않는 오래된 모델 삭제 기록
+        tombstones_deleted = expire_tombstones(generation_for(now - tombstone_retention()), dry_run=dry_run)
+        runs_deleted = expire_runs(now, dry_run=dry_run)
+
+        if not dry_run:
+            if raw_deleted or hourly_deleted:
+                # 원본으로 그리던 구간이 롤업으로 바뀌므로 히스토리 ETag를 무효화
+                bump_generation()
+            for statement in optimize_database(vacuum=options['vacuum']):
+                self.stdout.write(f'🔧 {statement}')
+
+        counts = ', '.join(f'{table} {count}개' for table, count in table_row_counts().items())
+        self.stdout.write(self.style.SUCCESS(
+            f'\n{"="*60}\n'
+            f'✅ 정리 완료: 원본 {raw_deleted}개, 1시간 롤업 {hourly_deleted}개, '
+            f'모델 삭제 기록 {tombstones_deleted}개, 수집 실행 기록 {runs_deleted}개 '
+            f'{"삭제 예정" if dry_run else "삭제"}\n'
+            f'   남은 행: {counts}\n'
+            f'{"="*60}\n'
+        ))
+        logger.info(
+            f'Compaction finished: raw_deleted={raw_deleted}, hourly_deleted={hourly_deleted}, '
+            f'tombstones_deleted={tombstones_deleted}, runs_deleted={runs_deleted}, '
+            f'dry_run={dry_run}'
+        )
+
+    def _parse_retention(self, value):
+        if not value:
+            return None
+        try:
+            seconds = parse_duration(value)
+        except (ValueError, IndexError):
+            raise CommandError(f'기간을 해석할 수 없습니다: {value}')
+        if seconds <= 0:
+            raise CommandError(f'기간은 0보다 커야 합니다: {value}')
+        return timedelta(seconds=seconds)
@@ -0,0 +1,65 @@
+"""
+히스토리 롤업 재생성 Management Command
+
+ModelMetricHistory에서 시간/일 단위 롤업(ModelMetricRollup)을 다시 만듭니다.
+수집기와 백필은 롤업을 증분 갱신하므로, 롤업 도입 이전의 히스토리를 채우거나
+수동으로 히스토리를 고친 뒤에만 실행하면 됩니다.
+
+사용법:
+    python3 manage.py rebuild_rollups
+    python3 manage.py rebuild_rollups --since 7d
+    python3 manage.py rebuild_rollups --since 30d --metric-name api_latency_seconds
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.rollups import rebuild_rollups
+from api.snapshots import bump_generation
+from query_p95_metrics import parse_duration
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '메트릭 히스토리에서 시간/일 단위 롤업을 다시 만듭니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=str,
+            default=None,
+            help='현재 기준으로 다시 만들 구간 (예: 7d, 24h, 기본값: 히스토리 전체)'
+        )
+        parser.add_argument(
+            '--metric-name',
+            type=str,
+            default=None,
+            help='다시 만들 메트릭 이름 (기본값: 전체)'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = timezone.now() - timedelta(seconds=parse_duration(options['since']))
+            except (ValueError, IndexError):
+                raise CommandError(f'구간을 해석할 수 없습니다: {options["since"]}')
+
+        self.stdout.write(self.style.SUCCESS('🔄 롤업 재생성 시작'))
+
+        start = time.monotonic()
+        saved = rebuild_rollups(since=since, metric_name=options['metric_name'])
+        elapsed = time.monotonic() - start
+
+        if saved:
+            # 다운샘플링된 히스토리 응답이 바뀔 수 있으므로 ETag/스냅샷을 무효화
+            bump_generation()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ 롤업 재생성 완료: {saved}개 저장 ({elapsed:.1f}초)'
+        ))
+        logger.info(f'Rebuilt {saved} rollup rows in {elapsed:.2f}s')
@@ -0,0 +1,60 @@
+"""
+SLO 소진율 창 재생성 Management Command
+
+가장 긴 창(3d) 동안의 히스토리로 SloState를 다시 만듭니다.
+수집기는 창을 증분 갱신하므로, SLO를 처음 켰을 때 창을 바로 채우거나
+config.yaml의 slo 목표를 바꾼 뒤 지난 포인트도 새 목표로 다시 세고 싶을 때만 실행하면 됩니다.
+
+사용법:
+    python3 manage.py rebuild_slo
+    python3 manage.py rebuild_slo --config /etc/springboard/config.yaml --metric-name api_latency_seconds
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.config import load_config
+from api.slo import SloTracker
+from api.snapshots import bump_generation
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '메트릭 히스토리에서 SLO 소진율 창을 다시 만듭니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--config',
+            type=str,
+            default=None,
+            help='수집 설정 파일 경로 (기본값: settings.METRICS_CONFIG_PATH)'
+        )
+        parser.add_argument(
+            '--metric-name',
+            type=str,
+            default=None,
+            help='다시 만들 메트릭 이름 (기본값: 전체)'
+        )
+
+    def handle(self, *args, **options):
+        tracker = SloTracker.from_config(load_config(options['config']))
+        if tracker is None:
+            raise CommandError('설정 파일에 slo 섹션이 없습니다')
+
+        self.stdout.write(self.style.SUCCESS('🔄 SLO 창 재생성 시작'))
+
+        start = time.monotonic()
+        rebuilt = tracker.rebuild(timezone.now(), metric_name=options['metric_name'])
+        elapsed = time.monotonic() - start
+
+        if rebuilt:
+            # /api/slo/ 응답이 바뀌므로 ETag를 무효화
+            bump_generation()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ SLO 창 재생성 완료: {rebuilt}개 시리즈 ({elapsed:.1f}초)'
+        ))
+        logger.info(f'Rebuilt {rebuilt} SLO states in {elapsed:.2f}s')
@@ -0,0 +1,150 @@
+"""
+상주형 메트릭 수집기 Management Command
+
+프로세스를 계속 띄워 둔 채로 정해진 주기마다 메트릭을 수집합니다.
+Celery beat가 매번 call_command('collect_metrics')를 실행하는 방식과 달리
+HTTP 커넥션 풀과 DB 커넥션을 재사용하므로 1분 미만의 짧은 주기에도 부담이 적습니다.
+
+- 수집은 벽시계 기준으로 정렬된 경계(예: 5분 주기면 :00, :05, ...)에 지터를 더해 실행됩니다.
+- 이전 수집이 다음 경계를 넘기면 겹쳐서 실행하지 않고 해당 틱을 건너뜁니다.
+- SIGTERM/SIGINT를 받으면 진행 중인 수집을 마친 뒤 종료합니다.
+
+사용법:
+    python3 manage.py run_collector
+    python3 manage.py run_collector --interval 30 --jitter 2
+    python3 manage.py run_collector --config /etc/springboard/config.yaml
+"""
+
+import random
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from api.collector import MetricsCollector, build_prometheus_client
+from api.config import get_prometheus_url, load_config, resolve_targets
+from api.instrumentation import export_collector_metrics
+from api.sla import SlaEngine
+from api.slo import SloTracker
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = '정해진 주기마다 메트릭을 수집하는 상주형 수집기를 실행합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'COLLECTOR_INTERVAL', 300),
+            help='수집 주기 (초, 기본값: settings.COLLECTOR_INTERVAL)'
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=getattr(settings, 'COLLECTOR_JITTER', 5),
+            help='정렬된 경계에 더할 최대 지터 (초, 기본값: settings.COLLECTOR_JITTER)'
+        )
+        parser.add_argument(
+            '--prometheus-url',
+            type=str,
+            default=None,
+            help='Prometheus 서버 URL (기본값: config.yaml 또는 settings.PROMETHEUS_URL)'
+        )
+        parser.add_argument(
+            '--config',
+            type=str,
+            default=None,
+            help='수집 설정 파일 경로 (기본값: settings.METRICS_CONFIG_PATH)'
+        )
+        parser.add_argument(
+            '--server-quantiles',
+            action='store_true',
+            help='백분위수마다 histogram_quantile 쿼리를 보냄 (기본: 버킷 rate 1회 조회 후 로컬 계산)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        jitter = min(options['jitter'], interval / 2)
+
+        config = load_config(options['config'])
+        targets = resolve_targets(config)
+        prometheus_url = get_prometheus_url(config, options['prometheus_url'])
+        sla = SlaEngine.from_config(config)
+        slo = SloTracker.from_config(config, dispatcher=sla.dispatcher if sla else None, interval=interval)
+
+        self._stop = threading.Event()
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 수집기 시작: {len(targets)}개 조합, 주기 {interval:g}초, 지터 최대 {jitter:g}초'
+        ))
+        self.stdout.write(f'Prometheus URL: {prometheus_url}')
+
+        # 커넥션 풀을 가진 클라이언트는 프로세스 수명 동안 재사용
+        with build_prometheus_client(prometheus_url, config) as prom_query:
+            collector = MetricsCollector(
+                prom_query, local_quantiles=not options['server_quantiles'], sla=sla, slo=slo
+            )
+
+            while not self._stop.is_set():
+                tick = self._next_boundary(time.time(), interval)
+                delay = tick - time.time() + random.uniform(0, jitter)
+                if self._stop.wait(max(delay, 0)):
+                    break
+
+                self._run_once(collector, targets)
+
+                # 수집이 다음 경계를 넘겼다면 그 사이의 틱은 건너뜀 (겹쳐 실행하지 않음)
+                skipped = int((time.time() - tick) // interval)
+                if skipped:
+                    logger.warning(f'Collection overran {skipped} tick(s), skipping them')
+                    self.stdout.write(self.style.WARNING(
+                        f'⚠️  수집이 주기를 넘겨 {skipped}개 틱을 건너뜁니다'
+                    ))
+
+        if sla is not None:
+            sla.flush()
+        connection.close()
+        self.stdout.write(self.style.SUCCESS('👋 수집기 종료'))
+
+    def _run_once(self, collector, targets):
+        """수집을 한 번 실행합니다. 실패해도 데몬은 계속 동작합니다."""
+        self._ensure_db_connection()
+        started = time.monotonic()
+
+        try:
+            collections = collector.collect(targets)
+        except Exception as e:
+            logger.error(f'메트릭 수집 실패: {str(e)}', exc_info=True)
+            self.stdout.write(self.style.ERROR(f'❌ 메트릭 수집 실패: {e}'))
+            # 끊어진 DB 커넥션은 다음 틱에서 다시 연결
+            connection.close_if_unusable_or_obsolete()
+            return
+        finally:
+            export_collector_metrics()
+
+        elapsed = time.monotonic() - started
+        saved_count = sum(len(c['model_stats']) for c in collections)
+        failed = sum(1 for c in collections if not c['succeeded'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {saved_count}개 모델 수집 ({len(collections)}개 조합, 실패 {failed}개, {elapsed:.2f}초)'
+        ))
+
+    def _ensure_db_connection(self):
+        """재사용 중인 DB 커넥션이 끊어졌으면 닫아서 다음 쿼리에서 다시 연결되게 합니다."""
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+
+    def _next_boundary(self, now, interval):
+        """now 이후의 다음 정렬된 경계 시각(에포크 초)을 반환합니다."""
+        return (now // interval + 1) * interval
+
+    def _request_stop(self, signum, frame):
+        logger.info(f'Received signal {signum}, stopping collector')
+        self._stop.set()
@@ -0,0 +1,111 @@
+"""
+SLA/SLO 알림 웹훅 수신기 Management Command (로컬 테스트용)
+
+config.yaml의 sla.alerts.webhook_url 대신 띄워 두고 수집기가 보내는 알림을 확인합니다.
+--fail-first로 처음 몇 요청에 503을 돌려줘 재시도 동작도 확인할 수 있습니다.
+
+사용법:
+    python3 manage.py sla_webhook_receiver
+    python3 manage.py sla_webhook_receiver --port 9099 --fail-first 2
+
+    # config.yaml
+    sla:
+      alerts:
+        enabled: true
+        webhook_url: "http://127.0.0.1:9099/"
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'SLA/SLO 알림 웹훅을 받아 출력하는 로컬 HTTP 서버를 실행합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            type=str,
+            default='127.0.0.1',
+            help='바인드 주소 (기본값: 127.0.0.1)'
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=9099,
+            help='포트 (기본값: 9099)'
+        )
+        parser.add_argument(
+            '--fail-first',
+            type=int,
+            default=0,
+            help='처음 N개 요청에 503을 응답 (재시도 확인용)'
+        )
+
+    def handle(self, *args, **options):
+        command = self
+        lock = threading.Lock()
+        state = {'requests': 0}
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                with lock:
+                    state['requests'] += 1
+                    request_number = state['requests']
+
+                if request_number <= options['fail_first']:
+                    command.stdout.write(command.style.WARNING(f'⚠️  요청 #{request_number}: 503 응답 (--fail-first)'))
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+
+                alerts = payload.get('alerts') or []
+                command.stdout.write(f'\n📨 요청 #{request_number}: 알림 {len(alerts)}개 (sent_at: {payload.get("sent_at")})')
+                for alert in alerts:
+                    if alert.get('state', '').startswith('slo_'):
+                        icon = '🔥' if alert['state'] == 'slo_burn' else '✅'
+                        command.stdout.write(
+                            f'{icon} {alert.get("state")} ({alert.get("severity")}): {alert.get("model")} '
+                            f'[{alert.get("metric_name")}, {alert.get("time_range")}, job={alert.get("job")}] '
+                            f'소진율 {alert.get("burn_rates")} / 기준 {alert.get("burn_rate_threshold")}'
+                        )
+                        continue
+                    icon = '🚨' if alert.get('state') == 'breached' else '✅'
+                    command.stdout.write(
+                        f'{icon} {alert.get("state")}: {alert.get("model")} '
+                        f'[{alert.get("metric_name")}, {alert.get("time_range")}, job={alert.get("job")}] '
+                        f'P95={alert.get("p95_latency_ms")}ms / 임계값 {alert.get("threshold_ms")}ms '
+                        f'({alert.get("excess_pct"):+}%)'
+                    )
+
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 SLA 웹훅 수신기 시작: http://{options["host"]}:{options["port"]}/'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(self.style.SUCCESS('👋 수신기 종료'))
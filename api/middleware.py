@@ -0,0 +1,94 @@
+"""
+API 요청 계측 미들웨어
+"""
+
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connection
+from api.instrumentation import HTTP_DB_QUERIES, HTTP_REQUEST_DURATION
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryCounter:
+    """connection.execute_wrapper로 등록해서 실행된 SQL 쿼리 수를 세는 래퍼"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _add_wrapper(wrapper) -> None:
+    """현재 스레드의 DB 연결에 래퍼를 겁니다 (connection.execute_wrapper()의 진입 부분)."""
+    connection.execute_wrappers.append(wrapper)
+
+
+def _remove_wrapper(wrapper) -> None:
+    connection.execute_wrappers.remove(wrapper)
+
+
+class RequestMetricsMiddleware:
+    """
+    뷰별 요청 처리 시간과 SQL 쿼리 수를 Prometheus 히스토그램에 기록합니다.
+
+    레이블은 URL 경로가 아닌 뷰 이름(예: api:model_p95_only)을 사용해서
+    쿼리 문자열이나 잘못된 경로로 시계열이 늘어나지 않게 합니다.
+
+    ASGI에서는 비동기로 동작해서 비동기 뷰(/api/metrics/stream/)가 동기 어댑터를 거치지 않게 합니다.
+    DB 연결은 스레드별이고 동기 뷰는 요청마다 정해진 스레드(sync_to_async(thread_sensitive=True))에서
+    실행되므로, 비동기 경로에서는 같은 스레드에서 그 연결에 래퍼를 걸고 떼어 SQL 쿼리 수를 셉니다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        counter = _QueryCounter()
+        started = time.perf_counter()
+
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        view = self._observe(request, response, time.perf_counter() - started)
+        HTTP_DB_QUERIES.labels(view=view).observe(counter.count)
+
+        return response
+
+    async def __acall__(self, request):
+        counter = _QueryCounter()
+        started = time.perf_counter()
+
+        await sync_to_async(_add_wrapper, thread_sensitive=True)(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_wrapper, thread_sensitive=True)(counter)
+
+        view = self._observe(request, response, time.perf_counter() - started)
+        HTTP_DB_QUERIES.labels(view=view).observe(counter.count)
+
+        return response
+
+    def _observe(self, request, response, elapsed):
+        """처리 시간을 기록하고 뷰 이름 레이블을 반환합니다."""
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+
+        HTTP_REQUEST_DURATION.labels(
+            view=view, method=request.method, status=str(response.status_code)
+        ).observe(elapsed)
+        return view
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def remove_duplicate_metrics(apps, schema_editor):
+    """(model_name, metric_name, time_range)별로 가장 최근 행만 남깁니다."""
+    ModelMetric = apps.get_model('api', 'ModelMetric')
+    seen = set()
+    duplicate_ids = []
+    rows = ModelMetric.objects.order_by('-collected_at', '-id').values_list(
+        'id', 'model_name', 'metric_name', 'time_range'
+    )
+    for pk, model_name, metric_name, time_range in rows.iterator():
+        key = (model_name, metric_name, time_range)
+        if key in seen:
+            duplicate_ids.append(pk)
+        else:
+            seen.add(key)
+    for start in range(0, len(duplicate_ids), 500):
+        ModelMetric.objects.filter(id__in=duplicate_ids[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_metrics, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='modelmetric',
+            constraint=models.UniqueConstraint(fields=('model_name', 'metric_name', 'time_range'), name='unique_model_metric_time_range'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_modelmetric_unique_model_metric_time_range'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='modelmetric',
+            name='unique_model_metric_time_range',
+        ),
+        migrations.AddField(
+            model_name='modelmetric',
+            name='job',
+            field=models.CharField(default='api', max_length=100, verbose_name='Prometheus job'),
+        ),
+        migrations.AddField(
+            model_name='modelmetrichistory',
+            name='job',
+            field=models.CharField(default='api', max_length=100, verbose_name='Prometheus job'),
+        ),
+        migrations.AddConstraint(
+            model_name='modelmetric',
+            constraint=models.UniqueConstraint(fields=('model_name', 'metric_name', 'time_range', 'job'), name='unique_model_metric_time_range_job'),
+        ),
+    ]
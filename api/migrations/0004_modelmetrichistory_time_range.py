@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_modelmetric_job_modelmetrichistory_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modelmetrichistory',
+            name='time_range',
+            field=models.CharField(default='5m', max_length=20, verbose_name='시간 범위'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_modelmetrichistory_time_range'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='modelmetrichistory',
+            options={'verbose_name': '모델 메트릭 히스토리', 'verbose_name_plural': '모델 메트릭 히스토리'},
+        ),
+        migrations.AddIndex(
+            model_name='modelmetrichistory',
+            index=models.Index(fields=['metric_name', 'model_name', 'timestamp'], name='history_metric_model_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_modelmetrichistory_export_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelMetricRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1h', '1시간'), ('1d', '1일')], max_length=4, verbose_name='집계 단위')),
+                ('bucket_start', models.DateTimeField(verbose_name='구간 시작 (UTC 정렬)')),
+                ('model_name', models.CharField(max_length=100, verbose_name='모델 이름')),
+                ('metric_name', models.CharField(default='request_duration_seconds', max_length=100, verbose_name='메트릭 이름')),
+                ('job', models.CharField(default='api', max_length=100, verbose_name='Prometheus job')),
+                ('time_range', models.CharField(default='5m', max_length=20, verbose_name='시간 범위')),
+                ('sample_count', models.IntegerField(default=0, verbose_name='포인트 수')),
+                ('p95_sum', models.FloatField(default=0, verbose_name='P95 합계 (ms)')),
+                ('p95_min', models.FloatField(verbose_name='P95 최솟값 (ms)')),
+                ('p95_min_at', models.DateTimeField(verbose_name='최솟값 시각')),
+                ('p95_max', models.FloatField(verbose_name='P95 최댓값 (ms)')),
+                ('p95_max_at', models.DateTimeField(verbose_name='최댓값 시각')),
+                ('p95_last', models.FloatField(verbose_name='마지막 P95 (ms)')),
+                ('p95_last_at', models.DateTimeField(verbose_name='마지막 시각')),
+            ],
+            options={
+                'verbose_name': '모델 메트릭 롤업',
+                'verbose_name_plural': '모델 메트릭 롤업',
+                'indexes': [models.Index(fields=['resolution', 'metric_name', 'model_name', 'bucket_start'], name='rollup_metric_model_ts_idx')],
+                'constraints': [models.UniqueConstraint(fields=('resolution', 'metric_name', 'time_range', 'job', 'model_name', 'bucket_start'), name='unique_rollup_bucket')],
+            },
+        ),
+    ]
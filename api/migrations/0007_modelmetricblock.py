@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_modelmetricrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelMetricBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100, verbose_name='모델 이름')),
+                ('metric_name', models.CharField(default='request_duration_seconds', max_length=100, verbose_name='메트릭 이름')),
+                ('job', models.CharField(default='api', max_length=100, verbose_name='Prometheus job')),
+                ('time_range', models.CharField(default='5m', max_length=20, verbose_name='시간 범위')),
+                ('day_start', models.DateTimeField(verbose_name='날짜 (UTC 0시)')),
+                ('point_count', models.IntegerField(verbose_name='포인트 수')),
+                ('data', models.BinaryField(verbose_name='압축된 타임스탬프/값')),
+            ],
+            options={
+                'verbose_name': '모델 메트릭 블록',
+                'verbose_name_plural': '모델 메트릭 블록',
+                'indexes': [models.Index(fields=['metric_name', 'model_name', 'day_start'], name='block_metric_model_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('metric_name', 'time_range', 'job', 'model_name', 'day_start'), name='unique_block_day')],
+            },
+        ),
+    ]
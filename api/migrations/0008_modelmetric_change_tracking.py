@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:37
+
+import math
+
+from django.db import migrations, models
+
+
+def initialize_change_tracking(apps, schema_editor):
+    """기존 행은 마지막 수집 세대에 바뀐 것으로 표시합니다 (since=0이면 모두 반환)."""
+    ModelMetric = apps.get_model('api', 'ModelMetric')
+    rows = []
+    for metric in ModelMetric.objects.only('id', 'collected_at', 'p95_latency_ms').iterator():
+        metric.changed_generation = math.ceil(metric.collected_at.timestamp() * 1000)
+        metric.changed_p95_latency_ms = metric.p95_latency_ms
+        rows.append(metric)
+    ModelMetric.objects.bulk_update(rows, ['changed_generation', 'changed_p95_latency_ms'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_modelmetricblock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelMetricTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100, verbose_name='모델 이름')),
+                ('metric_name', models.CharField(default='request_duration_seconds', max_length=100, verbose_name='메트릭 이름')),
+                ('job', models.CharField(default='api', max_length=100, verbose_name='Prometheus job')),
+                ('time_range', models.CharField(default='5m', max_length=20, verbose_name='시간 범위')),
+                ('removed_generation', models.BigIntegerField(verbose_name='삭제 세대')),
+            ],
+            options={
+                'verbose_name': '모델 메트릭 삭제 기록',
+                'verbose_name_plural': '모델 메트릭 삭제 기록',
+            },
+        ),
+        migrations.AddField(
+            model_name='modelmetric',
+            name='changed_generation',
+            field=models.BigIntegerField(default=0, verbose_name='변경 세대'),
+        ),
+        migrations.AddField(
+            model_name='modelmetric',
+            name='changed_p95_latency_ms',
+            field=models.FloatField(blank=True, null=True, verbose_name='변경 시점 P95 (ms)'),
+        ),
+        migrations.RunPython(initialize_change_tracking, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='modelmetric',
+            index=models.Index(fields=['metric_name', 'time_range', 'changed_generation'], name='metric_changed_gen_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='modelmetrictombstone',
+            index=models.Index(fields=['metric_name', 'time_range', 'removed_generation'], name='tombstone_removed_gen_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='modelmetrictombstone',
+            constraint=models.UniqueConstraint(fields=('model_name', 'metric_name', 'time_range', 'job'), name='unique_tombstone_model'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_modelmetric_change_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectorRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='시작 시간')),
+                ('finished_at', models.DateTimeField(verbose_name='종료 시간')),
+                ('duration_seconds', models.FloatField(verbose_name='소요 시간 (초)')),
+                ('status', models.CharField(choices=[('success', '성공'), ('partial', '일부 실패'), ('failed', '실패')], max_length=10, verbose_name='결과')),
+                ('targets', models.IntegerField(default=0, verbose_name='수집 조합 수')),
+                ('targets_failed', models.IntegerField(default=0, verbose_name='실패한 조합 수')),
+                ('models_written', models.IntegerField(default=0, verbose_name='저장한 모델 메트릭 수')),
+                ('queries_issued', models.IntegerField(default=0, verbose_name='Prometheus 쿼리 수')),
+                ('queries_failed', models.IntegerField(default=0, verbose_name='실패한 Prometheus 쿼리 수')),
+                ('generation', models.BigIntegerField(blank=True, null=True, verbose_name='게시한 세대')),
+                ('error', models.TextField(blank=True, default='', verbose_name='오류 메시지')),
+            ],
+            options={
+                'verbose_name': '수집 실행 기록',
+                'verbose_name_plural': '수집 실행 기록',
+                'indexes': [models.Index(fields=['-started_at'], name='collector_run_started_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_collectorrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlaState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100, verbose_name='모델 이름')),
+                ('metric_name', models.CharField(default='request_duration_seconds', max_length=100, verbose_name='메트릭 이름')),
+                ('job', models.CharField(default='api', max_length=100, verbose_name='Prometheus job')),
+                ('time_range', models.CharField(default='5m', max_length=20, verbose_name='시간 범위')),
+                ('breached', models.BooleanField(default=False, verbose_name='SLA 위반 중')),
+                ('threshold_ms', models.FloatField(verbose_name='임계값 (ms)')),
+                ('p95_latency_ms', models.FloatField(blank=True, null=True, verbose_name='상태가 바뀐 시점 P95 (ms)')),
+                ('changed_at', models.DateTimeField(verbose_name='상태 변경 시간')),
+            ],
+            options={
+                'verbose_name': 'SLA 상태',
+                'verbose_name_plural': 'SLA 상태',
+                'indexes': [models.Index(fields=['breached', 'metric_name'], name='sla_state_breached_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model_name', 'metric_name', 'time_range', 'job'), name='unique_sla_state_model')],
+            },
+        ),
+    ]
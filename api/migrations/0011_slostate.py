@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_slastate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SloState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=100, verbose_name='모델 이름')),
+                ('metric_name', models.CharField(default='request_duration_seconds', max_length=100, verbose_name='메트릭 이름')),
+                ('job', models.CharField(default='api', max_length=100, verbose_name='Prometheus job')),
+                ('time_range', models.CharField(default='5m', max_length=20, verbose_name='시간 범위')),
+                ('objective', models.FloatField(verbose_name='목표 (좋은 이벤트 비율)')),
+                ('latency_ms', models.FloatField(verbose_name='목표 레이턴시 (ms)')),
+                ('buckets', models.BinaryField(verbose_name='링 버퍼')),
+                ('heads', models.JSONField(default=list, verbose_name='창별 마지막 칸')),
+                ('totals', models.JSONField(default=list, verbose_name='창별 [이벤트 수, 나쁜 이벤트 수]')),
+                ('burn_rates', models.JSONField(default=dict, verbose_name='창별 소진율')),
+                ('firing', models.JSONField(default=list, verbose_name='발생 중인 알림 조건')),
+                ('last_point_at', models.DateTimeField(verbose_name='마지막 포인트 시간')),
+            ],
+            options={
+                'verbose_name': 'SLO 상태',
+                'verbose_name_plural': 'SLO 상태',
+                'indexes': [models.Index(fields=['metric_name', 'time_range', 'model_name'], name='slo_state_series_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model_name', 'metric_name', 'time_range', 'job'), name='unique_slo_state_model')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_slostate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collectorrun',
+            name='model_count',
+            field=models.IntegerField(default=0, verbose_name='저장 후 전체 모델 수'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_collectorrun_model_count'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='modelmetrichistory',
+            name='history_metric_model_ts_idx',
+        ),
+        migrations.AddIndex(
+            model_name='modelmetrichistory',
+            index=models.Index(fields=['metric_name', 'time_range', 'job', 'model_name', 'timestamp'], name='history_target_model_ts_idx'),
+        ),
+    ]
@@ -13,6 +13,7 @@ class ModelMetric(models.Model):
     
     # 메트릭 정보
     metric_name = models.CharField(max_length=100, default="request_duration_seconds", verbose_name="메트릭 이름")
+    job = models.CharField(max_length=100, default="api", verbose_name="Prometheus job")
     
     # 백분위수 데이터 (밀리초 단위)
     p50_latency_ms = models.FloatField(null=True, blank=True, verbose_name="P50 레이턴시 (ms)")
@@ -24,6 +25,10 @@ class ModelMetric(models.Model):
     collected_at = models.DateTimeField(default=timezone.now, verbose_name="수집 시간")
     prometheus_timestamp = models.FloatField(null=True, blank=True, verbose_name="Prometheus 타임스탬프")
     
+    # 변경 추적 (since= 변경분 조회용) - P95가 의미 있게 바뀐 세대와 그때의 P95
+    changed_generation = models.BigIntegerField(default=0, verbose_name="변경 세대")
+    changed_p95_latency_ms = models.FloatField(null=True, blank=True, verbose_name="변경 시점 P95 (ms)")
+    
     # 메타 정보
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="생성 시간")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="수정 시간")
@@ -35,6 +40,15 @@ class ModelMetric(models.Model):
         indexes = [
             models.Index(fields=['model_name', '-collected_at']),
             models.Index(fields=['-collected_at']),
+            # 변경분 조회: 메트릭으로 좁힌 뒤 변경 세대로 범위 검색
+            models.Index(fields=['metric_name', 'time_range', 'changed_generation'], name='metric_changed_gen_idx'),
+        ]
+        constraints = [
+            # 수집기의 bulk upsert(ON CONFLICT) 기준 키
+            models.UniqueConstraint(
+                fields=['model_name', 'metric_name', 'time_range', 'job'],
+                name='unique_model_metric_time_range_job',
+            ),
         ]
     
     def __str__(self):
@@ -52,11 +66,13 @@ class ModelMetricHistory(models.Model):
     
     # 메트릭 정보
     metric_name = models.CharField(max_length=100, default="request_duration_seconds", verbose_name="메트릭 이름")
+    job = models.CharField(max_length=100, default="api", verbose_name="Prometheus job")
     
     # P95 데이터 (밀리초 단위)
     p95_latency_ms = models.FloatField(verbose_name="P95 레이턴시 (ms)")
     
     # 시간 정보
+    time_range = models.CharField(max_length=20, default="5m", verbose_name="시간 범위")
     timestamp = models.DateTimeField(db_index=True, verbose_name="타임스탬프")
     prometheus_timestamp = models.FloatField(null=True, blank=True, verbose_name="Prometheus 타임스탬프")
     
@@ -66,11 +82,253 @@ class ModelMetricHistory(models.Model):
     class Meta:
         verbose_name = "모델 메트릭 히스토리"
         verbose_name_plural = "모델 메트릭 히스토리"
-        ordering = ['-timestamp', 'model_name']
+        # 기본 정렬 없음 - 조회하는 쪽에서 인덱스에 맞는 order_by를 지정
         indexes = [
             models.Index(fields=['model_name', '-timestamp']),
             models.Index(fields=['-timestamp']),
+            # 히스토리 조회·내보내기: (메트릭, 시간 범위, job)으로 좁힌 뒤 (모델, 시간) 순서로 바로 읽음
+            models.Index(
+                fields=['metric_name', 'time_range', 'job', 'model_name', 'timestamp'],
+                name='history_target_model_ts_idx',
+            ),
         ]
     
     def __str__(self):
         return f"{self.model_name} - P95: {self.p95_latency_ms}ms ({self.timestamp})"
+
+
+class ModelMetricRollup(models.Model):
+    """
+    ModelMetricHistory를 시간/일 단위로 미리 집계한 모델
+    긴 구간 히스토리 조회용 (api/rollups.py)
+    """
+    
+    RESOLUTION_CHOICES = [
+        ('1h', '1시간'),
+        ('1d', '1일'),
+    ]
+    
+    # 집계 단위
+    resolution = models.CharField(max_length=4, choices=RESOLUTION_CHOICES, verbose_name="집계 단위")
+    bucket_start = models.DateTimeField(verbose_name="구간 시작 (UTC 정렬)")
+    
+    # 모델 / 메트릭 정보 (ModelMetricHistory와 동일)
+    model_name = models.CharField(max_length=100, verbose_name="모델 이름")
+    metric_name = models.CharField(max_length=100, default="request_duration_seconds", verbose_name="메트릭 이름")
+    job = models.CharField(max_length=100, default="api", verbose_name="Prometheus job")
+    time_range = models.CharField(max_length=20, default="5m", verbose_name="시간 범위")
+    
+    # P95 집계 (밀리초 단위) - 평균은 p95_sum / sample_count
+    sample_count = models.IntegerField(default=0, verbose_name="포인트 수")
+    p95_sum = models.FloatField(default=0, verbose_name="P95 합계 (ms)")
+    p95_min = models.FloatField(verbose_name="P95 최솟값 (ms)")
+    p95_min_at = models.DateTimeField(verbose_name="최솟값 시각")
+    p95_max = models.FloatField(verbose_name="P95 최댓값 (ms)")
+    p95_max_at = models.DateTimeField(verbose_name="최댓값 시각")
+    p95_last = models.FloatField(verbose_name="마지막 P95 (ms)")
+    p95_last_at = models.DateTimeField(verbose_name="마지막 시각")
+    
+    class Meta:
+        verbose_name = "모델 메트릭 롤업"
+        verbose_name_plural = "모델 메트릭 롤업"
+        indexes = [
+            # 히스토리 조회: 집계 단위·메트릭으로 좁힌 뒤 (모델, 시간) 순서로 읽음
+            models.Index(fields=['resolution', 'metric_name', 'model_name', 'bucket_start'], name='rollup_metric_model_ts_idx'),
+        ]
+        constraints = [
+            # 증분 갱신(ON CONFLICT) 기준 키
+            models.UniqueConstraint(
+                fields=['resolution', 'metric_name', 'time_range', 'job', 'model_name', 'bucket_start'],
+                name='unique_rollup_bucket',
+            ),
+        ]
+    
+    @property
+    def p95_avg(self):
+        return self.p95_sum / self.sample_count if self.sample_count else None
+    
+    def __str__(self):
+        return f"{self.model_name} [{self.resolution} {self.bucket_start}] - max P95: {self.p95_max}ms"
+
+
+class ModelMetricBlock(models.Model):
+    """
+    모델 하나의 하루치 P95 히스토리를 압축해 저장하는 모델
+    보관 기간이 지난 ModelMetricHistory를 장기 보관용으로 묶어 둠 (api/blockstore.py)
+    """
+    
+    # 모델 / 메트릭 정보 (ModelMetricHistory와 동일)
+    model_name = models.CharField(max_length=100, verbose_name="모델 이름")
+    metric_name = models.CharField(max_length=100, default="request_duration_seconds", verbose_name="메트릭 이름")
+    job = models.CharField(max_length=100, default="api", verbose_name="Prometheus job")
+    time_range = models.CharField(max_length=20, default="5m", verbose_name="시간 범위")
+    
+    # 블록 정보
+    day_start = models.DateTimeField(verbose_name="날짜 (UTC 0시)")
+    point_count = models.IntegerField(verbose_name="포인트 수")
+    data = models.BinaryField(verbose_name="압축된 타임스탬프/값")
+    
+    class Meta:
+        verbose_name = "모델 메트릭 블록"
+        verbose_name_plural = "모델 메트릭 블록"
+        indexes = [
+            # 히스토리 조회: 메트릭으로 좁힌 뒤 (모델, 날짜) 순서로 읽음
+            models.Index(fields=['metric_name', 'model_name', 'day_start'], name='block_metric_model_day_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metric_name', 'time_range', 'job', 'model_name', 'day_start'],
+                name='unique_block_day',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_name} [{self.day_start:%Y-%m-%d}] - {self.point_count} points"
+
+
+class ModelMetricTombstone(models.Model):
+    """
+    수집 결과에서 사라져 ModelMetric에서 지운 모델 기록
+    since= 변경분 조회가 `removed`로 알려주기 위해 보관 (api/snapshots.py)
+    """
+    
+    # 모델 / 메트릭 정보 (ModelMetric과 동일)
+    model_name = models.CharField(max_length=100, verbose_name="모델 이름")
+    metric_name = models.CharField(max_length=100, default="request_duration_seconds", verbose_name="메트릭 이름")
+    job = models.CharField(max_length=100, default="api", verbose_name="Prometheus job")
+    time_range = models.CharField(max_length=20, default="5m", verbose_name="시간 범위")
+    
+    removed_generation = models.BigIntegerField(verbose_name="삭제 세대")
+    
+    class Meta:
+        verbose_name = "모델 메트릭 삭제 기록"
+        verbose_name_plural = "모델 메트릭 삭제 기록"
+        indexes = [
+            models.Index(fields=['metric_name', 'time_range', 'removed_generation'], name='tombstone_removed_gen_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model_name', 'metric_name', 'time_range', 'job'],
+                name='unique_tombstone_model',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_name} - removed at generation {self.removed_generation}"
+
+
+class CollectorRun(models.Model):
+    """
+    수집 1회의 실행 기록 (api/ledger.py)
+    헬스 체크는 메트릭 테이블 대신 마지막 실행 기록을 읽음
+    """
+    
+    STATUS_CHOICES = [
+        ('success', '성공'),
+        ('partial', '일부 실패'),
+        ('failed', '실패'),
+    ]
+    
+    started_at = models.DateTimeField(verbose_name="시작 시간")
+    finished_at = models.DateTimeField(verbose_name="종료 시간")
+    duration_seconds = models.FloatField(verbose_name="소요 시간 (초)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, verbose_name="결과")
+    
+    # 수집 규모
+    targets = models.IntegerField(default=0, verbose_name="수집 조합 수")
+    targets_failed = models.IntegerField(default=0, verbose_name="실패한 조합 수")
+    models_written = models.IntegerField(default=0, verbose_name="저장한 모델 메트릭 수")
+    model_count = models.IntegerField(default=0, verbose_name="저장 후 전체 모델 수")
+    queries_issued = models.IntegerField(default=0, verbose_name="Prometheus 쿼리 수")
+    queries_failed = models.IntegerField(default=0, verbose_name="실패한 Prometheus 쿼리 수")
+    
+    generation = models.BigIntegerField(null=True, blank=True, verbose_name="게시한 세대")
+    error = models.TextField(blank=True, default='', verbose_name="오류 메시지")
+    
+    class Meta:
+        verbose_name = "수집 실행 기록"
+        verbose_name_plural = "수집 실행 기록"
+        indexes = [
+            models.Index(fields=['-started_at'], name='collector_run_started_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.started_at} - {self.status} ({self.duration_seconds:.2f}s, {self.models_written} models)"
+
+
+class SlaState(models.Model):
+    """
+    모델별 P95 SLA 위반 상태 (api/sla.py)
+    수집기는 상태가 바뀐 경우(위반 시작/해소)에만 행을 갱신하고 알림을 보냄
+    """
+    
+    # 모델 / 메트릭 정보 (ModelMetric과 동일)
+    model_name = models.CharField(max_length=100, verbose_name="모델 이름")
+    metric_name = models.CharField(max_length=100, default="request_duration_seconds", verbose_name="메트릭 이름")
+    job = models.CharField(max_length=100, default="api", verbose_name="Prometheus job")
+    time_range = models.CharField(max_length=20, default="5m", verbose_name="시간 범위")
+    
+    breached = models.BooleanField(default=False, verbose_name="SLA 위반 중")
+    threshold_ms = models.FloatField(verbose_name="임계값 (ms)")
+    p95_latency_ms = models.FloatField(null=True, blank=True, verbose_name="상태가 바뀐 시점 P95 (ms)")
+    changed_at = models.DateTimeField(verbose_name="상태 변경 시간")
+    
+    class Meta:
+        verbose_name = "SLA 상태"
+        verbose_name_plural = "SLA 상태"
+        indexes = [
+            models.Index(fields=['breached', 'metric_name'], name='sla_state_breached_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model_name', 'metric_name', 'time_range', 'job'],
+                name='unique_sla_state_model',
+            ),
+        ]
+    
+    def __str__(self):
+        state = 'breached' if self.breached else 'ok'
+        return f"{self.model_name} - {state} since {self.changed_at} ({self.p95_latency_ms}ms / {self.threshold_ms}ms)"
+
+
+class SloState(models.Model):
+    """
+    모델별 SLO 소진율 계산 상태 (api/slo.py)
+    창(5m/1h/6h/3d)마다 링 버퍼와 합계를 두고 수집할 때마다 증분 갱신
+    """
+    
+    # 모델 / 메트릭 정보 (ModelMetric과 동일)
+    model_name = models.CharField(max_length=100, verbose_name="모델 이름")
+    metric_name = models.CharField(max_length=100, default="request_duration_seconds", verbose_name="메트릭 이름")
+    job = models.CharField(max_length=100, default="api", verbose_name="Prometheus job")
+    time_range = models.CharField(max_length=20, default="5m", verbose_name="시간 범위")
+    
+    # 목표 (마지막 갱신 시점의 설정)
+    objective = models.FloatField(verbose_name="목표 (좋은 이벤트 비율)")
+    latency_ms = models.FloatField(verbose_name="목표 레이턴시 (ms)")
+    
+    # 창별 링 버퍼: int32 (창, 칸, [이벤트 수, 나쁜 이벤트 수]), 창별 마지막 칸 번호와 합계
+    buckets = models.BinaryField(verbose_name="링 버퍼")
+    heads = models.JSONField(default=list, verbose_name="창별 마지막 칸")
+    totals = models.JSONField(default=list, verbose_name="창별 [이벤트 수, 나쁜 이벤트 수]")
+    
+    # 마지막 갱신 결과
+    burn_rates = models.JSONField(default=dict, verbose_name="창별 소진율")
+    firing = models.JSONField(default=list, verbose_name="발생 중인 알림 조건")
+    last_point_at = models.DateTimeField(verbose_name="마지막 포인트 시간")
+    
+    class Meta:
+        verbose_name = "SLO 상태"
+        verbose_name_plural = "SLO 상태"
+        indexes = [
+            models.Index(fields=['metric_name', 'time_range', 'model_name'], name='slo_state_series_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['model_name', 'metric_name', 'time_range', 'job'],
+                name='unique_slo_state_model',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.model_name} - SLO {self.objective} @ {self.latency_ms}ms (as of {self.last_point_at})"
@@ -0,0 +1,104 @@
+"""
+REST API 렌더러
+
+DRF 기본 JSONRenderer(표준 json 모듈)는 큰 히스토리 응답에서 직렬화 비용이 커서
+orjson 기반 JSON 렌더러와 MessagePack 렌더러를 제공합니다 (settings.REST_FRAMEWORK).
+Accept 헤더로 고르며, 지정하지 않으면 지금과 같은 JSON을 보냅니다.
+
+- application/json: ORJSONRenderer (DRF JSONRenderer와 같은 압축 형식, UTF-8 그대로)
+- application/msgpack: MessagePackRenderer
+
+`fields=` 파라미터로 응답의 각 행(`data` 항목, 히스토리는 `data_points` 항목)을
+필요한 키만 남길 수 있습니다 (select_fields).
+"""
+
+from typing import Dict, Optional, Set
+
+import msgpack
+import orjson
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import BaseRenderer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# fields=를 지정해도 항상 남기는 식별 키
+IDENTITY_FIELDS = {'model'}
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    """orjson/msgpack이 직접 처리하지 못하는 값(Decimal, lazy 문자열 등)은 DRF 인코더 규칙을 따름"""
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """orjson으로 직렬화하는 JSON 렌더러 (DRF JSONRenderer 대체)"""
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """MessagePack 렌더러 (Accept: application/msgpack)"""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True, default=_default)
+
+
+def parse_fields(value: Optional[str]) -> Optional[Set[str]]:
+    """
+    fields 파라미터(쉼표 구분)를 키 집합으로 바꿉니다.
+
+    Returns:
+        키 집합 (파라미터가 없거나 비어 있으면 None)
+    """
+    if not value:
+        return None
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    return fields or None
+
+
+def select_fields(payload: Dict, fields: Optional[Set[str]]) -> Dict:
+    """
+    응답의 각 행에서 fields에 있는 키만 남깁니다.
+
+    `data`의 각 항목이 대상이고, 히스토리처럼 항목에 `data_points`가 있으면
+    항목은 그대로 두고 각 포인트의 키를 줄입니다. 모델 이름(`model`)은 항상 남습니다.
+
+    Args:
+        payload: 응답 본문 딕셔너리
+        fields: 남길 키 집합 (None이면 그대로 반환)
+
+    Returns:
+        키를 줄인 응답 본문 (payload를 직접 바꾸지 않음)
+    """
+    if not fields or not isinstance(payload.get('data'), list):
+        return payload
+
+    keep = fields | IDENTITY_FIELDS
+    rows = []
+    for item in payload['data']:
+        if 'data_points' in item:
+            item = dict(item, data_points=[
+                {key: value for key, value in point.items() if key in keep}
+                for point in item['data_points']
+            ])
+        else:
+            item = {key: value for key, value in item.items() if key in keep}
+        rows.append(item)
+    return dict(payload, data=rows)
@@ -0,0 +1,288 @@
+"""
+히스토리 롤업 (시간/일 단위 집계)
+
+ModelMetricHistory의 5분 단위 행을 (집계 단위, 메트릭, 시간 범위, job, 모델, 구간)마다
+포인트 수 · 합계 · 최솟값 · 최댓값 · 마지막 값으로 미리 집계해 ModelMetricRollup에 둡니다.
+
+- 수집기와 백필은 새 히스토리 행을 저장할 때 apply_history()로 해당 구간만 증분 갱신합니다.
+- rebuild_rollups 명령은 히스토리에서 롤업을 다시 만듭니다 (증분 갱신이 빠진 경우 복구용).
+- 히스토리 API는 다운샘플링 버킷보다 작은 것 중 가장 굵은 집계 단위를 골라
+  원본 대신 롤업의 최솟값·최댓값 포인트를 읽습니다 (load_rollup_points).
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from api.blockstore import earliest_day, history_points, iter_series_points, series_keys
+from api.models import ModelMetricHistory, ModelMetricRollup
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 집계 단위 (가는 것부터)
+RESOLUTIONS = {
+    '1h': 3600,
+    '1d': 86400,
+}
+
+# bulk_create 한 번에 보낼 최대 행 수
+BULK_BATCH_SIZE = 500
+
+# 구간 키에 포함되는 필드 (unique_rollup_bucket과 같은 순서)
+_KEY_FIELDS = ('resolution', 'metric_name', 'time_range', 'job', 'model_name', 'bucket_start')
+_VALUE_FIELDS = (
+    'sample_count', 'p95_sum',
+    'p95_min', 'p95_min_at', 'p95_max', 'p95_max_at', 'p95_last', 'p95_last_at',
+)
+
+
+def bucket_start(timestamp: datetime, seconds: int) -> datetime:
+    """timestamp가 속한 구간의 시작 시각 (에포크 기준 정렬, UTC)"""
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=dt_timezone.utc)
+
+
+def _bucket_ceil(timestamp: datetime, seconds: int) -> datetime:
+    start = bucket_start(timestamp, seconds)
+    if start == timestamp:
+        return start
+    return datetime.fromtimestamp(start.timestamp() + seconds, tz=dt_timezone.utc)
+
+
+def _new_stats(timestamp: datetime, value: float) -> Dict:
+    return {
+        'sample_count': 1,
+        'p95_sum': value,
+        'p95_min': value, 'p95_min_at': timestamp,
+        'p95_max': value, 'p95_max_at': timestamp,
+        'p95_last': value, 'p95_last_at': timestamp,
+    }
+
+
+def _merge_stats(stats: Dict, other: Dict) -> None:
+    """other 구간 집계를 stats에 합칩니다 (같은 값이면 이른 시각의 최솟값/최댓값 유지)."""
+    stats['sample_count'] += other['sample_count']
+    stats['p95_sum'] += other['p95_sum']
+    if (other['p95_min'], other['p95_min_at']) < (stats['p95_min'], stats['p95_min_at']):
+        stats['p95_min'], stats['p95_min_at'] = other['p95_min'], other['p95_min_at']
+    if (other['p95_max'], -other['p95_max_at'].timestamp()) > (stats['p95_max'], -stats['p95_max_at'].timestamp()):
+        stats['p95_max'], stats['p95_max_at'] = other['p95_max'], other['p95_max_at']
+    if other['p95_last_at'] >= stats['p95_last_at']:
+        stats['p95_last'], stats['p95_last_at'] = other['p95_last'], other['p95_last_at']
+
+
+def _fold_points(points: Iterable[Tuple[str, str, str, str, datetime, float]]) -> Dict[Tuple, Dict]:
+    """
+    (metric_name, time_range, job, model_name, timestamp, p95) 포인트를 구간별 집계로 모읍니다.
+
+    Returns:
+        _KEY_FIELDS 순서의 구간 키별 집계
+    """
+    buckets = {}
+    for metric_name, time_range, job, model_name, timestamp, value in points:
+        for resolution, seconds in RESOLUTIONS.items():
+            key = (resolution, metric_name, time_range, job, model_name, bucket_start(timestamp, seconds))
+            stats = buckets.get(key)
+            if stats is None:
+                buckets[key] = _new_stats(timestamp, value)
+            else:
+                _merge_stats(stats, _new_stats(timestamp, value))
+    return buckets
+
+
+def _save_buckets(buckets: Dict[Tuple, Dict]) -> int:
+    """구간 집계를 upsert합니다 (호출하는 쪽에서 기존 집계를 이미 합친 상태여야 함)."""
+    rows = [
+        ModelMetricRollup(**dict(zip(_KEY_FIELDS, key)), **stats)
+        for key, stats in buckets.items()
+    ]
+    ModelMetricRollup.objects.bulk_create(
+        rows,
+        batch_size=BULK_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=list(_KEY_FIELDS),
+        update_fields=list(_VALUE_FIELDS),
+    )
+    return len(rows)
+
+
+def apply_history(rows: List[ModelMetricHistory]) -> int:
+    """
+    새로 저장한 히스토리 행을 롤업에 증분 반영합니다.
+
+    영향받는 구간의 기존 집계를 한 번에 읽어 합친 뒤 upsert하므로, 같은 트랜잭션 안에서
+    히스토리 insert와 함께 호출해야 합니다.
+
+    Args:
+        rows: 이번에 저장한 ModelMetricHistory 리스트
+
+    Returns:
+        갱신한 롤업 행 수
+    """
+    buckets = _fold_points(
+        (row.metric_name, row.time_range, row.job, row.model_name, row.timestamp, row.p95_latency_ms)
+        for row in rows
+        if row.p95_latency_ms is not None
+    )
+    if not buckets:
+        return 0
+
+    existing = ModelMetricRollup.objects.filter(
+        resolution__in={key[0] for key in buckets},
+        metric_name__in={key[1] for key in buckets},
+        model_name__in={key[4] for key in buckets},
+        bucket_start__in={key[5] for key in buckets},
+    ).values_list(*_KEY_FIELDS, *_VALUE_FIELDS)
+
+    for row in existing:
+        key = row[:len(_KEY_FIELDS)]
+        stats = buckets.get(key)
+        if stats is not None:
+            _merge_stats(stats, dict(zip(_VALUE_FIELDS, row[len(_KEY_FIELDS):])))
+
+    return _save_buckets(buckets)
+
+
+def rebuild_rollups(since: Optional[datetime] = None, metric_name: Optional[str] = None) -> int:
+    """
+    히스토리에서 롤업을 다시 만듭니다.
+
+    시리즈(메트릭, 시간 범위, job, 모델)마다 블록과 원본 히스토리를 시간 순으로 스트리밍해
+    집계하므로 메모리에는 시리즈 하나의 구간 집계만 올라갑니다.
+
+    Args:
+        since: 이 시각 이후만 다시 만듦 (일 단위로 내림, None이면 원본·블록이 남아 있는 구간 전체)
+        metric_name: 이 메트릭만 다시 만듦 (None이면 전체)
+
+    Returns:
+        저장한 롤업 행 수
+    """
+    rollups = ModelMetricRollup.objects.all()
+    if metric_name:
+        rollups = rollups.filter(metric_name=metric_name)
+    if since is None:
+        # 원본·블록이 모두 정리된 옛 구간의 롤업은 다시 만들 수 없으므로 남겨 둠
+        since = earliest_day(metric_name)
+        if since is None:
+            return 0
+
+    # 일 단위 구간이 잘리지 않도록 가장 굵은 집계 단위 경계로 내림
+    since = bucket_start(since, max(RESOLUTIONS.values()))
+    rollups = rollups.filter(bucket_start__gte=since)
+
+    deleted, _ = rollups.delete()
+    logger.info(f'Deleted {deleted} rollup rows before rebuild')
+
+    saved = 0
+    for series_metric, time_range, job, model_name in series_keys(since, metric_name):
+        points = iter_series_points(series_metric, time_range, job, model_name, since)
+        saved += _save_buckets(_fold_points(
+            (series_metric, time_range, job, model_name, timestamp, value)
+            for timestamp, value in points
+        ))
+
+    return saved
+
+
+def fill_missing_rollups(since: datetime, until: datetime) -> int:
+    """
+    [since, until) 구간의 히스토리로 아직 없는 롤업 구간만 만들어 넣습니다.
+
+    원본을 지우기 전에 호출해서 증분 갱신이 빠진 구간도 롤업으로 남게 합니다.
+    이미 있는 구간은 그대로 두므로, 원본 일부가 이미 지워진 구간을 다시 처리해도
+    기존 집계를 덮어쓰지 않습니다. since/until은 일 경계에 맞춰야 합니다.
+
+    Args:
+        since: 구간 시작
+        until: 구간 끝 (포함하지 않음)
+
+    Returns:
+        확인한 롤업 구간 수 (이미 있어서 건너뛴 구간 포함)
+    """
+    points = ModelMetricHistory.objects.filter(
+        timestamp__gte=since,
+        timestamp__lt=until,
+    ).values_list('metric_name', 'time_range', 'job', 'model_name', 'timestamp', 'p95_latency_ms')
+
+    buckets = _fold_points(points.iterator(chunk_size=BULK_BATCH_SIZE))
+    ModelMetricRollup.objects.bulk_create(
+        [ModelMetricRollup(**dict(zip(_KEY_FIELDS, key)), **stats) for key, stats in buckets.items()],
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(buckets)
+
+
+def pick_resolution(bucket_seconds: Optional[float]) -> Optional[str]:
+    """
+    다운샘플링 버킷 폭 이하인 집계 단위 중 가장 굵은 것을 고릅니다.
+
+    Returns:
+        집계 단위 (예: '1h'), 원본 히스토리를 읽어야 하면 None
+    """
+    if not bucket_seconds:
+        return None
+    candidates = [name for name, seconds in RESOLUTIONS.items() if seconds <= bucket_seconds]
+    return max(candidates, key=RESOLUTIONS.get) if candidates else None
+
+
+def load_rollup_points(
+    filters: Dict,
+    start_time: datetime,
+    end_time: datetime,
+    resolution: str
+) -> Optional[Dict[str, List[Tuple[datetime, float]]]]:
+    """
+    히스토리 구간을 롤업의 최솟값·최댓값 포인트로 읽습니다.
+
+    구간 경계에 걸쳐 일부만 포함되는 앞뒤 구간은 원본 히스토리(또는 블록)에서 읽으므로
+    결과에는 [start_time, end_time] 밖의 포인트가 섞이지 않습니다.
+
+    Args:
+        filters: 히스토리 조회 필터 (timestamp__gte/lte 제외한 나머지를 롤업에도 적용)
+        start_time: 구간 시작
+        end_time: 구간 끝
+        resolution: 집계 단위
+
+    Returns:
+        모델 이름별 시간 순 (시각, P95) 리스트 (모델은 처음 등장한 순서),
+        구간이 집계 단위보다 짧아 롤업을 쓸 수 없으면 None
+    """
+    seconds = RESOLUTIONS[resolution]
+    inner_start = _bucket_ceil(start_time, seconds)
+    inner_end = bucket_start(end_time, seconds)
+    if inner_start >= inner_end:
+        return None
+
+    series_filters = {
+        key: value for key, value in filters.items()
+        if not key.startswith('timestamp')
+    }
+
+    model_points = {}
+
+    rollups = ModelMetricRollup.objects.filter(
+        resolution=resolution,
+        bucket_start__gte=inner_start,
+        bucket_start__lt=inner_end,
+        **series_filters,
+    ).order_by('model_name', 'bucket_start').values_list(
+        'model_name', 'p95_min_at', 'p95_min', 'p95_max_at', 'p95_max'
+    )
+    for model_name, min_at, min_value, max_at, max_value in rollups:
+        model_points.setdefault(model_name, []).extend({(min_at, min_value), (max_at, max_value)})
+
+    # 앞뒤 경계 구간은 원본(보관 기간이 지났으면 블록)에서 읽음
+    edge_windows = [
+        (start_time, inner_start - timedelta(microseconds=1)),
+        (inner_end, end_time),
+    ]
+    for edge_start, edge_end in edge_windows:
+        edge_filters = dict(series_filters, timestamp__gte=edge_start, timestamp__lte=edge_end)
+        for model_name, points in history_points(edge_filters, edge_start, edge_end).items():
+            model_points.setdefault(model_name, []).extend(points)
+
+    for points in model_points.values():
+        points.sort(key=lambda point: point[0])
+    # 원본 조회와 같이 먼저 등장한 모델부터
+    return dict(sorted(model_points.items(), key=lambda item: item[1][0][0]))
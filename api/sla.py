@@ -0,0 +1,356 @@
+"""
+SLA 평가와 알림
+
+config.yaml의 `sla.thresholds`(모델별 P95 임계값 ms, `default`는 나머지 모델)로
+수집기가 매 수집 직후 이번에 수집한 모든 모델을 평가합니다.
+
+- 평가: 이번 수집의 P95와 임계값을 NumPy 배열로 만들어 한 번에 비교
+- 상태 전이: SlaState에 저장한 직전 상태와 다른 모델만(위반 시작 `breached`, 해소 `recovered`)
+  행을 갱신하고 알림을 만듭니다. 위반이 계속되는 동안에는 다시 알리지 않습니다.
+- 알림: `sla.alerts.webhook_url`로 POST. 백그라운드 스레드가 알림을 모아 한 번에 보내고
+  실패하면 지수 백오프로 재시도하므로 수집 주기를 막지 않습니다 (WebhookDispatcher).
+
+웹훅 본문:
+    {"source": "springboard", "sent_at": "...", "alerts": [{"state": "breached", "model": "gpt-4", ...}]}
+
+로컬에서는 `python3 manage.py sla_webhook_receiver`로 받는 쪽을 띄우고
+webhook_url을 http://127.0.0.1:9099/ 로 지정해 확인할 수 있습니다.
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import SlaState
+import logging
+
+logger = logging.getLogger(__name__)
+
+ALERT_BREACHED = 'breached'
+ALERT_RECOVERED = 'recovered'
+
+# 전송 대기 중인 알림 최대 수 (넘치면 버리고 로그만 남김)
+QUEUE_SIZE = 10000
+
+# 배치를 채우려고 기다리는 시간 (초)
+BATCH_WAIT_SECONDS = 0.5
+
+# 재시도 대기의 기준 (초, 1, 2, 4, ...배)
+RETRY_BACKOFF_SECONDS = 1.0
+
+
+class WebhookDispatcher:
+    """
+    알림을 백그라운드 스레드에서 모아 웹훅으로 보내는 전송기
+
+    submit()은 큐에 넣기만 하고 바로 돌아옵니다. 스레드는 잠시(BATCH_WAIT_SECONDS) 더 들어오는
+    알림을 최대 batch_size개까지 묶어 한 번에 POST하고, 연결 오류·5xx·429면
+    max_retries번까지 지수 백오프로 다시 보냅니다.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
+        """
+        Args:
+            url: 웹훅 URL
+            timeout: 요청 타임아웃 (초, 기본값: settings.SLA_WEBHOOK_TIMEOUT)
+            max_retries: 최대 재시도 횟수 (기본값: settings.SLA_WEBHOOK_MAX_RETRIES)
+            batch_size: 요청 하나에 담을 최대 알림 수 (기본값: settings.SLA_WEBHOOK_BATCH_SIZE)
+        """
+        self.url = url
+        self.timeout = timeout if timeout is not None else getattr(settings, 'SLA_WEBHOOK_TIMEOUT', 5)
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'SLA_WEBHOOK_MAX_RETRIES', 3)
+        self.batch_size = batch_size or getattr(settings, 'SLA_WEBHOOK_BATCH_SIZE', 100)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._session = requests.Session()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, alerts: List[Dict]) -> None:
+        """알림을 전송 큐에 넣습니다 (기다리지 않음)."""
+        if not alerts:
+            return
+        self._ensure_worker()
+        for alert in alerts:
+            try:
+                self._queue.put_nowait(alert)
+            except queue.Full:
+                self.dropped += 1
+                logger.warning(f'SLA alert queue is full, dropping alert for {alert.get("model")}')
+
+    def flush(self, timeout: float) -> bool:
+        """
+        큐에 남은 알림을 다 보낼(또는 포기할) 때까지 기다립니다.
+        collect_metrics처럼 짧게 끝나는 프로세스가 종료 전에 호출합니다.
+
+        Args:
+            timeout: 최대 대기 시간 (초)
+
+        Returns:
+            시간 안에 모두 처리했는지 여부
+        """
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f'{self._queue.unfinished_tasks} SLA alerts still pending after {timeout:g}s')
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sla-webhook', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + BATCH_WAIT_SECONDS
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f'Failed to deliver {len(batch)} SLA alerts: {e}', exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _deliver(self, batch: List[Dict]) -> bool:
+        body = {
+            'source': 'springboard',
+            'sent_at': timezone.now().isoformat(),
+            'alerts': batch,
+        }
+
+        reason = ''
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._session.post(self.url, json=body, timeout=self.timeout)
+                if response.status_code < 400:
+                    self.sent += len(batch)
+                    return True
+                reason = f'HTTP {response.status_code}'
+                if response.status_code < 500 and response.status_code != 429:
+                    # 요청 자체가 잘못된 경우라 다시 보내도 같은 결과
+                    break
+            except requests.RequestException as e:
+                reason = str(e)
+
+            if attempt < self.max_retries:
+                delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+                logger.warning(f'SLA webhook delivery failed ({reason}), retrying in {delay:g}s')
+                time.sleep(delay)
+
+        self.failed += len(batch)
+        logger.error(f'Failed to deliver {len(batch)} SLA alerts to {self.url}: {reason}')
+        return False
+
+
+class SlaEngine:
+    """설정의 임계값으로 수집 결과를 평가하고 상태가 바뀐 모델만 알리는 클래스"""
+
+    def __init__(
+        self,
+        thresholds: Dict[str, float],
+        default_threshold: Optional[float] = None,
+        dispatcher: Optional[WebhookDispatcher] = None
+    ):
+        """
+        Args:
+            thresholds: 모델 이름별 P95 임계값 (ms)
+            default_threshold: thresholds에 없는 모델의 임계값 (None이면 평가하지 않음)
+            dispatcher: 알림 전송기 (None이면 상태만 기록하고 로그로 남김)
+        """
+        self.thresholds = thresholds
+        self.default_threshold = default_threshold
+        self.dispatcher = dispatcher
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['SlaEngine']:
+        """
+        설정의 sla 섹션으로 엔진을 만듭니다.
+
+        Args:
+            config: load_config()로 읽은 설정
+
+        Returns:
+            SlaEngine (sla.thresholds가 없으면 None)
+        """
+        sla_config = config.get('sla') or {}
+        thresholds = dict(sla_config.get('thresholds') or {})
+        if not thresholds:
+            return None
+
+        default_threshold = thresholds.pop('default', None)
+        alerts_config = sla_config.get('alerts') or {}
+        webhook_url = alerts_config.get('webhook_url')
+        dispatcher = None
+        if alerts_config.get('enabled', True) and webhook_url:
+            dispatcher = WebhookDispatcher(webhook_url)
+
+        return cls(
+            {str(model): float(threshold) for model, threshold in thresholds.items()},
+            float(default_threshold) if default_threshold is not None else None,
+            dispatcher,
+        )
+
+    def check(self, collections: List[Dict], evaluated_at) -> List[Dict]:
+        """
+        평가하고 알림을 전송 큐에 넣습니다. 실패해도 수집에는 영향을 주지 않습니다.
+
+        Args:
+            collections: MetricsCollector.collect()의 조합별 수집 결과
+            evaluated_at: 수집 시간
+
+        Returns:
+            이번에 만든 알림 리스트 (실패하면 빈 리스트)
+        """
+        try:
+            alerts = self.evaluate(collections, evaluated_at)
+        except Exception as e:
+            logger.error(f'SLA evaluation failed: {e}', exc_info=True)
+            return []
+
+        for alert in alerts:
+            logger.warning(
+                f'SLA {alert["state"]}: {alert["model"]} [{alert["metric_name"]}, {alert["time_range"]}, '
+                f'job={alert["job"]}] P95={alert["p95_latency_ms"]}ms (threshold {alert["threshold_ms"]}ms)'
+            )
+        if self.dispatcher is not None:
+            self.dispatcher.submit(alerts)
+        return alerts
+
+    def evaluate(self, collections: List[Dict], evaluated_at) -> List[Dict]:
+        """
+        이번 수집의 모든 모델을 임계값과 비교하고, 상태가 바뀐 모델의 SlaState를 갱신합니다.
+
+        조회에 실패한 조합과 임계값이 없는 모델은 평가하지 않습니다 (직전 상태 유지).
+        처음 보는 모델은 정상 상태였던 것으로 보고, 바로 위반이면 알립니다.
+
+        Args:
+            collections: `target`, `model_stats`, `succeeded` 키를 가진 수집 결과 리스트
+            evaluated_at: 수집 시간
+
+        Returns:
+            상태가 바뀐 모델의 알림 리스트
+        """
+        keys = []
+        values = []
+        limits = []
+        for collection in collections:
+            if not collection.get('succeeded', True):
+                continue
+            target = collection['target']
+            for model_name, stats in collection['model_stats'].items():
+                threshold = self.thresholds.get(model_name, self.default_threshold)
+                if stats.get('p95') is None or threshold is None:
+                    continue
+                keys.append((target['metric_name'], target['time_range'], target['job'], model_name))
+                values.append(stats['p95'])
+                limits.append(threshold)
+
+        if not keys:
+            return []
+
+        previous_states = {
+            (metric_name, time_range, job, model_name): (breached, changed_at)
+            for metric_name, time_range, job, model_name, breached, changed_at
+            in SlaState.objects.filter(metric_name__in={key[0] for key in keys}).values_list(
+                'metric_name', 'time_range', 'job', 'model_name', 'breached', 'changed_at',
+            )
+        }
+
+        # 모든 모델을 한 번에 비교
+        p95 = np.array(values, dtype=np.float64)
+        threshold = np.array(limits, dtype=np.float64)
+        breached = p95 > threshold
+        previous = np.fromiter(
+            (previous_states.get(key, (False, None))[0] for key in keys), dtype=bool, count=len(keys)
+        )
+        excess_pct = np.divide(
+            (p95 - threshold) * 100, threshold, out=np.zeros_like(p95), where=threshold > 0
+        )
+
+        alerts = []
+        states = []
+        for i in np.flatnonzero(breached != previous).tolist():
+            metric_name, time_range, job, model_name = keys[i]
+            is_breached = bool(breached[i])
+            alert = {
+                'state': ALERT_BREACHED if is_breached else ALERT_RECOVERED,
+                'model': model_name,
+                'metric_name': metric_name,
+                'time_range': time_range,
+                'job': job,
+                'p95_latency_ms': round(values[i], 2),
+                'threshold_ms': limits[i],
+                'excess_pct': round(float(excess_pct[i]), 1),
+                'at': evaluated_at.isoformat(),
+            }
+            if not is_breached:
+                alert['breached_since'] = previous_states[keys[i]][1].isoformat()
+            alerts.append(alert)
+            states.append(SlaState(
+                model_name=model_name,
+                metric_name=metric_name,
+                time_range=time_range,
+                job=job,
+                breached=is_breached,
+                threshold_ms=limits[i],
+                p95_latency_ms=values[i],
+                changed_at=evaluated_at,
+            ))
+
+        if states:
+            with transaction.atomic():
+                SlaState.objects.bulk_create(
+                    states,
+                    update_conflicts=True,
+                    unique_fields=['model_name', 'metric_name', 'time_range', 'job'],
+                    update_fields=['breached', 'threshold_ms', 'p95_latency_ms', 'changed_at'],
+                )
+
+        return alerts
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        전송 대기 중인 알림을 보낼 때까지 기다립니다.
+
+        Args:
+            timeout: 최대 대기 시간 (초, 기본값: settings.SLA_WEBHOOK_FLUSH_SECONDS)
+
+        Returns:
+            시간 안에 모두 처리했는지 여부 (전송기가 없으면 True)
+        """
+        if self.dispatcher is None:
+            return True
+        if timeout is None:
+            timeout = getattr(settings, 'SLA_WEBHOOK_FLUSH_SECONDS', 15)
+        return self.dispatcher.flush(timeout)
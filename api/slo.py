@@ -0,0 +1,452 @@
+"""
+SLO 오류 예산 소진율 (burn rate)
+
+수집 1회의 P95 값 하나를 이벤트 하나로 보고, 목표 레이턴시(`latency_ms`)를 넘으면 나쁜 이벤트로 셉니다.
+오류 예산은 1 - objective이고, 창의 소진율은 (나쁜 이벤트 비율) / (1 - objective)입니다.
+소진율 1은 창 길이 동안 예산을 딱 맞게 쓰는 속도입니다.
+
+창(5m, 1h, 6h, 3d)마다 SLOTS칸짜리 링 버퍼(한 칸 = 창 길이 / SLOTS)와 창 안의 합계를 SloState에
+두고, 수집기가 새 포인트를 받으면 해당 칸과 합계만 고칩니다. 창이 밀릴 때는 지나간 칸만 비우므로
+포인트 하나당 창마다 상수 시간이고, /api/slo/는 히스토리를 읽지 않고 SloState만 읽습니다.
+
+다중 창 · 다중 소진율 알림 조건 (BURN_RATE_RULES, Google SRE Workbook의 기준값):
+- page: 1h와 5m 소진율이 모두 14.4 이상
+- page: 6h와 1h 소진율이 모두 6 이상
+- ticket: 3d와 6h 소진율이 모두 1 이상
+긴 창은 잠깐의 튐으로 알리지 않게 하고, 짧은 창은 상황이 끝나면 조건을 빨리 풀어 줍니다.
+조건이 새로 성립하거나(`slo_burn`) 풀리면(`slo_recovered`) SLA 알림과 같은 웹훅으로 보냅니다.
+
+수집을 막 시작했거나 긴 공백 뒤에는 창에 포인트가 몇 개뿐이라 나쁜 이벤트 하나로도 소진율이 크게 나오므로,
+이벤트가 MIN_WINDOW_EVENTS개 이상이거나 창 길이의 MIN_WINDOW_COVERAGE 이상을 덮은 창만 평가합니다.
+포인트 하나는 수집 주기(settings.COLLECTOR_INTERVAL)만큼의 시간을 대표하므로, 창 길이가 수집 주기
+이하인 창(기본 5분 주기의 5m 창)은 포인트 하나로 전부 덮여 바로 평가됩니다.
+아직 준비되지 않은 창의 소진율은 None(알 수 없음)이고, 알림 조건과 남은 오류 예산에서도 빠집니다.
+
+목표 설정 (config.yaml의 slo 섹션, 위에 있을수록 우선):
+- slo.models.<모델>: objective, latency_ms
+- slo.groups.<model_groups 이름>: objective, latency_ms
+- slo.objective, slo.latency_ms
+- latency_ms가 어디에도 없으면 sla.thresholds의 모델 값 또는 default (그것도 없으면 추적하지 않음)
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from api.blockstore import iter_series_points, series_keys
+from api.models import SloState
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 창 이름과 길이 (초)
+WINDOWS = {
+    '5m': 300,
+    '1h': 3600,
+    '6h': 21600,
+    '3d': 259200,
+}
+
+# 창마다 링 버퍼 칸 수
+SLOTS = 60
+
+# 다중 창 · 다중 소진율 알림 조건 (긴 창과 짧은 창이 모두 burn_rate 이상이면 성립)
+BURN_RATE_RULES = [
+    {'severity': 'page', 'long_window': '1h', 'short_window': '5m', 'burn_rate': 14.4},
+    {'severity': 'page', 'long_window': '6h', 'short_window': '1h', 'burn_rate': 6.0},
+    {'severity': 'ticket', 'long_window': '3d', 'short_window': '6h', 'burn_rate': 1.0},
+]
+
+DEFAULT_OBJECTIVE = 0.99
+
+# 창을 평가하기 위한 최소 이벤트 수와 최소 포함 비율 (둘 중 하나만 넘으면 평가)
+MIN_WINDOW_EVENTS = 30
+MIN_WINDOW_COVERAGE = 0.5
+
+# bulk_create 한 번에 보낼 최대 행 수
+BULK_BATCH_SIZE = 500
+
+ALERT_BURN = 'slo_burn'
+ALERT_RECOVERED = 'slo_recovered'
+
+_WINDOW_NAMES = list(WINDOWS)
+_SLOT_SECONDS = [seconds / SLOTS for seconds in WINDOWS.values()]
+
+# 시리즈 키: (metric_name, time_range, job, model_name)
+SeriesKey = Tuple[str, str, str, str]
+
+
+class RollingWindows:
+    """
+    한 시리즈의 창별 링 버퍼
+
+    칸 번호는 에포크 초 / 칸 길이이고, 칸 번호 % SLOTS 자리에 저장합니다.
+    창의 마지막 칸(head)보다 뒤의 포인트가 오면 그 사이의 칸만 비우고 합계에서 뺍니다.
+    """
+
+    def __init__(self, buckets: Optional[np.ndarray] = None, heads: Optional[List[int]] = None, totals: Optional[List[List[int]]] = None):
+        self.buckets = buckets if buckets is not None else np.zeros((len(WINDOWS), SLOTS, 2), dtype=np.int32)
+        self.heads = list(heads) if heads else [-1] * len(WINDOWS)
+        self.totals = [list(total) for total in totals] if totals else [[0, 0] for _ in WINDOWS]
+
+    @classmethod
+    def from_state(cls, state: SloState) -> 'RollingWindows':
+        buckets = np.frombuffer(bytes(state.buckets), dtype=np.int32)
+        if buckets.size != len(WINDOWS) * SLOTS * 2 or len(state.heads) != len(WINDOWS):
+            # 창 구성이 바뀐 경우 새로 시작
+            return cls()
+        return cls(buckets.reshape(len(WINDOWS), SLOTS, 2).copy(), state.heads, state.totals)
+
+    def add(self, timestamp: float, bad: bool) -> None:
+        """포인트 하나를 모든 창에 더합니다 (창마다 상수 시간, 밀린 칸 비우기는 분할 상환)."""
+        for window, slot_seconds in enumerate(_SLOT_SECONDS):
+            slot = int(timestamp // slot_seconds)
+            head = self.heads[window]
+            if slot > head:
+                self._advance(window, head, slot)
+            elif slot <= head - SLOTS:
+                # 창보다 오래된 포인트
+                continue
+
+            position = slot % SLOTS
+            self.buckets[window, position, 0] += 1
+            self.totals[window][0] += 1
+            if bad:
+                self.buckets[window, position, 1] += 1
+                self.totals[window][1] += 1
+
+    def _advance(self, window: int, head: int, slot: int) -> None:
+        if head < 0 or slot - head >= SLOTS:
+            self.buckets[window] = 0
+            self.totals[window] = [0, 0]
+        else:
+            for stale in range(head + 1, slot + 1):
+                position = stale % SLOTS
+                self.totals[window][0] -= int(self.buckets[window, position, 0])
+                self.totals[window][1] -= int(self.buckets[window, position, 1])
+                self.buckets[window, position] = 0
+        self.heads[window] = slot
+
+    def coverage(self, interval: Optional[float] = None) -> List[float]:
+        """
+        창별로 포인트가 덮는 시간이 창 길이에서 차지하는 비율 (최대 1)
+
+        가장 오래된 포인트가 있는 칸부터 head까지의 시간에, 마지막 포인트가 대표하는
+        수집 주기 하나를 더해 계산합니다.
+
+        Args:
+            interval: 수집 주기 (초, 기본값: settings.COLLECTOR_INTERVAL)
+        """
+        if interval is None:
+            interval = collection_interval()
+        result = []
+        for window, (head, slot_seconds) in enumerate(zip(self.heads, _SLOT_SECONDS)):
+            positions = np.flatnonzero(self.buckets[window, :, 0])
+            if head < 0 or not positions.size:
+                result.append(0.0)
+                continue
+            span = int(((head - positions) % SLOTS).max()) * slot_seconds
+            result.append(round(min(1.0, (span + interval) / (slot_seconds * SLOTS)), 3))
+        return result
+
+    def burn_rates(
+        self,
+        objective: float,
+        min_events: int = MIN_WINDOW_EVENTS,
+        min_coverage: float = MIN_WINDOW_COVERAGE,
+        interval: Optional[float] = None,
+    ) -> Dict[str, Optional[float]]:
+        """
+        창별 소진율
+
+        Args:
+            objective: 좋은 이벤트 비율 목표
+            min_events: 창을 평가하기 위한 최소 이벤트 수
+            min_coverage: 창을 평가하기 위한 최소 포함 비율 (min_events와 둘 중 하나만 넘으면 됨)
+            interval: 수집 주기 (초, 기본값: settings.COLLECTOR_INTERVAL)
+
+        Returns:
+            창 이름 → 소진율 (창에 이벤트가 없거나 아직 준비되지 않았으면 None)
+        """
+        budget = 1 - objective
+        return {
+            name: round((bad / events) / budget, 3)
+            if events and budget > 0 and (events >= min_events or coverage >= min_coverage) else None
+            for name, (events, bad), coverage in zip(_WINDOW_NAMES, self.totals, self.coverage(interval))
+        }
+
+
+def collection_interval() -> float:
+    """수집 주기 (초)"""
+    return float(getattr(settings, 'COLLECTOR_INTERVAL', 300))
+
+
+def firing_conditions(burn_rates: Dict[str, Optional[float]]) -> List[Dict]:
+    """BURN_RATE_RULES 중 긴 창과 짧은 창 소진율이 모두 기준 이상인 조건"""
+    return [
+        rule for rule in BURN_RATE_RULES
+        if burn_rates.get(rule['long_window']) is not None
+        and burn_rates.get(rule['short_window']) is not None
+        and burn_rates[rule['long_window']] >= rule['burn_rate']
+        and burn_rates[rule['short_window']] >= rule['burn_rate']
+    ]
+
+
+def summarize(state: SloState) -> Dict:
+    """
+    SloState 하나를 /api/slo/ 응답 항목으로 바꿉니다.
+
+    Returns:
+        `model`, `job`, `objective`, `latency_ms`,
+        `windows`(창별 이벤트 수, 나쁜 이벤트 수, 포함 비율, 평가 여부, 소진율),
+        `error_budget_remaining`(가장 긴 창 기준, 창이 준비되지 않았으면 None), `alerts`, `as_of` 를 담은 딕셔너리
+    """
+    windows = {}
+    totals = state.totals or [[0, 0]] * len(WINDOWS)
+    coverage = RollingWindows.from_state(state).coverage()
+    for name, (events, bad), covered in zip(_WINDOW_NAMES, totals, coverage):
+        windows[name] = {
+            'events': events,
+            'bad_events': bad,
+            'coverage': covered,
+            'ready': state.burn_rates.get(name) is not None,
+            'burn_rate': state.burn_rates.get(name),
+        }
+
+    longest = state.burn_rates.get(_WINDOW_NAMES[-1])
+    return {
+        'model': state.model_name,
+        'job': state.job,
+        'objective': state.objective,
+        'latency_ms': state.latency_ms,
+        'windows': windows,
+        'error_budget_remaining': round(1 - longest, 3) if longest is not None else None,
+        'alerts': state.firing,
+        'as_of': state.last_point_at.isoformat(),
+    }
+
+
+class SloTracker:
+    """수집 결과로 모델별 SLO 창을 증분 갱신하고 알림 조건의 변화를 알리는 클래스"""
+
+    def __init__(self, config: Dict, dispatcher=None, interval: Optional[float] = None):
+        """
+        Args:
+            config: load_config()로 읽은 설정 (slo, sla, model_groups 섹션 사용)
+            dispatcher: 알림 전송기 (api.sla.WebhookDispatcher, None이면 로그만 남김)
+            interval: 수집 주기 (초, 기본값: settings.COLLECTOR_INTERVAL, 창 포함 비율 계산용)
+        """
+        self.interval = float(interval) if interval is not None else collection_interval()
+        slo_config = config.get('slo') or {}
+        self.objective = float(slo_config.get('objective', DEFAULT_OBJECTIVE))
+        self.latency_ms = slo_config.get('latency_ms')
+        self.min_window_events = int(slo_config.get('min_window_events', MIN_WINDOW_EVENTS))
+        self.min_window_coverage = float(slo_config.get('min_window_coverage', MIN_WINDOW_COVERAGE))
+        self.model_targets = slo_config.get('models') or {}
+        self.group_targets = slo_config.get('groups') or {}
+        self.sla_thresholds = dict((config.get('sla') or {}).get('thresholds') or {})
+        self.dispatcher = dispatcher
+
+        # 모델 → 처음 속한 model_groups 이름
+        self.model_groups = {}
+        for group, models in (config.get('model_groups') or {}).items():
+            for model_name in models or []:
+                self.model_groups.setdefault(model_name, group)
+
+        self._targets = {}
+
+    @classmethod
+    def from_config(cls, config: Dict, dispatcher=None, interval: Optional[float] = None) -> Optional['SloTracker']:
+        """
+        설정에 slo 섹션이 있으면 추적기를 만듭니다.
+
+        Returns:
+            SloTracker (slo 섹션이 없으면 None)
+        """
+        if not config.get('slo'):
+            return None
+        return cls(config, dispatcher, interval)
+
+    def target_for(self, model_name: str) -> Optional[Dict]:
+        """
+        모델의 SLO 목표 (모델 > model_groups > slo 기본값 > sla.thresholds 순).
+
+        Returns:
+            `objective`, `latency_ms` 딕셔너리 (목표 레이턴시를 정할 수 없으면 None)
+        """
+        if model_name in self._targets:
+            return self._targets[model_name]
+
+        target = {'objective': self.objective, 'latency_ms': self.latency_ms}
+        group = self.model_groups.get(model_name)
+        for override in (self.group_targets.get(group) if group else None, self.model_targets.get(model_name)):
+            if override:
+                target.update({key: override[key] for key in ('objective', 'latency_ms') if key in override})
+
+        if target['latency_ms'] is None:
+            target['latency_ms'] = self.sla_thresholds.get(model_name, self.sla_thresholds.get('default'))
+
+        if target['latency_ms'] is None:
+            target = None
+        else:
+            target = {'objective': float(target['objective']), 'latency_ms': float(target['latency_ms'])}
+        self._targets[model_name] = target
+        return target
+
+    def check(self, collections: List[Dict], collected_at: datetime) -> List[Dict]:
+        """
+        수집 결과를 반영하고 알림 조건의 변화를 전송 큐에 넣습니다. 실패해도 수집에는 영향을 주지 않습니다.
+
+        Args:
+            collections: MetricsCollector.collect()의 조합별 수집 결과
+            collected_at: 수집 시간
+
+        Returns:
+            이번에 만든 알림 리스트 (실패하면 빈 리스트)
+        """
+        points = []
+        for collection in collections:
+            if not collection.get('succeeded', True):
+                continue
+            target = collection['target']
+            for model_name, stats in collection['model_stats'].items():
+                if stats.get('p95') is not None:
+                    key = (target['metric_name'], target['time_range'], target['job'], model_name)
+                    points.append((key, [(collected_at, stats['p95'])]))
+
+        try:
+            alerts = self.update(points)
+        except Exception as e:
+            logger.error(f'SLO update failed: {e}', exc_info=True)
+            return []
+
+        for alert in alerts:
+            logger.warning(
+                f'SLO {alert["state"]} ({alert["severity"]}): {alert["model"]} [{alert["metric_name"]}, '
+                f'{alert["time_range"]}, job={alert["job"]}] burn rate {alert["burn_rates"]} '
+                f'(threshold {alert["burn_rate_threshold"]})'
+            )
+        if self.dispatcher is not None:
+            self.dispatcher.submit(alerts)
+        return alerts
+
+    def update(self, series_points: List[Tuple[SeriesKey, List[Tuple[datetime, float]]]], reset: bool = False) -> List[Dict]:
+        """
+        시리즈별 새 포인트를 창에 더하고 SloState를 저장합니다.
+
+        Args:
+            series_points: (시리즈 키, 시간 순 (시각, P95) 리스트) 리스트
+            reset: True이면 저장된 창을 버리고 주어진 포인트로 새로 만듦 (rebuild_slo)
+
+        Returns:
+            알림 조건이 새로 성립하거나 풀린 시리즈의 알림 리스트
+        """
+        series_points = [(key, points) for key, points in series_points if points and self.target_for(key[3])]
+        if not series_points:
+            return []
+
+        previous_states = {}
+        if not reset:
+            metric_names = {key[0] for key, _ in series_points}
+            for state in SloState.objects.filter(metric_name__in=metric_names):
+                previous_states[(state.metric_name, state.time_range, state.job, state.model_name)] = state
+
+        alerts = []
+        states = []
+        for key, points in series_points:
+            metric_name, time_range, job, model_name = key
+            target = self.target_for(model_name)
+            previous = previous_states.get(key)
+            windows = RollingWindows.from_state(previous) if previous else RollingWindows()
+
+            for timestamp, p95 in points:
+                windows.add(timestamp.timestamp(), p95 > target['latency_ms'])
+
+            burn_rates = windows.burn_rates(
+                target['objective'], self.min_window_events, self.min_window_coverage, self.interval
+            )
+            firing = firing_conditions(burn_rates)
+            last_point_at = points[-1][0]
+
+            previous_firing = previous.firing if previous else []
+            for rule, state_name in (
+                *((rule, ALERT_BURN) for rule in firing if rule not in previous_firing),
+                *((rule, ALERT_RECOVERED) for rule in previous_firing if rule not in firing),
+            ):
+                alerts.append({
+                    'state': state_name,
+                    'severity': rule['severity'],
+                    'model': model_name,
+                    'metric_name': metric_name,
+                    'time_range': time_range,
+                    'job': job,
+                    'long_window': rule['long_window'],
+                    'short_window': rule['short_window'],
+                    'burn_rate_threshold': rule['burn_rate'],
+                    'burn_rates': {
+                        rule['long_window']: burn_rates[rule['long_window']],
+                        rule['short_window']: burn_rates[rule['short_window']],
+                    },
+                    'objective': target['objective'],
+                    'latency_ms': target['latency_ms'],
+                    'at': last_point_at.isoformat(),
+                })
+
+            states.append(SloState(
+                model_name=model_name,
+                metric_name=metric_name,
+                time_range=time_range,
+                job=job,
+                objective=target['objective'],
+                latency_ms=target['latency_ms'],
+                buckets=windows.buckets.tobytes(),
+                heads=windows.heads,
+                totals=windows.totals,
+                burn_rates=burn_rates,
+                firing=firing,
+                last_point_at=last_point_at,
+            ))
+
+        with transaction.atomic():
+            SloState.objects.bulk_create(
+                states,
+                batch_size=BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['model_name', 'metric_name', 'time_range', 'job'],
+                update_fields=[
+                    'objective', 'latency_ms', 'buckets', 'heads', 'totals',
+                    'burn_rates', 'firing', 'last_point_at',
+                ],
+            )
+
+        return alerts
+
+    def rebuild(self, now: datetime, metric_name: Optional[str] = None) -> int:
+        """
+        가장 긴 창 길이만큼의 히스토리(원본 + 블록)로 SloState를 다시 만듭니다 (알림은 보내지 않음).
+
+        Args:
+            now: 기준 시각
+            metric_name: 다시 만들 메트릭 이름 (None이면 전체)
+
+        Returns:
+            다시 만든 시리즈 수
+        """
+        since = now - timedelta(seconds=max(WINDOWS.values()))
+        rebuilt = 0
+        batch = []
+        for key in series_keys(since=since, metric_name=metric_name):
+            if not self.target_for(key[3]):
+                continue
+            batch.append((key, list(iter_series_points(*key, since))))
+            if len(batch) >= BULK_BATCH_SIZE:
+                self.update(batch, reset=True)
+                rebuilt += len(batch)
+                batch = []
+        if batch:
+            self.update(batch, reset=True)
+            rebuilt += len(batch)
+        return rebuilt
@@ -0,0 +1,340 @@
+"""
+최신 메트릭 스냅샷 캐시
+
+/api/metrics/, /api/metrics/p95/ 응답 본문을 수집할 때 한 번만 만들어
+Django 캐시에 인코딩된 바이트로 저장해 두고, 뷰는 그 바이트를 그대로 돌려줍니다.
+
+- 세대(generation): 수집 시각의 에포크 밀리초. 수집이 끝날 때마다 바뀌고
+  스냅샷 키에 포함되므로, 세대가 바뀌면 이전 스냅샷은 자연히 쓰이지 않습니다.
+- 수집기는 수집한 (메트릭, 시간 범위, job) 조합의 스냅샷을 미리 만들어 두고,
+  그 외의 조합은 처음 요청될 때 DB에서 만들어 같은 세대로 저장합니다.
+- `since=` 변경분 본문(get_changes)도 같은 세대 키로 저장합니다.
+- 수집기와 웹 서버는 다른 프로세스이므로 CACHES는 파일 또는 Redis 백엔드를 사용해야 합니다.
+  같은 세대의 스냅샷은 프로세스 메모리에도 보관해서 캐시 백엔드 조회를 줄입니다.
+"""
+
+import json
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Callable, Dict, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+
+from api.changes import load_changes, tombstone_retention
+from api.config import DEFAULT_METRIC_NAME, DEFAULT_TIME_RANGE
+from api.models import ModelMetric
+import logging
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'springboard:generation'
+
+# 이전 세대 스냅샷이 캐시에 남아 있는 시간 (초)
+SNAPSHOT_TIMEOUT = 3600
+
+# 프로세스 메모리에 보관할 최대 스냅샷 수 (임의의 쿼리 파라미터 조합으로 커지지 않도록)
+MEMO_MAX_ENTRIES = 256
+
+# 스냅샷 종류별 본문 생성 함수 이름
+METRICS = 'metrics'
+P95 = 'p95'
+
+_memo_lock = threading.Lock()
+_memo_generation: Optional[int] = None
+_memo: Dict[str, bytes] = {}
+
+
+def generation_for(collected_at) -> int:
+    """수집 시각을 세대 번호(에포크 밀리초)로 바꿉니다. 세대 시각이 수집 시각보다 앞서지 않도록 올림합니다."""
+    return math.ceil(collected_at.timestamp() * 1000)
+
+
+def generation_datetime(generation: int) -> datetime:
+    """세대 번호를 UTC datetime으로 바꿉니다 (Last-Modified, 히스토리 기준 시각)."""
+    return datetime.fromtimestamp(generation / 1000, tz=dt_timezone.utc)
+
+
+def generation_etag(generation: int) -> str:
+    """세대 번호로 만든 strong ETag (따옴표 포함)"""
+    return f'"g{generation}"'
+
+
+def current_generation() -> int:
+    """
+    현재 세대 번호를 반환합니다.
+
+    캐시에 없으면(캐시 초기화 등) DB의 마지막 수집 시각으로 다시 계산해서 저장합니다.
+
+    Returns:
+        에포크 밀리초 세대 번호 (수집된 데이터가 없으면 0)
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        latest = ModelMetric.objects.aggregate(latest=Max('collected_at'))['latest']
+        generation = generation_for(latest) if latest else 0
+        cache.add(GENERATION_KEY, generation, timeout=None)
+    return generation
+
+
+def get_snapshot(
+    kind: str,
+    metric_name: str,
+    time_range: str,
+    job: Optional[str],
+    generation: Optional[int] = None
+) -> bytes:
+    """
+    현재 세대의 스냅샷 본문을 반환합니다. 없으면 DB에서 만들어 저장합니다.
+
+    Args:
+        kind: METRICS 또는 P95
+        metric_name: 메트릭 이름
+        time_range: 시간 범위
+        job: Prometheus job (None이면 모든 job)
+        generation: 이미 조회한 세대 번호 (None이면 캐시에서 조회)
+
+    Returns:
+        JSON으로 인코딩된 응답 본문
+    """
+    if generation is None:
+        generation = current_generation()
+    key = _snapshot_key(kind, metric_name, time_range, job, generation)
+    return _cached_body(
+        key, generation, lambda: _BUILDERS[kind](_latest_metrics(metric_name, time_range, job))
+    )
+
+
+def get_changes(
+    kind: str,
+    metric_name: str,
+    time_range: str,
+    job: Optional[str],
+    since: int,
+    generation: Optional[int] = None
+) -> bytes:
+    """
+    since 세대 이후에 바뀐 모델만 담은 본문을 반환합니다 (api/changes.py).
+
+    폴링하는 클라이언트는 대부분 같은 since(직전 세대)로 요청하므로
+    스냅샷과 같은 방식으로 세대별로 저장해 둡니다.
+    since가 삭제 기록 보관 기간보다 오래됐거나 현재 세대보다 앞서면 전체 본문을 `full: true`로 보냅니다.
+
+    Args:
+        kind: METRICS 또는 P95
+        metric_name: 메트릭 이름
+        time_range: 시간 범위
+        job: Prometheus job (None이면 모든 job)
+        since: 클라이언트가 마지막으로 받은 세대 (응답의 `generation`)
+        generation: 이미 조회한 세대 번호 (None이면 캐시에서 조회)
+
+    Returns:
+        JSON으로 인코딩된 응답 본문 (스냅샷 본문 + `removed`, `since`, `generation`, `full`)
+    """
+    if generation is None:
+        generation = current_generation()
+
+    full = since > generation or since < generation_for(timezone.now() - tombstone_retention())
+    key = _snapshot_key(f'{kind}:since:{"full" if full else since}', metric_name, time_range, job, generation)
+
+    def build():
+        if full:
+            metrics, removed = _latest_metrics(metric_name, time_range, job), []
+        else:
+            metrics, removed = load_changes(metric_name, time_range, job, since)
+        payload = _BUILDERS[kind](metrics)
+        payload.pop('message', None)
+        payload.setdefault('last_updated', generation_datetime(generation).isoformat())
+        payload.update({
+            'removed': removed,
+            'since': since,
+            'generation': generation,
+            'full': full,
+        })
+        return payload
+
+    return _cached_body(key, generation, build)
+
+
+def _cached_body(key: str, generation: int, build: Callable[[], Dict]) -> bytes:
+    """프로세스 메모리 → 캐시 백엔드 → build() 순서로 본문을 찾고, 만든 본문은 양쪽에 저장합니다."""
+    global _memo_generation
+
+    with _memo_lock:
+        if _memo_generation != generation:
+            _memo.clear()
+            _memo_generation = generation
+        body = _memo.get(key)
+    if body is not None:
+        return body
+
+    body = cache.get(key)
+    if body is None:
+        body = _encode(build())
+        cache.set(key, body, timeout=SNAPSHOT_TIMEOUT)
+
+    with _memo_lock:
+        if _memo_generation == generation and len(_memo) < MEMO_MAX_ENTRIES:
+            _memo[key] = body
+    return body
+
+
+def publish_snapshots(targets: List[Dict], collected_at) -> int:
+    """
+    수집 직후 새 세대의 스냅샷을 만들고 세대 번호를 올립니다.
+
+    스냅샷을 먼저 저장한 뒤 세대를 바꾸므로, 뷰가 새 세대를 보는 시점에는
+    수집한 조합의 스냅샷이 이미 준비되어 있습니다.
+
+    Args:
+        targets: 이번에 수집한 `metric_name`, `time_range`, `job` 조합
+        collected_at: 수집 시각
+
+    Returns:
+        새 세대 번호
+    """
+    generation = generation_for(collected_at)
+
+    snapshots = {}
+    for metric_name, time_range in {(t['metric_name'], t['time_range']) for t in targets}:
+        # (메트릭, 시간 범위)마다 한 번만 조회하고 job별 스냅샷은 메모리에서 나눔
+        metrics = _latest_metrics(metric_name, time_range, None)
+        jobs = {t['job'] for t in targets
+                if (t['metric_name'], t['time_range']) == (metric_name, time_range)}
+        for job in [None] + sorted(job for job in jobs if job):
+            selected = metrics if job is None else [m for m in metrics if m.job == job]
+            for kind, builder in _BUILDERS.items():
+                key = _snapshot_key(kind, metric_name, time_range, job, generation)
+                snapshots[key] = _encode(builder(selected))
+
+    cache.set_many(snapshots, timeout=SNAPSHOT_TIMEOUT)
+    cache.set(GENERATION_KEY, generation, timeout=None)
+
+    logger.info(f'Published {len(snapshots)} snapshots for generation {generation}')
+    return generation
+
+
+def bump_generation() -> int:
+    """
+    수집 외의 경로(백필 등)로 데이터가 바뀌었을 때 세대를 현재 시각으로 올립니다.
+
+    이전 세대의 스냅샷과 ETag가 모두 무효가 되고, 스냅샷은 다음 요청 때 다시 만들어집니다.
+
+    Returns:
+        새 세대 번호
+    """
+    generation = max(int(time.time() * 1000), current_generation() + 1)
+    cache.set(GENERATION_KEY, generation, timeout=None)
+    return generation
+
+
+def build_metrics_payload(metrics: List[ModelMetric]) -> Dict:
+    """
+    /api/metrics/ 응답 본문을 만듭니다.
+
+    Args:
+        metrics: 모델 이름 순으로 정렬된 ModelMetric 리스트
+
+    Returns:
+        모델별 P50/P95/P99를 P95 내림차순으로 담은 딕셔너리
+    """
+    if not metrics:
+        return {
+            'status': 'success',
+            'message': 'No metrics found. Run "python3 manage.py collect_metrics" to collect data.',
+            'data': [],
+            'count': 0
+        }
+
+    formatted_data = [
+        {
+            'model': metric.model_name,
+            'p50_latency_ms': metric.p50_latency_ms,
+            'p95_latency_ms': metric.p95_latency_ms,
+            'p99_latency_ms': metric.p99_latency_ms,
+            'collected_at': metric.collected_at.isoformat(),
+            'metric_name': metric.metric_name,
+            'time_range': metric.time_range,
+            'job': metric.job
+        }
+        for metric in metrics
+    ]
+
+    # P95 기준으로 정렬 (내림차순)
+    formatted_data.sort(key=lambda x: x.get('p95_latency_ms', 0) or 0, reverse=True)
+
+    return {
+        'status': 'success',
+        'data': formatted_data,
+        'count': len(formatted_data),
+        'last_updated': metrics[0].collected_at.isoformat()
+    }
+
+
+def build_p95_payload(metrics: List[ModelMetric]) -> Dict:
+    """
+    /api/metrics/p95/ 응답 본문을 만듭니다 (status.js용 간소화 형식).
+
+    Args:
+        metrics: 모델 이름 순으로 정렬된 ModelMetric 리스트
+
+    Returns:
+        모델별 P95를 내림차순으로 담은 딕셔너리
+    """
+    if not metrics:
+        return {
+            'status': 'success',
+            'data': [],
+            'count': 0,
+            'message': 'No data available. Waiting for metric collection.'
+        }
+
+    formatted_data = [
+        {
+            'model': metric.model_name,
+            'p95_latency_ms': round(metric.p95_latency_ms, 2) if metric.p95_latency_ms else None,
+            'collected_at': metric.collected_at.isoformat()
+        }
+        for metric in metrics
+    ]
+
+    # P95 기준으로 정렬
+    formatted_data.sort(key=lambda x: x.get('p95_latency_ms', 0) or 0, reverse=True)
+
+    return {
+        'status': 'success',
+        'data': formatted_data,
+        'count': len(formatted_data),
+        'last_updated': metrics[0].collected_at.isoformat()
+    }
+
+
+def _latest_metrics(metric_name: str, time_range: str, job: Optional[str]) -> List[ModelMetric]:
+    """조건에 맞는 ModelMetric을 모델 이름 순으로 한 번의 쿼리로 가져옵니다."""
+    metrics = ModelMetric.objects.filter(
+        metric_name=metric_name or DEFAULT_METRIC_NAME,
+        time_range=time_range or DEFAULT_TIME_RANGE
+    ).order_by('model_name')
+
+    if job:
+        metrics = metrics.filter(job=job)
+
+    return list(metrics)
+
+
+def _snapshot_key(kind: str, metric_name: str, time_range: str, job: Optional[str], generation: int) -> str:
+    return f'springboard:snapshot:{kind}:{generation}:{metric_name}:{time_range}:{job or "*"}'
+
+
+def _encode(payload: Dict) -> bytes:
+    # DRF JSONRenderer 기본 설정과 같은 형식 (UNICODE_JSON, COMPACT_JSON)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+_BUILDERS = {
+    METRICS: build_metrics_payload,
+    P95: build_p95_payload,
+}
@@ -25,3 +25,19 @@ def collect_metrics_task():
     except Exception as e:
         logger.error(f"Metrics collection task failed: {str(e)}", exc_info=True)
         raise
+
+
+@shared_task
+def compact_metrics_task():
+    """
+    보관 기간이 지난 메트릭 히스토리를 정리하는 Celery task
+    매일 새벽 자동 실행됨
+    """
+    try:
+        logger.info("Starting metrics compaction task...")
+        call_command('compact_metrics')
+        logger.info("Metrics compaction task completed successfully")
+        return "Metrics compacted successfully"
+    except Exception as e:
+        logger.error(f"Metrics compaction task failed: {str(e)}", exc_info=True)
+        raise
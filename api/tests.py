@@ -1,3 +1,1778 @@
-from django.test import TestCase
+import io
+import json
+import math
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+import numpy as np
+import requests
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from prometheus_client import REGISTRY
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+
+from api.blockstore import day_start, decode_block, encode_block, pack_history_day
+from api.collector import MetricsCollector, parse_model_stats, save_collections
+from api.compaction import expire_hourly_rollups, expire_raw_history
+from api.config import get_collection_targets, get_prometheus_url, load_config, resolve_targets
+from api.downsampling import bucket_seconds_for, minmax_downsample
+from api.instrumentation import COLLECTOR_REGISTRY, observe_prometheus_query
+from api.ledger import QueryCounter
+from api.renderers import parse_fields, select_fields
+from api.management.commands import run_collector
+from api.models import (
+    CollectorRun, ModelMetric, ModelMetricBlock, ModelMetricHistory, ModelMetricRollup, ModelMetricTombstone,
+    SlaState, SloState,
+)
+from api.rollups import bucket_start, rebuild_rollups
+from api.sla import SlaEngine, WebhookDispatcher
+from api.slo import SloTracker, summarize
+from api.snapshots import generation_etag, generation_for, publish_snapshots
+from histogram_quantile import histogram_quantiles_from_vector
+from matrix_stream import iter_matrix_series, matrix_series_from_result
+from query_p95_metrics import PrometheusP95Query
+from range_cache import RangeChunkCache
+
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+def _vector(values, model_label='model'):
+    """query_multiple_percentiles() 형식의 백분위수별 응답 (값은 초 단위 문자열)"""
+    return {
+        percentile: {
+            'status': 'success',
+            'data': {
+                'result': [
+                    {'metric': {model_label: model_name}, 'value': [1760679000.0, value]}
+                    for model_name, value in by_model.items()
+                ]
+            },
+        }
+        for percentile, by_model in values.items()
+    }
+
+
+def _collection(model_stats, metric_name='request_duration_seconds', time_range='5m', job='api'):
+    return {
+        'target': {'metric_name': metric_name, 'model_label': 'model', 'time_range': time_range, 'job': job},
+        'model_stats': model_stats,
+        'succeeded': True,
+    }
+
+
+class CollectionConfigTests(SimpleTestCase):
+    """config.yaml 로딩과 수집 조합 펼치기 (api/config.py)"""
+
+    config = {
+        'prometheus': {'url': 'http://prom:9090'},
+        'metrics': {'tracked_metrics': [
+            {'name': 'request_duration_seconds', 'time_ranges': ['5m', '1h']},
+            {'name': 'api_latency_seconds', 'model_label': 'model_name', 'jobs': ['api', 'batch']},
+        ]},
+        'query': {'time_ranges': ['5m'], 'jobs': ['api']},
+    }
+
+    def _keys(self, targets):
+        return [(t['metric_name'], t['model_label'], t['time_range'], t['job']) for t in targets]
+
+    def test_targets_expand_per_metric_with_query_defaults(self):
+        self.assertEqual(self._keys(get_collection_targets(self.config)), [
+            ('request_duration_seconds', 'model', '5m', 'api'),
+            ('request_duration_seconds', 'model', '1h', 'api'),
+            ('api_latency_seconds', 'model_name', '5m', 'api'),
+            ('api_latency_seconds', 'model_name', '5m', 'batch'),
+        ])
+
+    def test_empty_config_collects_default_metric(self):
+        self.assertEqual(self._keys(get_collection_targets({})), [('request_duration_seconds', 'model', '5m', 'api')])
+        self.assertEqual(self._keys(resolve_targets({})), [('request_duration_seconds', 'model', '5m', 'api')])
+
+    def test_overrides_do_not_duplicate_targets(self):
+        targets = resolve_targets(self.config, time_range='15m', job='api')
+
+        self.assertEqual(self._keys(targets), [
+            ('request_duration_seconds', 'model', '15m', 'api'),
+            ('api_latency_seconds', 'model_name', '15m', 'api'),
+        ])
+
+    def test_metric_name_option_ignores_config(self):
+        targets = resolve_targets(self.config, metric_name='inference_time_seconds', job='batch')
+
+        self.assertEqual(self._keys(targets), [('inference_time_seconds', 'model', '5m', 'batch')])
+
+    def test_tracked_metric_without_name_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, r'tracked_metrics\[1\]'):
+            get_collection_targets({'metrics': {'tracked_metrics': [{'name': 'a'}, {'model_label': 'model'}]}})
+
+    def test_load_config_reads_yaml_or_returns_empty(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/config.yaml'
+            self.assertEqual(load_config(path), {})
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('prometheus:\n  url: "http://prom:9090"\n')
+            self.assertEqual(load_config(path), {'prometheus': {'url': 'http://prom:9090'}})
+
+    @override_settings(PROMETHEUS_URL='http://settings:9090')
+    def test_prometheus_url_precedence(self):
+        self.assertEqual(get_prometheus_url(self.config, 'http://cli:9090'), 'http://cli:9090')
+        self.assertEqual(get_prometheus_url(self.config), 'http://prom:9090')
+        self.assertEqual(get_prometheus_url({}), 'http://settings:9090')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SaveCollectionsTests(TestCase):
+    """수집 결과 일괄 저장 (ModelMetric upsert, 히스토리 기록)"""
+
+    collected_at = datetime(2025, 10, 17, 5, 30, tzinfo=dt_timezone.utc)
+
+    def test_upsert_updates_existing_rows(self):
+        first = [_collection({'gpt-4': {'p50': 100.0, 'p95': 200.0, 'p99': 300.0}})]
+        save_collections(first, self.collected_at)
+        self.assertEqual(first[0]['created'], {'gpt-4'})
+
+        second = [_collection({
+            'gpt-4': {'p50': 110.0, 'p95': 220.0, 'p99': 330.0},
+            'claude-2': {'p50': 50.0, 'p95': 90.0, 'p99': 120.0},
+        })]
+        written = save_collections(second, self.collected_at.replace(minute=35))
+
+        self.assertEqual(second[0]['created'], {'claude-2'})
+        self.assertEqual(written['model_metric'], 2)
+        self.assertEqual(ModelMetric.objects.count(), 2)
+        self.assertEqual(ModelMetric.objects.get(model_name='gpt-4').p95_latency_ms, 220.0)
+        self.assertEqual(ModelMetricHistory.objects.filter(model_name='gpt-4').count(), 2)
+
+    def test_upsert_keeps_targets_separate(self):
+        save_collections([
+            _collection({'gpt-4': {'p95': 200.0}}, time_range='5m'),
+            _collection({'gpt-4': {'p95': 250.0}}, time_range='1h'),
+        ], self.collected_at)
+
+        self.assertEqual(
+            dict(ModelMetric.objects.values_list('time_range', 'p95_latency_ms')),
+            {'5m': 200.0, '1h': 250.0},
+        )
+
+    def test_nan_quantile_is_stored_as_null_without_history(self):
+        # 요청이 없는 모델은 버킷 rate가 모두 0이라 Prometheus/로컬 계산 모두 NaN
+        model_stats = parse_model_stats(_vector({
+            0.5: {'gpt-4': '0.1', 'idle': 'NaN'},
+            0.95: {'gpt-4': '0.2', 'idle': 'NaN'},
+            0.99: {'gpt-4': '+Inf', 'idle': 'NaN'},
+        }), 'model')
+
+        self.assertIsNone(model_stats['idle']['p95'])
+        self.assertIsNone(model_stats['gpt-4']['p99'])
+        self.assertEqual(model_stats['gpt-4']['p95'], 200.0)
+
+        collections = [_collection(model_stats)]
+        written = save_collections(collections, self.collected_at)
+
+        self.assertEqual(written['model_metric'], 2)
+        self.assertEqual(written['model_metric_history'], 1)
+        self.assertIsNone(ModelMetric.objects.get(model_name='idle').p95_latency_ms)
+        self.assertFalse(ModelMetricHistory.objects.filter(model_name='idle').exists())
+
+    def test_missing_model_is_pruned_from_complete_collection(self):
+        save_collections([_collection({'gpt-4': {'p95': 200.0}, 'claude-2': {'p95': 90.0}})], self.collected_at)
+
+        written = save_collections([_collection({'gpt-4': {'p95': 210.0}})], self.collected_at.replace(minute=35))
+
+        self.assertEqual(written['model_metric_tombstone'], 1)
+        self.assertEqual(list(ModelMetric.objects.values_list('model_name', flat=True)), ['gpt-4'])
+
+    def test_failed_or_partial_target_keeps_rows(self):
+        save_collections([
+            _collection({'gpt-4': {'p95': 200.0}, 'claude-2': {'p95': 90.0}}, time_range='5m'),
+            _collection({'gpt-4': {'p95': 250.0}, 'claude-2': {'p95': 95.0}}, time_range='1h'),
+        ], self.collected_at)
+
+        failed = _collection({}, time_range='5m')
+        failed['succeeded'] = failed['complete'] = False
+        # 일부 백분위수/샤드만 실패해서 claude-2가 빠진 결과
+        partial = _collection({'gpt-4': {'p95': 260.0}}, time_range='1h')
+        partial['complete'] = False
+        written = save_collections([failed, partial], self.collected_at.replace(minute=35))
+
+        self.assertEqual(written['model_metric_tombstone'], 0)
+        self.assertEqual(ModelMetric.objects.count(), 4)
+        self.assertEqual(ModelMetric.objects.get(model_name='gpt-4', time_range='1h').p95_latency_ms, 260.0)
+
+
+class MetricsStreamTests(TestCase):
+    """실시간 스트림 (/api/metrics/stream/)"""
+
+    def test_wsgi_request_is_rejected(self):
+        # WSGI는 끝나지 않는 비동기 스트림을 보내지 못하므로 503으로 거절해 폴링으로 전환시킴
+        response = self.client.get('/api/metrics/stream/')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Cache-Control'], 'no-store')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HistoryBatchTests(TestCase):
+    """배치 히스토리 조회 (/api/metrics/history/batch/)"""
+
+    def test_non_string_filter_is_rejected_with_query_index(self):
+        response = self.client.post(
+            '/api/metrics/history/batch/',
+            {'queries': [{'model_name': 'gpt-4'}, {'model_name': ['gpt-4']}]},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'queries[1]: model_name must be a string')
+
+    def test_valid_batch_returns_result_per_query(self):
+        save_collections(
+            [_collection({'gpt-4': {'p95': 200.0}, 'claude-2': {'p95': 90.0}})],
+            datetime.now(dt_timezone.utc),
+        )
+
+        response = self.client.post(
+            '/api/metrics/history/batch/',
+            {'queries': [{'id': 'a', 'model_name': 'gpt-4'}, {'id': 'b'}]},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['id'] for result in results], ['a', 'b'])
+        self.assertEqual([item['model'] for item in results[0]['data']], ['gpt-4'])
+        self.assertEqual(results[1]['count'], 2)
+
+
+class FieldSelectionTests(SimpleTestCase):
+    """fields= 파라미터 해석과 행 키 줄이기 (api/renderers.py)"""
+
+    def test_parse_fields_ignores_blanks(self):
+        self.assertEqual(parse_fields(' p95_latency_ms, ,job '), {'p95_latency_ms', 'job'})
+        self.assertIsNone(parse_fields(''))
+        self.assertIsNone(parse_fields(' , '))
+
+    def test_rows_keep_model_and_selected_keys(self):
+        payload = {'status': 'success', 'count': 1, 'data': [{'model': 'gpt-4', 'p95_latency_ms': 1.0, 'job': 'api'}]}
+
+        trimmed = select_fields(payload, {'p95_latency_ms'})
+
+        self.assertEqual(trimmed['data'], [{'model': 'gpt-4', 'p95_latency_ms': 1.0}])
+        self.assertEqual(trimmed['count'], 1)
+        self.assertIn('job', payload['data'][0])
+
+    def test_history_points_are_trimmed_inside_items(self):
+        payload = {'data': [{'model': 'gpt-4', 'data_points': [{'timestamp': 't', 'p95_latency_ms': 1.0}]}]}
+
+        trimmed = select_fields(payload, {'p95_latency_ms'})
+
+        self.assertEqual(trimmed['data'], [{'model': 'gpt-4', 'data_points': [{'p95_latency_ms': 1.0}]}])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResponseFormatTests(TestCase):
+    """Accept 헤더에 따른 JSON/MessagePack 응답과 fields= (/api/metrics/, /api/metrics/history/)"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        memo = mock.patch.dict('api.snapshots._memo', clear=True)
+        memo.start()
+        self.addCleanup(memo.stop)
+        collected_at = datetime.now(dt_timezone.utc).replace(microsecond=0)
+        save_collections(
+            [_collection({'gpt-4': {'p50': 120.0, 'p95': 200.0, 'p99': 310.0}, 'claude-3': {'p95': 90.0}})],
+            collected_at,
+        )
+        publish_snapshots(
+            [{'metric_name': 'request_duration_seconds', 'time_range': '5m', 'job': 'api'}], collected_at
+        )
+
+    def test_json_is_default(self):
+        response = self.client.get('/api/metrics/')
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual([row['model'] for row in response.json()['data']], ['gpt-4', 'claude-3'])
+
+    def test_msgpack_body_matches_json(self):
+        for url in ('/api/metrics/', '/api/metrics/p95/', '/api/metrics/history/?hours=1'):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'application/msgpack')
+                self.assertEqual(msgpack.unpackb(response.content), self.client.get(url).json())
+
+    def test_unsupported_accept_is_rejected(self):
+        response = self.client.get('/api/metrics/', HTTP_ACCEPT='text/csv')
+
+        self.assertEqual(response.status_code, 406)
+
+    def test_fields_trims_snapshot_rows(self):
+        for accept in ('application/json', 'application/msgpack'):
+            with self.subTest(accept=accept):
+                response = self.client.get('/api/metrics/', {'fields': 'p95_latency_ms'}, HTTP_ACCEPT=accept)
+
+                body = msgpack.unpackb(response.content) if accept == 'application/msgpack' else response.json()
+                self.assertEqual(
+                    body['data'],
+                    [{'model': 'gpt-4', 'p95_latency_ms': 200.0}, {'model': 'claude-3', 'p95_latency_ms': 90.0}],
+                )
+
+    def test_fields_trims_history_points(self):
+        body = self.client.get('/api/metrics/history/', {'hours': 1, 'fields': 'p95_latency_ms'}).json()
+
+        self.assertEqual(
+            sorted((item['model'], item['data_points']) for item in body['data']),
+            [('claude-3', [{'p95_latency_ms': 90.0}]), ('gpt-4', [{'p95_latency_ms': 200.0}])],
+        )
+
+
+class DownsamplingTests(SimpleTestCase):
+    """min/max 버킷 다운샘플링 (api/downsampling.py)"""
+
+    def test_keeps_min_and_max_of_every_bucket(self):
+        rng = np.random.default_rng(7)
+        timestamps = np.sort(rng.uniform(0, 3600, 500))
+        values = rng.uniform(100, 200, 500)
+        values[123] = 5000.0  # 스파이크
+
+        keep = minmax_downsample(timestamps, values, 0, 3600, 300)
+
+        expected = set()
+        buckets = np.minimum((timestamps // 300).astype(int), 11)
+        for bucket in np.unique(buckets):
+            indexes = np.flatnonzero(buckets == bucket)
+            expected.update((int(indexes[np.argmin(values[indexes])]), int(indexes[np.argmax(values[indexes])])))
+        self.assertEqual(keep.tolist(), sorted(expected))
+        self.assertIn(123, keep.tolist())
+        self.assertLessEqual(len(keep), 2 * 12)
+
+    def test_point_at_window_end_falls_in_last_bucket(self):
+        keep = minmax_downsample(np.array([0.0, 3599.0, 3600.0]), np.array([1.0, 2.0, 3.0]), 0, 3600, 1800)
+
+        # 3600초 포인트는 새 버킷이 아니라 마지막 버킷(1800~3600)에 들어가 그 버킷의 최솟값 3599초와 함께 남음
+        self.assertEqual(keep.tolist(), [0, 1, 2])
+        self.assertEqual(minmax_downsample(np.array([]), np.array([]), 0, 3600, 60).tolist(), [])
+
+    def test_bucket_width(self):
+        self.assertIsNone(bucket_seconds_for(3600, None, None))
+        self.assertEqual(bucket_seconds_for(3600, 120, None), 60.0)
+        self.assertEqual(bucket_seconds_for(3600, None, 300), 300.0)
+        # 둘 다 지정하면 더 넓은 쪽 (max_points를 넘지 않으면서 resolution 이상)
+        self.assertEqual(bucket_seconds_for(3600, 120, 300), 300.0)
+        self.assertEqual(bucket_seconds_for(86400, 120, 300), 1440.0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HistoryDownsamplingTests(TestCase):
+    """히스토리 API의 max_points/resolution"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.collected_at = datetime.now(dt_timezone.utc).replace(second=0, microsecond=0)
+        for minute in range(60):
+            p95 = 900.0 if minute == 17 else 100.0 + minute
+            save_collections(
+                [_collection({'gpt-4': {'p95': p95}})], self.collected_at - timedelta(minutes=59 - minute)
+            )
+
+    def test_max_points_bounds_points_and_keeps_spike(self):
+        body = self.client.get('/api/metrics/history/', {'hours': 1, 'max_points': 10}).json()
+
+        values = [point['p95_latency_ms'] for point in body['data'][0]['data_points']]
+        self.assertLessEqual(len(values), 10)
+        self.assertIn(900.0, values)
+        self.assertEqual(
+            body['downsampling'], {'method': 'minmax', 'bucket_seconds': 720.0, 'max_points': 10, 'source': 'raw'}
+        )
+
+    def test_without_parameters_returns_all_points(self):
+        body = self.client.get('/api/metrics/history/', {'hours': 1}).json()
+
+        self.assertEqual(len(body['data'][0]['data_points']), 60)
+        self.assertNotIn('downsampling', body)
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'max_points': 1}, {'max_points': 'many'}, {'resolution': '0m'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/metrics/history/', params).status_code, 400)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HistoryColumnarTests(TestCase):
+    """히스토리 열 형식 응답 (format=columnar)"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.collected_at = datetime.now(dt_timezone.utc).replace(second=0, microsecond=0)
+        for minute in range(30):
+            p95 = 900.0 if minute == 11 else 100.0 + minute + 0.123
+            save_collections(
+                [_collection({'gpt-4': {'p95': p95}, 'claude-3': {'p95': p95 / 2}})],
+                self.collected_at - timedelta(minutes=29 - minute),
+            )
+
+    def _history(self, **params):
+        response = self.client.get('/api/metrics/history/', {'hours': 1, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _series(self, body, model):
+        return next(item for item in body['data'] if item['model'] == model)
+
+    def _as_columns(self, item):
+        points = item['data_points']
+        return {
+            'model': item['model'],
+            'timestamps': [int(datetime.fromisoformat(point['timestamp']).timestamp() * 1000) for point in points],
+            'p95_latency_ms': [point['p95_latency_ms'] for point in points],
+        }
+
+    def test_columnar_matches_rows(self):
+        rows = self._history()
+        columnar = self._history(format='columnar')
+
+        self.assertEqual(columnar['format'], 'columnar')
+        self.assertNotIn('format', rows)
+        self.assertEqual(columnar['data'], [self._as_columns(item) for item in rows['data']])
+        self.assertEqual(columnar['time_range'], rows['time_range'])
+        gpt4 = self._series(columnar, 'gpt-4')
+        self.assertEqual(len(gpt4['timestamps']), 30)
+        self.assertEqual(gpt4['timestamps'][-1], int(self.collected_at.timestamp() * 1000))
+        self.assertEqual(gpt4['p95_latency_ms'][-1], 129.12)
+
+    def test_columnar_downsampling_keeps_same_points(self):
+        rows = self._history(max_points=6)
+        columnar = self._history(format='columnar', max_points=6)
+
+        self.assertEqual(columnar['data'], [self._as_columns(item) for item in rows['data']])
+        self.assertEqual(columnar['downsampling'], rows['downsampling'])
+        self.assertIn(900.0, self._series(columnar, 'gpt-4')['p95_latency_ms'])
+
+    def test_batch_columnar(self):
+        response = self.client.post(
+            '/api/metrics/history/batch/',
+            {'queries': [{'id': 'a', 'model_name': 'gpt-4', 'hours': 1}], 'format': 'columnar'},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()['results'][0]
+        self.assertEqual(result['format'], 'columnar')
+        self.assertEqual(result['data'], self._history(format='columnar', model_name='gpt-4')['data'])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/metrics/history/', {'format': 'csv'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'format must be one of: rows, columnar')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RollupTests(TestCase):
+    """시간/일 롤업의 증분 갱신과 재구성 (api/rollups.py)"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.now = datetime.now(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+        rng = np.random.default_rng(15)
+        # 3일에 걸쳐 30분 간격 - 같은 값(100.0)이 여러 번 나오면 이른 시각을 최솟값/최댓값 시각으로 씀
+        for step in range(144):
+            collected_at = self.now - timedelta(days=3) + timedelta(minutes=30 * step)
+            p95 = 100.0 if step % 10 == 0 else round(float(rng.uniform(50, 500)), 2)
+            save_collections([_collection({'gpt-4': {'p95': p95}, 'claude-2': {'p95': p95 / 2}})], collected_at)
+
+    def _expected(self):
+        expected = {}
+        rows = ModelMetricHistory.objects.order_by('timestamp').values_list('model_name', 'timestamp', 'p95_latency_ms')
+        for model_name, timestamp, value in rows:
+            for resolution, seconds in (('1h', 3600), ('1d', 86400)):
+                key = (resolution, model_name, bucket_start(timestamp, seconds))
+                stats = expected.setdefault(key, {
+                    'sample_count': 0, 'p95_sum': 0.0,
+                    'p95_min': (value, timestamp), 'p95_max': (value, timestamp),
+                })
+                stats['sample_count'] += 1
+                stats['p95_sum'] += value
+                if value < stats['p95_min'][0]:
+                    stats['p95_min'] = (value, timestamp)
+                if value > stats['p95_max'][0]:
+                    stats['p95_max'] = (value, timestamp)
+                stats['p95_last'] = (value, timestamp)
+        return expected
+
+    def _actual(self):
+        return {
+            (row.resolution, row.model_name, row.bucket_start): {
+                'sample_count': row.sample_count,
+                'p95_sum': row.p95_sum,
+                'p95_min': (row.p95_min, row.p95_min_at),
+                'p95_max': (row.p95_max, row.p95_max_at),
+                'p95_last': (row.p95_last, row.p95_last_at),
+            }
+            for row in ModelMetricRollup.objects.all()
+        }
+
+    def assertRollupsMatchHistory(self):
+        expected, actual = self._expected(), self._actual()
+        self.assertEqual(actual.keys(), expected.keys())
+        for key, stats in expected.items():
+            self.assertAlmostEqual(actual[key].pop('p95_sum'), stats.pop('p95_sum'), places=6)
+            self.assertEqual(actual[key], stats, key)
+
+    def test_incremental_rollups_match_history(self):
+        self.assertRollupsMatchHistory()
+
+    def test_rebuild_matches_incremental(self):
+        incremental = self._actual()
+        ModelMetricRollup.objects.update(sample_count=0)
+
+        rebuild_rollups()
+
+        self.assertRollupsMatchHistory()
+        self.assertEqual(self._actual().keys(), incremental.keys())
+
+    def test_hourly_resolution_reads_rollups_within_window(self):
+        body = self.client.get(
+            '/api/metrics/history/', {'hours': 48, 'resolution': '1h', 'model_name': 'gpt-4'}
+        ).json()
+
+        self.assertEqual(body['downsampling']['source'], '1h')
+        start = datetime.fromisoformat(body['time_range']['start'])
+        end = datetime.fromisoformat(body['time_range']['end'])
+        points = [
+            (datetime.fromisoformat(point['timestamp']), point['p95_latency_ms'])
+            for point in body['data'][0]['data_points']
+        ]
+        self.assertTrue(all(start <= timestamp <= end for timestamp, _ in points))
+        window = ModelMetricHistory.objects.filter(model_name='gpt-4', timestamp__gte=start, timestamp__lte=end)
+        values = [value for _, value in points]
+        self.assertEqual(max(values), max(window.values_list('p95_latency_ms', flat=True)))
+        self.assertEqual(min(values), min(window.values_list('p95_latency_ms', flat=True)))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CompactionTests(TestCase):
+    """보관 기간이 지난 원본/1시간 롤업 정리 (api/compaction.py)"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.now = datetime(2025, 10, 17, 5, 30, tzinfo=dt_timezone.utc)
+        self.today = datetime(2025, 10, 17, tzinfo=dt_timezone.utc)
+        # 오늘 포함 5일, 하루 6포인트
+        for day in range(5):
+            for hour in range(0, 24, 4):
+                collected_at = self.today - timedelta(days=day) + timedelta(hours=hour, minutes=10)
+                save_collections([_collection({'gpt-4': {'p95': 100.0 + day * 10 + hour}})], collected_at)
+
+    def _days(self, queryset, field='timestamp'):
+        return sorted({value.date() for value in queryset.values_list(field, flat=True)})
+
+    def test_raw_history_before_cutoff_day_is_deleted(self):
+        deleted = expire_raw_history(self.now, timedelta(days=2), timedelta(hours=1))
+
+        # 기준 시각(2일 전 05:30)은 일 경계로 내려 10/15 00:00부터 남김
+        self.assertEqual(deleted, 2 * 6)
+        self.assertEqual(self._days(ModelMetricHistory.objects)[0], datetime(2025, 10, 15).date())
+        self.assertEqual(ModelMetricBlock.objects.count(), 2)
+        # 1일 롤업은 그대로이므로 지운 날의 일 평균도 남아 있음
+        daily = ModelMetricRollup.objects.filter(resolution='1d')
+        self.assertEqual(daily.count(), 5)
+        self.assertTrue(all(count == 6 for count in daily.values_list('sample_count', flat=True)))
+
+    def test_missing_rollups_are_filled_before_delete(self):
+        expired_day = self.today - timedelta(days=4)
+        ModelMetricRollup.objects.filter(bucket_start__gte=expired_day, bucket_start__lt=expired_day + timedelta(days=1)).delete()
+
+        expire_raw_history(self.now, timedelta(days=2), timedelta(hours=1))
+
+        rollup = ModelMetricRollup.objects.get(resolution='1d', bucket_start=expired_day)
+        self.assertEqual((rollup.sample_count, rollup.p95_min, rollup.p95_max), (6, 140.0, 160.0))
+        self.assertEqual(
+            ModelMetricRollup.objects.filter(resolution='1h', bucket_start__gte=expired_day,
+                                             bucket_start__lt=expired_day + timedelta(days=1)).count(),
+            6,
+        )
+
+    def test_dry_run_counts_without_deleting(self):
+        total = ModelMetricHistory.objects.count()
+
+        counted = expire_raw_history(self.now, timedelta(days=2), timedelta(hours=1), dry_run=True)
+
+        self.assertEqual(counted, 12)
+        self.assertEqual(ModelMetricHistory.objects.count(), total)
+        self.assertFalse(ModelMetricBlock.objects.exists())
+
+    def test_hourly_rollups_expire_and_daily_rollups_stay(self):
+        deleted = expire_hourly_rollups(self.now, timedelta(days=3))
+
+        self.assertEqual(deleted, 6)
+        hourly = ModelMetricRollup.objects.filter(resolution='1h')
+        self.assertEqual(self._days(hourly, 'bucket_start')[0], datetime(2025, 10, 14).date())
+        self.assertEqual(ModelMetricRollup.objects.filter(resolution='1d').count(), 5)
+
+    def test_hourly_retention_shorter_than_raw_is_rejected(self):
+        with self.assertRaisesMessage(CommandError, '원본 보관 기간보다 짧을 수 없습니다'):
+            call_command('compact_metrics', '--raw-retention', '30d', '--hourly-retention', '7d', stdout=io.StringIO())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HistoryHoursTests(TestCase):
+    """히스토리 조회 구간(hours) 검증"""
+
+    def test_out_of_range_hours_is_rejected(self):
+        for url in ('/api/metrics/history/', '/api/metrics/history/export/'):
+            for hours in ('0', '-5', '100000000', 'abc'):
+                with self.subTest(url=url, hours=hours):
+                    response = self.client.get(url, {'hours': hours})
+                    self.assertEqual(response.status_code, 400)
+
+    def test_batch_out_of_range_hours_is_rejected(self):
+        response = self.client.post(
+            '/api/metrics/history/batch/',
+            {'queries': [{'hours': 24}, {'hours': 100000000}]},
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['message'].startswith('queries[1]: hours must be'))
+
+    def test_max_hours_is_accepted(self):
+        response = self.client.get('/api/metrics/history/export/', {'hours': 400 * 24})
+
+        self.assertEqual(response.status_code, 200)
+
+
+class BlockEncodingTests(SimpleTestCase):
+    """히스토리 블록 인코딩 왕복 (api/blockstore.py)"""
+
+    def test_round_trip_is_lossless(self):
+        cases = {
+            'empty': ([], []),
+            'single': ([1760679000000000], [123.45]),
+            'regular': (1760679000000000 + np.arange(288, dtype=np.int64) * 300_000_000, np.linspace(80.0, 420.0, 288)),
+            'irregular': ([0, 1, 7, 7_000_000, 7_000_003], [0.0, -0.0, 1e-300, 1e300, 0.1]),
+            'non_finite': ([10, 20, 30], [np.inf, -np.inf, 5.5]),
+        }
+        for name, (timestamps, values) in cases.items():
+            with self.subTest(name):
+                timestamps = np.asarray(timestamps, dtype=np.int64)
+                values = np.asarray(values, dtype=np.float64)
+
+                decoded_timestamps, decoded_values = decode_block(encode_block(timestamps, values))
+
+                np.testing.assert_array_equal(decoded_timestamps, timestamps)
+                # -0.0과 0.0까지 구분되도록 비트 단위로 비교
+                np.testing.assert_array_equal(decoded_values.view(np.uint64), values.view(np.uint64))
+
+    def test_corrupt_block_is_rejected(self):
+        data = encode_block(np.array([1, 2], dtype=np.int64), np.array([1.0, 2.0]))
+        with self.assertRaises(ValueError):
+            decode_block(zlib.compress(b'not a block'))
+        with self.assertRaises(ValueError):
+            decode_block(zlib.compress(zlib.decompress(data)[:-1]))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class BackfillCommandTests(TestCase):
+    """range 쿼리로 히스토리 채우기 (backfill_metrics)"""
+
+    start = datetime(2025, 10, 17, 0, 0, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.requests = []
+
+    def _fake_get(self, url, params=None, **kwargs):
+        # 요청한 스텝 간격으로 gpt-4 시리즈 하나를 돌려주는 range 응답
+        self.requests.append(dict(params))
+        timestamps = range(int(params['start']), int(params['end']) + 1, int(params['step']))
+        return _FakeResponse({'status': 'success', 'data': {'resultType': 'matrix', 'result': [
+            {'metric': {'model': 'gpt-4'}, 'values': [[ts, '0.25'] for ts in timestamps]},
+        ]}})
+
+    def _backfill(self, *args):
+        with mock.patch.object(requests.Session, 'get', side_effect=self._fake_get):
+            call_command(
+                'backfill_metrics',
+                '--from', self.start.isoformat(),
+                '--to', (self.start + timedelta(hours=1)).isoformat(),
+                '--config', '/nonexistent/config.yaml',
+                '--prometheus-url', 'http://prometheus:9090',
+                '--metric-name', 'request_duration_seconds',
+                *args,
+                stdout=io.StringIO(),
+            )
+
+    @override_settings(COLLECTOR_INTERVAL=300)
+    def test_step_defaults_to_collector_interval(self):
+        self._backfill()
+
+        self.assertEqual([params['step'] for params in self.requests], [300])
+        timestamps = list(
+            ModelMetricHistory.objects.order_by('timestamp').values_list('timestamp', flat=True)
+        )
+        self.assertEqual(timestamps, [self.start + timedelta(minutes=5 * i) for i in range(13)])
+        self.assertEqual(ModelMetricHistory.objects.filter(p95_latency_ms=250.0).count(), 13)
+
+    def test_explicit_step_and_rerun_skip_stored_points(self):
+        self._backfill('--step', '1m')
+        self._backfill('--step', '1m')
+
+        self.assertEqual([params['step'] for params in self.requests], [60, 60])
+        self.assertEqual(ModelMetricHistory.objects.count(), 61)
+
+
+@override_settings(COLLECTOR_METRICS_TEXTFILE=None, COLLECTOR_PUSHGATEWAY_URL=None)
+class RunCollectorTests(SimpleTestCase):
+    """상주 수집 데몬 (run_collector)"""
+
+    def _run(self, collect, *args):
+        command = run_collector.Command(stdout=io.StringIO())
+        collector = mock.Mock()
+        collector.collect.side_effect = lambda targets: collect(command, targets)
+        with mock.patch.object(run_collector, 'MetricsCollector', return_value=collector), \
+                mock.patch.object(run_collector, 'connection'), \
+                mock.patch.object(run_collector.signal, 'signal'):
+            call_command(
+                command,
+                '--interval', '0.05', '--jitter', '0',
+                '--config', '/nonexistent/config.yaml',
+                '--prometheus-url', 'http://prometheus:9090',
+                *args,
+            )
+        return collector, command.stdout.getvalue()
+
+    def test_ticks_are_aligned_to_interval_boundaries(self):
+        command = run_collector.Command()
+
+        self.assertEqual(command._next_boundary(1760679001.5, 300), 1760679300)
+        self.assertEqual(command._next_boundary(1760679300, 300), 1760679600)
+
+    def test_failed_collection_does_not_stop_daemon(self):
+        def collect(command, targets):
+            if len(calls) == 0:
+                calls.append(targets)
+                raise RuntimeError('prometheus down')
+            calls.append(targets)
+            command._stop.set()
+            return [{'target': targets[0], 'model_stats': {'gpt-4': {}}, 'succeeded': True}]
+
+        calls = []
+        collector, output = self._run(collect)
+
+        self.assertEqual(len(calls), 2)
+        self.assertIn('prometheus down', output)
+        self.assertIn('1개 모델 수집', output)
+        self.assertIn('수집기 종료', output)
+
+    def test_overrun_skips_missed_ticks(self):
+        def collect(command, targets):
+            time.sleep(0.12)
+            command._stop.set()
+            return []
+
+        collector, output = self._run(collect)
+
+        self.assertEqual(collector.collect.call_count, 1)
+        self.assertIn('틱을 건너뜁니다', output)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HistoryExportTests(TestCase):
+    """히스토리 내보내기 (/api/metrics/history/export/)"""
+
+    def test_export_includes_packed_days(self):
+        now = datetime.now(dt_timezone.utc).replace(microsecond=0)
+        packed_day = day_start(now - timedelta(days=2))
+        packed_at = [packed_day + timedelta(hours=1), packed_day + timedelta(hours=2)]
+        save_collections([_collection({'gpt-4': {'p95': 100.0}, 'claude-2': {'p95': 50.0}})], packed_at[0])
+        save_collections([_collection({'gpt-4': {'p95': 110.0}})], packed_at[1])
+        save_collections([_collection({'gpt-4': {'p95': 200.0}})], now - timedelta(minutes=5))
+
+        # 압축 후 원본은 compact_metrics가 지우므로 같은 상태를 만들어 둠
+        self.assertEqual(pack_history_day(packed_day), 2)
+        ModelMetricHistory.objects.filter(timestamp__lt=packed_day + timedelta(days=1)).delete()
+
+        response = self.client.get('/api/metrics/history/export/', {'hours': 96})
+
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(
+            [(line['model'], line['p95_latency_ms']) for line in lines],
+            [('claude-2', 50.0), ('gpt-4', 100.0), ('gpt-4', 110.0), ('gpt-4', 200.0)],
+        )
+        self.assertEqual(datetime.fromisoformat(lines[1]['timestamp']), packed_at[0])
+
+    def test_history_scan_uses_target_index_without_sort(self):
+        now = datetime.now(dt_timezone.utc)
+        rows = ModelMetricHistory.objects.filter(
+            metric_name='request_duration_seconds', time_range='5m', job='api',
+            timestamp__gte=now - timedelta(days=30), timestamp__lte=now,
+        ).order_by('model_name', 'timestamp')
+
+        plan = rows.explain()
+
+        self.assertIn('history_target_model_ts_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_raw_rows_of_packed_day_are_not_duplicated(self):
+        # 압축 직후 원본 삭제 전에 내보내도 같은 포인트가 두 번 나오지 않아야 함
+        now = datetime.now(dt_timezone.utc).replace(microsecond=0)
+        packed_day = day_start(now - timedelta(days=2))
+        save_collections([_collection({'gpt-4': {'p95': 100.0}})], packed_day + timedelta(hours=1))
+        pack_history_day(packed_day)
+
+        response = self.client.get('/api/metrics/history/export/', {'hours': 96, 'format': 'json'})
+
+        data = json.loads(b''.join(response.streaming_content))['data']
+        self.assertEqual([point['p95_latency_ms'] for point in data[0]['data_points']], [100.0])
+
+
+class _FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+    def iter_content(self, chunk_size):
+        yield json.dumps(self.data).encode()
+
+    def close(self):
+        pass
+
+
+class QueryRetryTests(SimpleTestCase):
+    """ReadTimeout 재시도/샤딩 판단 (query_p95_metrics.py)"""
+
+    def setUp(self):
+        self.client = PrometheusP95Query('http://prometheus:9090', max_retries=2, backoff_factor=0)
+        self.addCleanup(self.client.close)
+        self.calls = []
+
+    def _fake_get(self, url, params=None, **kwargs):
+        self.calls.append((url.rsplit('/v1/', 1)[1], dict(params or {})))
+        if url.endswith('/label/model/values'):
+            return _FakeResponse({'status': 'success', 'data': ['a', 'b']})
+        # 전체 쿼리는 항상 응답 대기 타임아웃, 모델을 지정한 샤드는 성공
+        if 'model=~' not in params['query']:
+            raise requests.exceptions.ReadTimeout()
+        return _FakeResponse({'status': 'success', 'data': {'resultType': 'vector', 'result': []}})
+
+    def test_read_timeout_is_retried_outside_sharding(self):
+        with mock.patch.object(self.client.session, 'get', side_effect=self._fake_get):
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                self.client.query_range('up', 0, 600, 60)
+
+        self.assertEqual(len(self.calls), 3)
+
+    def test_read_timeout_is_sharded_without_retry(self):
+        spec = {
+            'build': lambda models: 'up{model=~"%s"}' % '|'.join(models) if models else 'up',
+            'selector': 'up',
+            'model_label': 'model',
+        }
+        with mock.patch.object(self.client.session, 'get', side_effect=self._fake_get):
+            results = self.client.query_many_sharded([spec])
+
+        self.assertEqual(results[0]['status'], 'success')
+        endpoints = [endpoint for endpoint, _ in self.calls]
+        self.assertEqual(endpoints.count('query'), 1 + 3)  # 전체 1회(재시도 없음) + 샤드 3개 (a, b, '')
+        self.assertEqual(endpoints.count('label/model/values'), 1)
+
+    def test_sharded_attempt_is_not_counted_as_failure(self):
+        counter = QueryCounter()
+        self.client.on_query = counter
+        spec = {
+            'build': lambda models: 'up{model=~"%s"}' % '|'.join(models) if models else 'up',
+            'selector': 'up',
+            'model_label': 'model',
+        }
+        with mock.patch.object(self.client.session, 'get', side_effect=self._fake_get):
+            self.client.query_many_sharded([spec])
+
+        # 전체 쿼리 1 + 레이블 값 조회 1 + 샤드 3
+        self.assertEqual((counter.issued, counter.failed, counter.sharded), (5, 0, 1))
+
+
+class _ErrorResponse(_FakeResponse):
+    def __init__(self, status_code, data=None):
+        super().__init__(data or {'status': 'error'})
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        raise requests.exceptions.HTTPError(f'{self.status_code} error', response=self)
+
+
+class QueryTransportTests(SimpleTestCase):
+    """요청 방식, 타임아웃, 재시도 횟수 (PrometheusP95Query._request/_gather)"""
+
+    ok = {'status': 'success', 'data': {'resultType': 'vector', 'result': []}}
+
+    def setUp(self):
+        self.client = PrometheusP95Query('http://prometheus:9090', timeout=7, max_retries=2, backoff_factor=0)
+        self.addCleanup(self.client.close)
+        self.calls = []
+        self.responses = []
+
+    def _send(self, method):
+        def send(url, params=None, data=None, timeout=None, **kwargs):
+            self.calls.append((method, params if method == 'GET' else data, timeout))
+            response = self.responses.pop(0) if self.responses else _FakeResponse(self.ok)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        return send
+
+    def _query_many(self, queries, timeout=None):
+        with mock.patch.object(self.client.session, 'get', side_effect=self._send('GET')), \
+                mock.patch.object(self.client.session, 'post', side_effect=self._send('POST')):
+            return self.client.query_many([('query', {'query': query}) for query in queries], timeout)
+
+    def test_long_query_is_sent_as_post(self):
+        threshold = PrometheusP95Query.POST_QUERY_THRESHOLD
+        short = 'up{job="%s"}' % ('a' * (threshold - 10))
+        long = 'up{job="%s"}' % ('a' * threshold)
+
+        self._query_many([short])
+        self._query_many([long])
+
+        self.assertEqual(len(short), threshold)
+        self.assertEqual([method for method, _, _ in self.calls], ['GET', 'POST'])
+        self.assertEqual(self.calls[1][1], {'query': long})
+
+    def test_per_query_timeout_overrides_default(self):
+        self._query_many(['up'])
+        self._query_many(['up'], timeout=2)
+
+        self.assertEqual([timeout for _, _, timeout in self.calls], [7, 2])
+
+    def test_server_error_is_retried_up_to_max_retries(self):
+        self.responses = [_ErrorResponse(502), _ErrorResponse(503), _ErrorResponse(504)]
+
+        self.assertEqual(self._query_many(['up']), [{}])
+        self.assertEqual(len(self.calls), 1 + 2)
+
+    def test_connection_error_is_retried(self):
+        self.responses = [requests.exceptions.ConnectionError(), _FakeResponse(self.ok)]
+
+        self.assertEqual(self._query_many(['up']), [self.ok])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_client_error_is_not_retried(self):
+        self.responses = [_ErrorResponse(400, {'status': 'error', 'errorType': 'bad_data'})]
+
+        self.assertEqual(self._query_many(['up(']), [{}])
+        self.assertEqual(len(self.calls), 1)
+
+    def test_failed_query_does_not_affect_others(self):
+        def send(url, params=None, **kwargs):
+            self.calls.append(params['query'])
+            if params['query'] == 'bad':
+                return _ErrorResponse(400)
+            return _FakeResponse(self.ok)
+
+        with mock.patch.object(self.client.session, 'get', side_effect=send):
+            results = self.client.query_many([('query', {'query': q}) for q in ('up', 'bad', 'up')])
+
+        self.assertEqual(results, [self.ok, {}, self.ok])
+        self.assertEqual(len(self.calls), 3)
+
+
+class MatrixStreamParserTests(SimpleTestCase):
+    """range 응답 스트리밍 파서와 json.loads 결과 비교 (matrix_stream.py)"""
+
+    body = {
+        'status': 'success',
+        'data': {
+            'resultType': 'matrix',
+            'result': [
+                {'metric': {'model': 'gpt-4', 'le': '0.5'}, 'values': [[1760679000, '0.25'], [1760679060.5, 'NaN']]},
+                {'metric': {'model': '클로드-2'}, 'values': [[1760679000, '+Inf'], [1760679060, '-1e-3']]},
+                {'metric': {}, 'values': []},
+            ],
+        },
+    }
+
+    def _chunks(self, raw, size):
+        return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+    def assertSeriesEqual(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for (labels, timestamps, values), (want_labels, want_timestamps, want_values) in zip(actual, expected):
+            self.assertEqual(labels, want_labels)
+            np.testing.assert_array_equal(timestamps, want_timestamps)
+            np.testing.assert_array_equal(values, want_values)
+
+    def test_matches_json_loads_for_any_chunking(self):
+        expected = list(matrix_series_from_result(self.body))
+        for raw in (json.dumps(self.body).encode(), json.dumps(self.body, indent=2, ensure_ascii=False).encode()):
+            for size in (1, 3, 7, 64, len(raw)):
+                with self.subTest(size=size, indent=b'\n' in raw):
+                    self.assertSeriesEqual(list(iter_matrix_series(self._chunks(raw, size))), expected)
+
+    def test_empty_result(self):
+        raw = json.dumps({'status': 'success', 'data': {'resultType': 'matrix', 'result': []}}).encode()
+
+        self.assertEqual(list(iter_matrix_series(self._chunks(raw, 5))), [])
+
+    def test_truncated_response_is_rejected(self):
+        raw = json.dumps(self.body).encode()
+
+        with self.assertRaises(ValueError):
+            list(iter_matrix_series(self._chunks(raw[:len(raw) // 2], 16)))
+
+    def test_error_body_is_rejected(self):
+        raw = json.dumps({'status': 'error', 'errorType': 'bad_data', 'error': 'parse error'}).encode()
+
+        with self.assertRaisesRegex(ValueError, 'parse error'):
+            list(iter_matrix_series(self._chunks(raw, 4)))
+
+
+class RangeChunkCacheTests(SimpleTestCase):
+    """range 청크 캐시의 저장/LRU 제거 (range_cache.py)"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f'{directory.name}/chunks.sqlite3'
+        self.cache = RangeChunkCache(self.path)
+        self.addCleanup(self.cache.close)
+        # last_access 순서가 호출 순서와 같도록 시계를 1초씩 진행
+        clock = iter(range(1_000_000, 2_000_000))
+        patcher = mock.patch('range_cache.time.time', side_effect=lambda: next(clock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _chunk(self, model):
+        return [{'metric': {'model': model}, 'values': [[1760679000 + i * 60, str(i / 7)] for i in range(50)]}]
+
+    def _sizes(self):
+        return dict(self.cache._conn.execute('SELECT chunk_start, size FROM range_chunks').fetchall())
+
+    def test_round_trip_and_key_includes_step(self):
+        self.cache.put('q', 60, 0, self._chunk('a'))
+
+        self.assertEqual(self.cache.get('q', 60, 0), self._chunk('a'))
+        self.assertIsNone(self.cache.get('q', 300, 0))
+        self.assertIsNone(self.cache.get('q', 60, 14400))
+
+    def test_chunks_survive_reopen(self):
+        self.cache.put('q', 60, 0, self._chunk('a'))
+        self.cache.close()
+
+        reopened = RangeChunkCache(self.path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get('q', 60, 0), self._chunk('a'))
+
+    def test_least_recently_read_chunk_is_evicted(self):
+        for chunk_start, model in ((0, 'a'), (1, 'b')):
+            self.cache.put('q', 60, chunk_start, self._chunk(model))
+        sizes = self._sizes()
+        # 세 번째 청크를 넣으면 하나만 넘치는 크기
+        self.cache.max_bytes = sum(sizes.values()) + min(sizes.values()) // 2
+
+        self.cache.get('q', 60, 0)
+        self.cache.put('q', 60, 2, self._chunk('c'))
+
+        self.assertEqual(sorted(self._sizes()), [0, 2])
+        self.assertIsNone(self.cache.get('q', 60, 1))
+        self.assertLessEqual(sum(self._sizes().values()), self.cache.max_bytes)
+
+    def test_oversized_limit_evicts_until_under_budget(self):
+        for chunk_start in range(5):
+            self.cache.put('q', 60, chunk_start, self._chunk(str(chunk_start)))
+        self.cache.max_bytes = max(self._sizes().values())
+
+        self.cache.put('q', 60, 5, self._chunk('5'))
+
+        self.assertEqual(list(self._sizes()), [5])
+
+
+class RangeSeriesStreamTests(SimpleTestCase):
+    """청크 캐시를 쓰는 range 시리즈 스트리밍 (query_p95_metrics.py)"""
+
+    step = 60
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.client = PrometheusP95Query(
+            'http://prometheus:9090',
+            range_cache=RangeChunkCache(f'{directory.name}/range.sqlite3'),
+        )
+        self.addCleanup(self.client.close)
+        self.calls = []
+        chunk_seconds = self.step * PrometheusP95Query.RANGE_CHUNK_POINTS
+        # 최신 청크의 중간 시점으로 고정하고, 청크 경계에 걸치도록 확정된 청크 3개 + 최신 구간을 조회
+        now = (int(time.time()) // chunk_seconds) * chunk_seconds + chunk_seconds // 2
+        clock = mock.patch('query_p95_metrics.time.time', return_value=now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.end = now // self.step * self.step
+        self.start = (self.end // chunk_seconds - 3) * chunk_seconds + 7 * self.step
+
+    def _fake_get(self, url, params=None, **kwargs):
+        self.calls.append((params['start'], params['end']))
+        timestamps = range(params['start'], params['end'] + 1, params['step'])
+        return _FakeResponse({'status': 'success', 'data': {'resultType': 'matrix', 'result': [
+            {'metric': {'model': model}, 'values': [[ts, str(ts * factor)] for ts in timestamps]}
+            for model, factor in (('a', 1), ('b', 2))
+        ]}})
+
+    def test_cached_chunks_are_streamed_per_chunk(self):
+        with mock.patch.object(self.client.session, 'get', side_effect=self._fake_get):
+            streamed = list(self.client.iter_range_series('p95', self.start, self.end, self.step))
+            merged = self.client.query_range('p95', self.start, self.end, self.step)
+
+        # 합친 딕셔너리 없이 청크마다 시리즈를 넘기므로 같은 레이블이 여러 번 나옴
+        self.assertEqual([metric['model'] for metric, _, _ in streamed], ['a', 'b'] * 4)
+        expected = np.arange(self.start, self.end + 1, self.step, dtype=np.float64)
+        for model, factor in (('a', 1), ('b', 2)):
+            with self.subTest(model):
+                timestamps = np.concatenate([ts for metric, ts, _ in streamed if metric['model'] == model])
+                values = np.concatenate([v for metric, _, v in streamed if metric['model'] == model])
+                np.testing.assert_array_equal(timestamps, expected)
+                np.testing.assert_array_equal(values, expected * factor)
+
+        # query_range()는 같은 포인트를 시리즈별로 합친 응답을 반환하고, 두 번째 조회는 캐시 사용
+        self.assertEqual([len(item['values']) for item in merged['data']['result']], [len(expected)] * 2)
+        self.assertEqual(len(self.calls), 3 + 1 + 1)
+
+
+class _FakeWebhookResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@mock.patch('api.sla.BATCH_WAIT_SECONDS', 0)
+class SlaEngineTests(TestCase):
+    """SLA 상태 전이와 웹훅 전송 (api/sla.py)"""
+
+    evaluated_at = datetime(2025, 10, 17, 5, 0, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.dispatcher = WebhookDispatcher('http://127.0.0.1:9099/', max_retries=2)
+        self.engine = SlaEngine({'gpt-4': 200.0}, dispatcher=self.dispatcher)
+        self.bodies = []
+        self.statuses = []
+        self.sleeps = []
+
+        def post(url, json=None, **kwargs):
+            self.bodies.append(json)
+            status = self.statuses.pop(0) if self.statuses else 200
+            if isinstance(status, Exception):
+                raise status
+            return _FakeWebhookResponse(status)
+
+        patcher = mock.patch.object(self.dispatcher._session, 'post', side_effect=post)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('api.sla.time.sleep', side_effect=self.sleeps.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _check(self, p95, minutes=0):
+        alerts = self.engine.check(
+            [_collection({'gpt-4': {'p95': p95}})], self.evaluated_at + timedelta(minutes=minutes)
+        )
+        self.assertTrue(self.engine.flush(5))
+        return alerts
+
+    def test_breach_is_alerted_once(self):
+        first = self._check(350.0)
+        second = self._check(400.0, minutes=5)
+
+        self.assertEqual([alert['state'] for alert in first], ['breached'])
+        self.assertEqual(second, [])
+        self.assertEqual(len(self.bodies), 1)
+        self.assertEqual(self.bodies[0]['alerts'][0]['model'], 'gpt-4')
+        self.assertEqual(self.bodies[0]['alerts'][0]['excess_pct'], 75.0)
+        self.assertEqual(self.dispatcher.sent, 1)
+
+    def test_recovery_is_alerted_with_breach_start(self):
+        self._check(350.0)
+        alerts = self._check(150.0, minutes=5)
+
+        self.assertEqual([alert['state'] for alert in alerts], ['recovered'])
+        self.assertEqual(alerts[0]['breached_since'], self.evaluated_at.isoformat())
+        self.assertEqual([body['alerts'][0]['state'] for body in self.bodies], ['breached', 'recovered'])
+        self.assertFalse(SlaState.objects.get(model_name='gpt-4').breached)
+
+    def test_server_errors_are_retried_with_backoff(self):
+        self.statuses = [503, requests.exceptions.ConnectionError(), 200]
+
+        self._check(350.0)
+
+        self.assertEqual(len(self.bodies), 3)
+        self.assertEqual(self.sleeps, [1.0, 2.0])
+        self.assertEqual((self.dispatcher.sent, self.dispatcher.failed), (1, 0))
+
+    def test_retries_are_bounded(self):
+        self.statuses = [500] * 5
+
+        self._check(350.0)
+
+        self.assertEqual(len(self.bodies), 1 + 2)
+        self.assertEqual((self.dispatcher.sent, self.dispatcher.failed), (0, 1))
+
+    def test_client_error_is_not_retried(self):
+        self.statuses = [400]
+
+        self._check(350.0)
+
+        self.assertEqual(len(self.bodies), 1)
+        self.assertEqual(self.sleeps, [])
+        self.assertEqual((self.dispatcher.sent, self.dispatcher.failed), (0, 1))
+        # 전송에 실패해도 상태는 기록되어 다음 수집에서 다시 알리지 않음
+        self.assertEqual(self._check(400.0, minutes=5), [])
+
+
+class SloTrackerTests(TestCase):
+    """SLO 소진율 창 평가 (api/slo.py)"""
+
+    key = ('request_duration_seconds', '5m', 'api', 'gpt-4')
+    started_at = datetime(2025, 10, 17, 5, 0, tzinfo=dt_timezone.utc)
+
+    config = {'slo': {'objective': 0.99, 'latency_ms': 100}}
+
+    def _points(self, minutes, p95=500.0):
+        return [(self.started_at + timedelta(minutes=minute), p95) for minute in minutes]
+
+    def test_sparse_windows_are_not_evaluated(self):
+        tracker = SloTracker(self.config, interval=300)
+
+        # 첫 수집의 나쁜 이벤트 하나로 1h 이상 창은 평가하지 않고 예산도 알 수 없음
+        alerts = tracker.update([(self.key, self._points([0]))])
+
+        self.assertEqual(alerts, [])
+        summary = summarize(SloState.objects.get())
+        # 5m 창은 수집 주기(5분) 하나로 전부 덮이므로 바로 평가됨
+        self.assertEqual(summary['windows']['5m']['burn_rate'], 100.0)
+        self.assertEqual({summary['windows'][name]['burn_rate'] for name in ('1h', '6h', '3d')}, {None})
+        self.assertFalse(summary['windows']['1h']['ready'])
+        self.assertEqual(summary['windows']['1h']['events'], 1)
+        self.assertIsNone(summary['error_budget_remaining'])
+
+    def test_fast_burn_pages_at_collector_cadence(self):
+        # 기본 수집 주기(300초)로 들어오는 포인트만으로 1h/5m page 조건이 성립해야 함
+        tracker = SloTracker(self.config, interval=300)
+        alerts = []
+        for minute in range(0, 30, 5):
+            self.assertEqual(alerts, [])
+            alerts = tracker.update([(self.key, self._points([minute]))])
+
+        # 6번째 포인트에서 1h 창이 절반(25분 + 수집 주기 5분)을 덮음
+        summary = summarize(SloState.objects.get())
+        self.assertEqual(summary['windows']['5m']['events'], 1)
+        self.assertEqual(summary['windows']['5m']['burn_rate'], 100.0)
+        self.assertEqual(summary['windows']['1h']['coverage'], 0.5)
+        self.assertEqual(
+            [(alert['state'], alert['long_window'], alert['short_window']) for alert in alerts],
+            [('slo_burn', '1h', '5m')],
+        )
+
+    def test_windows_are_evaluated_once_covered(self):
+        tracker = SloTracker(self.config, interval=60)
+        tracker.update([(self.key, self._points(range(5)))])
+        self.assertEqual(SloState.objects.get().firing, [])
+
+        alerts = tracker.update([(self.key, self._points(range(5, 31)))])
+
+        # 1h: 이벤트 31개 (MIN_WINDOW_EVENTS 이상), 5m: 최근 5분을 덮음 (MIN_WINDOW_COVERAGE 이상)
+        summary = summarize(SloState.objects.get())
+        self.assertEqual(summary['windows']['1h']['burn_rate'], 100.0)
+        self.assertGreaterEqual(summary['windows']['5m']['coverage'], 0.5)
+        self.assertEqual(summary['windows']['5m']['burn_rate'], 100.0)
+        self.assertEqual(
+            [(alert['state'], alert['long_window'], alert['short_window']) for alert in alerts],
+            [('slo_burn', '1h', '5m'), ('slo_burn', '6h', '1h'), ('slo_burn', '3d', '6h')],
+        )
+        # 6h, 3d는 포함 비율이 낮아도 이벤트 수 기준을 넘어 평가되며 예산은 초과 상태
+        self.assertLess(summary['windows']['3d']['coverage'], 0.5)
+        self.assertEqual(summary['error_budget_remaining'], -99.0)
+
+
+def _bucket_vector(buckets, **labels):
+    """`sum(rate(..._bucket[...])) by (le, ...)` 응답의 data.result (le → 값)"""
+    return [
+        {'metric': {**labels, 'le': le}, 'value': [1760679000.0, value]}
+        for le, value in buckets.items()
+    ]
+
+
+# promql/testdata/histograms.test의 50m 시점 값
+_TEST_HISTOGRAM = {
+    'positive': {'0.1': '50', '.2': '70', '1e0': '110', '+Inf': '120'},
+    'negative': {'-.2': '10', '-0.1': '20', '0.3': '20', '+Inf': '30'},
+}
+_NONMONOTONIC = {'0.1': '20', '1': '10', '10': '50', '100': '40', '1000': '90', '+Inf': '80'}
+
+
+class HistogramQuantileTests(SimpleTestCase):
+    """로컬 histogram_quantile 계산이 Prometheus와 같은 값을 내는지 (histogram_quantile.py)"""
+
+    # (설명, 버킷, 분위수, 기대값): 기대값은 Prometheus histograms.test와 promql/quantile.go의 결과
+    cases = [
+        ('positive q=0', _TEST_HISTOGRAM['positive'], 0, 0.0),
+        ('positive q=0.2', _TEST_HISTOGRAM['positive'], 0.2, 0.048),
+        ('positive q=0.5', _TEST_HISTOGRAM['positive'], 0.5, 0.15),
+        ('positive q=0.8', _TEST_HISTOGRAM['positive'], 0.8, 0.72),
+        ('positive q=1', _TEST_HISTOGRAM['positive'], 1, 1.0),
+        # 첫 버킷의 상한이 0 이하이면 보간하지 않고 상한을 그대로 반환
+        ('le<=0 q=0', _TEST_HISTOGRAM['negative'], 0, -0.2),
+        ('le<=0 q=0.2', _TEST_HISTOGRAM['negative'], 0.2, -0.2),
+        ('le<=0 q=0.5', _TEST_HISTOGRAM['negative'], 0.5, -0.15),
+        ('le<=0 q=0.8', _TEST_HISTOGRAM['negative'], 0.8, 0.3),
+        ('le<=0 q=1', _TEST_HISTOGRAM['negative'], 1, 0.3),
+        # 누적 값이 줄어드는 버킷은 앞 버킷 값으로 보정
+        ('non-monotonic q=0.01', _NONMONOTONIC, 0.01, 0.0045),
+        ('non-monotonic q=0.5', _NONMONOTONIC, 0.5, 8.5),
+        ('non-monotonic q=0.99', _NONMONOTONIC, 0.99, 979.75),
+        # 분위수 범위 검사는 버킷 검사보다 먼저
+        ('q<0', _TEST_HISTOGRAM['positive'], -0.1, -math.inf),
+        ('q>1', _TEST_HISTOGRAM['positive'], 1.01, math.inf),
+        ('q=NaN', _TEST_HISTOGRAM['positive'], math.nan, math.nan),
+        ('q<0 without +Inf', {'0.1': '5', '1': '10'}, -0.1, -math.inf),
+        ('q>1 without +Inf', {'0.1': '5', '1': '10'}, 1.01, math.inf),
+        ('missing +Inf bucket', {'0.1': '5', '1': '10'}, 0.5, math.nan),
+        ('only +Inf bucket', {'+Inf': '10'}, 0.5, math.nan),
+        ('zero observations', {'0.1': '0', '1': '0', '+Inf': '0'}, 0.5, math.nan),
+        # NaN 관측 수는 0이 아니고 어떤 순위보다도 크지 않으므로 마지막 유한 버킷의 상한
+        ('NaN observations', {'1': '1', '2': '2', '+Inf': 'NaN'}, 0.5, 2.0),
+        ('all NaN buckets', {'1': 'NaN', '2': 'NaN', '+Inf': 'NaN'}, 0.5, 2.0),
+        # 같은 상한(1과 1.0)은 합산
+        ('duplicate le', {'0.5': '2', '1': '3', '1.0': '3', '+Inf': '10'}, 0.5, 0.875),
+    ]
+
+    def test_matches_prometheus(self):
+        for name, buckets, q, expected in self.cases:
+            with self.subTest(name):
+                results = histogram_quantiles_from_vector([q], _bucket_vector(buckets, model='gpt-4'))
+                [item] = results[q]
+                self.assertEqual(item['metric'], {'model': 'gpt-4'})
+                value = float(item['value'][1])
+                if math.isnan(expected):
+                    self.assertTrue(math.isnan(value), value)
+                else:
+                    self.assertAlmostEqual(value, expected, places=12)
+
+    def test_series_are_computed_per_label_set(self):
+        bucket_result = [
+            *_bucket_vector(_TEST_HISTOGRAM['positive'], start='positive'),
+            *_bucket_vector(_TEST_HISTOGRAM['negative'], start='negative'),
+        ]
+
+        results = histogram_quantiles_from_vector([0.5, 0.8], bucket_result)
+
+        self.assertEqual(
+            {q: {item['metric']['start']: round(float(item['value'][1]), 12) for item in items} for q, items in results.items()},
+            {0.5: {'positive': 0.15, 'negative': -0.15}, 0.8: {'positive': 0.72, 'negative': 0.3}},
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ChangeFeedTests(TestCase):
+    """since= 변경분 조회와 삭제 기록 (api/changes.py)"""
+
+    url = '/api/metrics/p95/'
+    target = {'metric_name': 'request_duration_seconds', 'time_range': '5m', 'job': 'api'}
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # 같은 초에 실행된 테스트끼리는 세대가 같으므로 프로세스 메모리 본문도 비움
+        memo = mock.patch.dict('api.snapshots._memo', clear=True)
+        memo.start()
+        self.addCleanup(memo.stop)
+        # 삭제 기록 보관 기간 안에 들도록 현재 시각 기준으로 수집
+        self.start = datetime.now(dt_timezone.utc).replace(microsecond=0) - timedelta(minutes=30)
+        self.first = self._collect({'gpt-4': 200.0, 'claude-3': 100.0, 'llama-3': 50.0}, 0)
+
+    def _collect(self, p95_by_model, minutes):
+        collected_at = self.start + timedelta(minutes=minutes)
+        save_collections(
+            [_collection({model: {'p95': p95} for model, p95 in p95_by_model.items()})], collected_at
+        )
+        return publish_snapshots([self.target], collected_at)
+
+    def _changes(self, since):
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_only_significant_changes_and_removed_models_are_returned(self):
+        # gpt-4는 1ms(0.5%)만 움직여 변경으로 치지 않고, llama-3는 결과에서 사라짐
+        second = self._collect({'gpt-4': 201.0, 'claude-3': 150.0}, 5)
+
+        body = self._changes(self.first)
+
+        self.assertEqual([row['model'] for row in body['data']], ['claude-3'])
+        self.assertEqual(body['removed'], ['llama-3'])
+        self.assertEqual((body['since'], body['generation'], body['full']), (self.first, second, False))
+        self.assertFalse(ModelMetric.objects.filter(model_name='llama-3').exists())
+
+    def test_small_drift_is_reported_once_it_adds_up(self):
+        # 마지막으로 알린 200ms와 비교하므로 3ms씩 움직여도 누적 6ms가 되면 변경으로 알림
+        second = self._collect({'gpt-4': 203.0, 'claude-3': 100.0, 'llama-3': 50.0}, 5)
+        self._collect({'gpt-4': 206.0, 'claude-3': 100.0, 'llama-3': 50.0}, 10)
+
+        self.assertEqual(self._changes(self.first)['data'][0]['model'], 'gpt-4')
+        self.assertEqual(self._changes(second)['data'][0]['p95_latency_ms'], 206.0)
+
+    def test_reappeared_model_clears_tombstone(self):
+        second = self._collect({'gpt-4': 200.0, 'claude-3': 100.0}, 5)
+        self.assertTrue(ModelMetricTombstone.objects.filter(model_name='llama-3').exists())
+
+        self._collect({'gpt-4': 200.0, 'claude-3': 100.0, 'llama-3': 55.0}, 10)
+
+        body = self._changes(second)
+        self.assertEqual([row['model'] for row in body['data']], ['llama-3'])
+        self.assertEqual(body['removed'], [])
+        self.assertFalse(ModelMetricTombstone.objects.exists())
+
+    def test_iso_timestamp_since_matches_generation(self):
+        self._collect({'gpt-4': 260.0, 'claude-3': 100.0, 'llama-3': 50.0}, 5)
+
+        by_time = self._changes(self.start.isoformat())
+
+        self.assertEqual(by_time['since'], generation_for(self.start))
+        self.assertEqual(by_time['data'], self._changes(self.first)['data'])
+
+    def test_since_older_than_tombstone_retention_returns_full_body(self):
+        self._collect({'gpt-4': 200.0, 'claude-3': 100.0}, 5)
+        expired = generation_for(datetime.now(dt_timezone.utc) - timedelta(days=30))
+
+        body = self._changes(expired)
+
+        self.assertTrue(body['full'])
+        self.assertEqual(sorted(row['model'] for row in body['data']), ['claude-3', 'gpt-4'])
+        self.assertEqual(body['removed'], [])
+
+    def test_invalid_since_is_rejected(self):
+        response = self.client.get(self.url, {'since': 'yesterday'})
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConditionalRequestTests(TestCase):
+    """세대 기반 ETag/Last-Modified와 304 응답 (/api/metrics/p95/)"""
+
+    url = '/api/metrics/p95/'
+    target = {'metric_name': 'request_duration_seconds', 'time_range': '5m', 'job': 'api'}
+
+    def setUp(self):
+        # LocMemCache는 테스트 사이에 남으므로 세대와 스냅샷을 비움
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _collect(self, p95, collected_at):
+        save_collections([_collection({'gpt-4': {'p95': p95}})], collected_at)
+        return publish_snapshots([self.target], collected_at)
+
+    def test_matching_etag_returns_304_without_queries(self):
+        generation = self._collect(200.0, datetime(2025, 10, 17, 5, 30, tzinfo=dt_timezone.utc))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], generation_etag(generation))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Accept', response['Vary'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=generation_etag(generation))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_generation_invalidates_etag(self):
+        old = self._collect(200.0, datetime(2025, 10, 17, 5, 30, tzinfo=dt_timezone.utc))
+        new = self._collect(250.0, datetime(2025, 10, 17, 5, 35, tzinfo=dt_timezone.utc))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=generation_etag(old))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], generation_etag(new))
+        self.assertEqual(response.json()['data'][0]['p95_latency_ms'], 250.0)
+
+    def test_messagepack_has_its_own_etag(self):
+        generation = self._collect(200.0, datetime(2025, 10, 17, 5, 30, tzinfo=dt_timezone.utc))
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=generation_etag(generation)
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], generation_etag(generation))
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.url, HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryDefaultsTests(TestCase):
+    """조회 API의 기본 time_range와 히스토리 구간 기준 시각"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _collect(self, collected_at):
+        save_collections([
+            _collection({'gpt-4': {'p95': 200.0}}, time_range='5m'),
+            _collection({'gpt-4': {'p95': 350.0}}, time_range='1h'),
+        ], collected_at)
+        return publish_snapshots([
+            {'metric_name': 'request_duration_seconds', 'time_range': time_range, 'job': 'api'}
+            for time_range in ('5m', '1h')
+        ], collected_at)
+
+    def test_p95_defaults_to_5m_time_range(self):
+        self._collect(datetime.now(dt_timezone.utc))
+
+        default = self.client.get('/api/metrics/p95/').json()
+        hourly = self.client.get('/api/metrics/p95/', {'time_range': '1h'}).json()
+
+        self.assertEqual([item['p95_latency_ms'] for item in default['data']], [200.0])
+        self.assertEqual([item['p95_latency_ms'] for item in hourly['data']], [350.0])
+        self.assertEqual(
+            self.client.get('/api/metrics/').json()['data'][0]['time_range'], '5m'
+        )
+
+    def test_history_window_ends_at_last_collection(self):
+        # 수집기가 3시간 전에 멈췄어도 hours=1은 마지막 수집까지의 1시간
+        collected_at = datetime.now(dt_timezone.utc).replace(microsecond=0) - timedelta(hours=3)
+        save_collections([_collection({'gpt-4': {'p95': 180.0}})], collected_at - timedelta(minutes=30))
+        self._collect(collected_at)
+
+        body = self.client.get('/api/metrics/history/', {'hours': 1}).json()
+
+        self.assertEqual(datetime.fromisoformat(body['time_range']['end']), collected_at)
+        self.assertEqual(
+            [point['p95_latency_ms'] for point in body['data'][0]['data_points']], [180.0, 200.0]
+        )
+
+
+def _fake_sharding_prometheus(calls):
+    """전체 버킷 rate 쿼리는 응답 대기 타임아웃, 모델별 샤드는 성공하는 Prometheus (session.get 대체)"""
+    def get(url, params=None, **kwargs):
+        calls.append(params.get('query', url))
+        if url.endswith('/label/model/values'):
+            return _FakeResponse({'status': 'success', 'data': ['gpt-4']})
+        if 'model=~' not in params['query']:
+            raise requests.exceptions.ReadTimeout()
+        result = []
+        if 'gpt-4' in params['query']:
+            result = [
+                {'metric': {'model': 'gpt-4', 'le': le}, 'value': [1760679000.0, value]}
+                for le, value in (('0.1', '50'), ('0.5', '90'), ('1', '100'), ('+Inf', '100'))
+            ]
+        return _FakeResponse({'status': 'success', 'data': {'resultType': 'vector', 'result': result}})
+    return get
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CollectorRunTests(TestCase):
+    """수집기 실행 기록과 헬스 체크 (api/ledger.py)"""
+
+    target = {'metric_name': 'request_duration_seconds', 'model_label': 'model', 'time_range': '5m', 'job': 'api'}
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_run_recovered_by_sharding_is_success(self):
+        prom_query = PrometheusP95Query('http://prometheus:9090', backoff_factor=0)
+        self.addCleanup(prom_query.close)
+        calls = []
+
+        with mock.patch.object(prom_query.session, 'get', side_effect=_fake_sharding_prometheus(calls)):
+            collections = MetricsCollector(prom_query).collect([self.target])
+
+        self.assertTrue(collections[0]['succeeded'])
+        self.assertIn('gpt-4', collections[0]['model_stats'])
+        run = CollectorRun.objects.get()
+        self.assertEqual((run.status, run.queries_failed), ('success', 0))
+        self.assertEqual(run.queries_issued, len(calls))
+
+        response = self.client.get('/api/health/')
+        self.assertEqual(response.json()['status'], 'healthy')
+
+    def test_health_reports_distinct_models_and_rows_written(self):
+        prom_query = PrometheusP95Query('http://prometheus:9090', backoff_factor=0)
+        self.addCleanup(prom_query.close)
+        targets = [self.target, dict(self.target, time_range='1h')]
+
+        with mock.patch.object(prom_query.session, 'get', side_effect=_fake_sharding_prometheus([])):
+            MetricsCollector(prom_query).collect(targets)
+
+        body = self.client.get('/api/health/').json()
+        self.assertEqual((body['model_count'], body['models_written']), (1, 2))
+        self.assertEqual(body['last_run']['model_count'], 1)
+
+    def test_failed_shard_keeps_rows_of_missing_models(self):
+        save_collections([{
+            'target': self.target,
+            'model_stats': {'gpt-4': {'p95': 100.0}, 'claude-2': {'p95': 90.0}},
+            'succeeded': True,
+        }], datetime.now(dt_timezone.utc) - timedelta(minutes=5))
+        prom_query = PrometheusP95Query('http://prometheus:9090', backoff_factor=0)
+        self.addCleanup(prom_query.close)
+        fake_get = _fake_sharding_prometheus([])
+
+        def get(url, params=None, **kwargs):
+            if url.endswith('/label/model/values'):
+                return _FakeResponse({'status': 'success', 'data': ['gpt-4', 'claude-2']})
+            if 'claude-2' in params.get('query', ''):
+                return _ErrorResponse(400)
+            return fake_get(url, params, **kwargs)
+
+        with mock.patch.object(prom_query.session, 'get', side_effect=get):
+            collections = MetricsCollector(prom_query).collect([self.target])
+
+        self.assertEqual((collections[0]['succeeded'], collections[0]['complete']), (True, False))
+        self.assertEqual(set(collections[0]['model_stats']), {'gpt-4'})
+        self.assertEqual(set(ModelMetric.objects.values_list('model_name', flat=True)), {'gpt-4', 'claude-2'})
+
+    def test_slo_state_is_written_before_generation_is_published(self):
+        # 새 세대를 본 /api/slo/ 요청이 이전 SloState를 새 ETag로 캐시하지 않아야 함
+        prom_query = PrometheusP95Query('http://prometheus:9090', backoff_factor=0)
+        self.addCleanup(prom_query.close)
+        slo = SloTracker({'slo': {'objective': 0.99, 'latency_ms': 100}})
+        published = []
+
+        def publish(targets, collected_at):
+            published.append(SloState.objects.filter(last_point_at=collected_at).count())
+            return publish_snapshots(targets, collected_at)
+
+        with mock.patch.object(prom_query.session, 'get', side_effect=_fake_sharding_prometheus([])), \
+                mock.patch('api.collector.publish_snapshots', side_effect=publish):
+            MetricsCollector(prom_query, slo=slo).collect([self.target])
+
+        self.assertEqual(published, [1])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RequestMetricsMiddlewareTests(TestCase):
+    """뷰별 요청 처리 시간/SQL 쿼리 수 계측 (api/middleware.py)"""
+
+    view = 'api:model_metrics_history'
+
+    def _db_queries(self):
+        labels = {'view': self.view}
+        return (
+            REGISTRY.get_sample_value('springboard_http_db_queries_count', labels) or 0,
+            REGISTRY.get_sample_value('springboard_http_db_queries_sum', labels) or 0,
+        )
+
+    def test_sync_path_counts_queries(self):
+        count, total = self._db_queries()
+
+        self.client.get('/api/metrics/history/')
+
+        new_count, new_total = self._db_queries()
+        self.assertEqual(new_count, count + 1)
+        self.assertGreater(new_total, total)
+
+    async def test_async_path_counts_queries(self):
+        # ASGI(AsyncClient)에서는 미들웨어가 비동기로 동작하고 동기 뷰는 sync_to_async로 실행됨
+        count, total = self._db_queries()
+
+        response = await AsyncClient().get('/api/metrics/history/')
+
+        self.assertEqual(response.status_code, 200)
+        new_count, new_total = self._db_queries()
+        self.assertEqual(new_count, count + 1)
+        self.assertGreater(new_total, total)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class InstrumentationLabelTests(TestCase):
+    """수집기/HTTP 메트릭 레이블 (api/instrumentation.py)"""
+
+    target = {'metric_name': 'request_duration_seconds', 'model_label': 'model', 'time_range': '5m', 'job': 'api'}
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _count(self, name, labels, registry=COLLECTOR_REGISTRY):
+        return registry.get_sample_value(f'{name}_count', labels) or 0
+
+    def test_query_percentile_and_outcome_labels(self):
+        name = 'springboard_prometheus_query_duration_seconds'
+        quantile = {'endpoint': 'query', 'percentile': '0.95', 'outcome': 'success'}
+        buckets = {'endpoint': 'query', 'percentile': 'buckets', 'outcome': 'error'}
+        before = self._count(name, quantile), self._count(name, buckets)
+
+        observe_prometheus_query('query', {'query': 'histogram_quantile(0.95, sum by (le) (rate(x[5m])))'}, 0.1, 'success')
+        observe_prometheus_query('query', {'query': 'sum by (le, model) (rate(x_bucket[5m]))'}, 0.2, 'error')
+
+        self.assertEqual((self._count(name, quantile), self._count(name, buckets)), (before[0] + 1, before[1] + 1))
+
+    def test_collector_records_outcomes_phases_and_rows(self):
+        query = 'springboard_prometheus_query_duration_seconds'
+        sharded = {'endpoint': 'query', 'percentile': 'buckets', 'outcome': 'sharded'}
+        labels = {'endpoint': 'label/model/values', 'percentile': 'buckets', 'outcome': 'success'}
+        phases = ('query', 'parse', 'write', 'publish')
+        before = (
+            self._count(query, sharded),
+            self._count(query, labels),
+            [self._count('springboard_collector_phase_duration_seconds', {'phase': phase}) for phase in phases],
+            self._count('springboard_collector_rows_written', {'table': 'model_metric'}),
+        )
+        prom_query = PrometheusP95Query('http://prometheus:9090', backoff_factor=0, on_query=observe_prometheus_query)
+        self.addCleanup(prom_query.close)
+
+        with mock.patch.object(prom_query.session, 'get', side_effect=_fake_sharding_prometheus([])):
+            MetricsCollector(prom_query).collect([self.target])
+
+        self.assertEqual(self._count(query, sharded), before[0] + 1)
+        self.assertEqual(self._count(query, labels), before[1] + 1)
+        self.assertEqual(
+            [self._count('springboard_collector_phase_duration_seconds', {'phase': phase}) for phase in phases],
+            [count + 1 for count in before[2]],
+        )
+        self.assertEqual(self._count('springboard_collector_rows_written', {'table': 'model_metric'}), before[3] + 1)
+        self.assertIs(prom_query.on_query, observe_prometheus_query)
+
+    def test_http_labels_use_view_name(self):
+        name = 'springboard_http_request_duration_seconds'
+        health = {'view': 'api:health_check', 'method': 'GET', 'status': '200'}
+        unmatched = {'view': 'unmatched', 'method': 'GET', 'status': '404'}
+        before = self._count(name, health, REGISTRY), self._count(name, unmatched, REGISTRY)
+
+        self.client.get('/api/health/?verbose=1')
+        self.client.get('/no/such/path/')
+
+        self.assertEqual(self._count(name, health, REGISTRY), before[0] + 1)
+        self.assertEqual(self._count(name, unmatched, REGISTRY), before[1] + 1)
+
+    def test_metrics_endpoint_exposes_both_registries(self):
+        observe_prometheus_query('query', {'query': 'up'}, 0.1, 'success')
+
+        body = self.client.get('/metrics').content.decode()
+
+        self.assertIn('springboard_http_request_duration_seconds_bucket{', body)
+        self.assertIn('springboard_prometheus_query_duration_seconds_bucket{', body)
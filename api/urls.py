@@ -14,9 +14,21 @@ urlpatterns = [
     # P95만 조회 (status.js용 - 가벼운 응답)
     path('metrics/p95/', views.get_model_p95_only, name='model_p95_only'),
     
+    # P95 실시간 스트림 (Server-Sent Events, status.js용)
+    path('metrics/stream/', views.metrics_stream, name='model_metrics_stream'),
+    
     # 메트릭 히스토리 조회 (차트용)
     path('metrics/history/', views.get_model_metrics_history, name='model_metrics_history'),
     
+    # 여러 모델·구간 히스토리 한 번에 조회 (대시보드용, POST)
+    path('metrics/history/batch/', views.get_model_metrics_history_batch, name='model_metrics_history_batch'),
+    
+    # 긴 구간 히스토리 스트리밍 내보내기 (NDJSON / JSON)
+    path('metrics/history/export/', views.export_model_metrics_history, name='model_metrics_history_export'),
+    
+    # 모델별 SLO 오류 예산 소진율
+    path('slo/', views.get_slo_status, name='slo_status'),
+    
     # 헬스 체크
     path('health/', views.health_check, name='health_check'),
 ]
@@ -5,69 +5,209 @@ API views for Model Metrics (DB 기반)
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from datetime import timedelta
-from api.models import ModelMetric, ModelMetricHistory
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition, require_GET
+from datetime import datetime, timedelta
+from functools import wraps
+import asyncio
+from itertools import islice
+import json
+import orjson
+from api import events, slo, snapshots
+from api.blockstore import iter_model_points
+from api.instrumentation import render_metrics
+from api.ledger import health_summary
+from api.history import (
+    HISTORY_FORMATS,
+    format_series,
+    history_payload,
+    load_points,
+    parse_history_options,
+    parse_hours,
+    run_batch,
+)
+from api.models import SloState
+from api.renderers import MessagePackRenderer, parse_fields, select_fields
+from api.snapshots import (
+    current_generation,
+    generation_datetime,
+    generation_etag,
+    generation_for,
+    get_changes,
+    get_snapshot,
+)
+from prometheus_client import CONTENT_TYPE_LATEST
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 배치 히스토리 조회 한 번에 받는 최대 쿼리 수
+MAX_BATCH_QUERIES = 100
 
+# 배치 쿼리에서 문자열이어야 하는 키 (묶음 키와 ORM 필터로 쓰임)
+BATCH_STRING_FIELDS = ('model_name', 'metric_name', 'time_range', 'job')
+
+# 히스토리 내보내기 시 DB 커서에서 한 번에 읽고 전송하는 행 수
+EXPORT_CHUNK_SIZE = 2000
+
+# SSE 스트림에서 이벤트가 없을 때 keepalive 주석을 보내는 간격 (초)
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _request_generation(request):
+    """요청 하나에서 세대 번호를 한 번만 조회하도록 request에 보관합니다."""
+    if not hasattr(request, '_metrics_generation'):
+        request._metrics_generation = current_generation()
+    return request._metrics_generation
+
+
+def _generation_etag(request, *args, **kwargs):
+    etag = generation_etag(_request_generation(request))
+    # 같은 URL이라도 Accept에 따라 본문이 달라지므로 MessagePack 표현은 다른 ETag를 씀
+    if MessagePackRenderer.media_type in request.META.get('HTTP_ACCEPT', ''):
+        etag = f'{etag[:-1]}-{MessagePackRenderer.format}"'
+    return etag
+
+
+def _generation_last_modified(request, *args, **kwargs):
+    generation = _request_generation(request)
+    return generation_datetime(generation) if generation else None
+
+
+def _history_filters(request, hours):
+    """
+    히스토리 조회 구간과 ORM 필터를 만듭니다.
+    
+    구간 끝은 마지막 수집 시각(세대) 기준이므로 같은 세대면 같은 응답이 되어 ETag가 유효합니다.
+    
+    Returns:
+        (시작 시각, 끝 시각, filter() 인자 딕셔너리)
+    """
+    generation = _request_generation(request)
+    end_time = generation_datetime(generation) if generation else timezone.now()
+    start_time = end_time - timedelta(hours=hours)
+    
+    filters = {
+        'metric_name': request.GET.get('metric_name', 'request_duration_seconds'),
+        'time_range': request.GET.get('time_range', '5m'),
+        'timestamp__gte': start_time,
+        'timestamp__lte': end_time
+    }
+    
+    model_name = request.GET.get('model_name')
+    if model_name:
+        filters['model_name'] = model_name
+    
+    job = request.GET.get('job')
+    if job:
+        filters['job'] = job
+    
+    return start_time, end_time, filters
+
+
+def _parse_since(value):
+    """
+    since 파라미터를 세대 번호로 바꿉니다.
+    
+    Returns:
+        세대 번호 (파라미터가 없으면 None)
+    
+    Raises:
+        ValueError: 정수(세대)도 ISO 8601 시각도 아닌 경우
+    """
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    
+    # 쿼리 문자열에서 인코딩되지 않은 '+'(UTC 오프셋)는 공백으로 들어옴
+    since_time = parse_datetime(value.replace(' ', '+'))
+    if since_time is None:
+        raise ValueError(value)
+    if timezone.is_naive(since_time):
+        since_time = timezone.make_aware(since_time)
+    return generation_for(since_time)
+
+
+def _snapshot_response(request, kind, since):
+    """
+    스냅샷(since가 있으면 변경분) 본문으로 응답합니다.
+    
+    기본 JSON 표현은 미리 인코딩된 바이트를 그대로 보내고, MessagePack이나 fields=를
+    요청한 경우에만 본문을 풀어 줄인 뒤 선택된 렌더러로 다시 인코딩합니다.
+    """
+    args = (
+        kind,
+        request.GET.get('metric_name', 'request_duration_seconds'),
+        request.GET.get('time_range', '5m'),
+        request.GET.get('job'),
+    )
+    generation = _request_generation(request)
+    if since is None:
+        body = get_snapshot(*args, generation=generation)
+    else:
+        body = get_changes(*args, since=since, generation=generation)
+    
+    renderer = request.accepted_renderer
+    fields = parse_fields(request.GET.get('fields'))
+    if fields or renderer.format != 'json':
+        body = renderer.render(select_fields(orjson.loads(body), fields))
+    return HttpResponse(body, content_type=renderer.media_type)
+
+
+def conditional_on_generation(view):
+    """
+    수집 세대로 ETag/Last-Modified를 붙이고 If-None-Match/If-Modified-Since에 304로 응답합니다.
+    
+    세대 번호는 캐시에서 읽으므로 304 응답은 ORM을 거치지 않습니다.
+    브라우저가 휴리스틱 캐시로 오래된 값을 쓰지 않도록 Cache-Control: no-cache를 붙여
+    매번 재검증하게 합니다.
+    """
+    @condition(etag_func=_generation_etag, last_modified_func=_generation_last_modified)
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
+    return wrapped
+
+
+@conditional_on_generation
 @api_view(['GET'])
 def get_model_metrics(request):
     """
     DB에 저장된 최신 모델별 메트릭을 조회하는 API endpoint
     
+    수집 시 미리 만들어 둔 스냅샷 본문을 그대로 반환합니다 (api/snapshots.py).
+    
     Query Parameters:
         - metric_name: 메트릭 이름 (기본값: request_duration_seconds)
         - time_range: 시간 범위 (기본값: 5m)
+        - job: Prometheus job (선택)
+        - since: 마지막으로 받은 세대 번호(응답의 generation) 또는 ISO 8601 시각 (선택, 바뀐 모델만 반환)
+        - fields: 항목마다 남길 키 (선택, 쉼표 구분, 예: p95_latency_ms)
     
     Returns:
         JSON 형태의 모델별 메트릭 데이터
     """
     try:
-        metric_name = request.GET.get('metric_name', 'request_duration_seconds')
-        time_range = request.GET.get('time_range', '5m')
-        
-        # DB에서 최신 메트릭 조회
-        metrics = ModelMetric.objects.filter(
-            metric_name=metric_name,
-            time_range=time_range
-        ).order_by('model_name')
-        
-        if not metrics.exists():
-            return Response(
-                {
-                    'status': 'success',
-                    'message': 'No metrics found. Run "python3 manage.py collect_metrics" to collect data.',
-                    'data': [],
-                    'count': 0
-                },
-                status=status.HTTP_200_OK
-            )
-        
-        # 데이터 포맷팅
-        formatted_data = []
-        for metric in metrics:
-            formatted_data.append({
-                'model': metric.model_name,
-                'p50_latency_ms': metric.p50_latency_ms,
-                'p95_latency_ms': metric.p95_latency_ms,
-                'p99_latency_ms': metric.p99_latency_ms,
-                'collected_at': metric.collected_at.isoformat(),
-                'metric_name': metric.metric_name,
-                'time_range': metric.time_range
-            })
-        
-        # P95 기준으로 정렬 (내림차순)
-        formatted_data.sort(key=lambda x: x.get('p95_latency_ms', 0) or 0, reverse=True)
-        
-        return Response({
-            'status': 'success',
-            'data': formatted_data,
-            'count': len(formatted_data),
-            'last_updated': metrics.first().collected_at.isoformat() if metrics.exists() else None
-        })
+        since = _parse_since(request.GET.get('since'))
+    except ValueError:
+        return Response(
+            {
+                'error': 'Invalid parameter',
+                'message': 'since must be a generation number or an ISO 8601 timestamp'
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        return _snapshot_response(request, snapshots.METRICS, since)
         
     except Exception as e:
         logger.error(f"Error fetching metrics: {str(e)}", exc_info=True)
@@ -80,51 +220,37 @@ def get_model_metrics(request):
         )
 
 
+@conditional_on_generation
 @api_view(['GET'])
 def get_model_p95_only(request):
     """
     P95 메트릭만 조회하는 간단한 API endpoint (status.js 용)
     
+    수집 시 미리 만들어 둔 스냅샷 본문을 그대로 반환합니다 (api/snapshots.py).
+    
     Query Parameters:
         - metric_name: 메트릭 이름 (기본값: request_duration_seconds)
+        - time_range: 시간 범위 (기본값: 5m)
+        - job: Prometheus job (선택)
+        - since: 마지막으로 받은 세대 번호(응답의 generation) 또는 ISO 8601 시각 (선택, 바뀐 모델만 반환)
+        - fields: 항목마다 남길 키 (선택, 쉼표 구분, 예: p95_latency_ms)
     
     Returns:
         JSON 형태의 모델별 P95 메트릭 데이터 (간소화)
     """
     try:
-        metric_name = request.GET.get('metric_name', 'request_duration_seconds')
-        
-        # DB에서 최신 메트릭 조회
-        metrics = ModelMetric.objects.filter(
-            metric_name=metric_name
-        ).order_by('model_name')
-        
-        if not metrics.exists():
-            return Response({
-                'status': 'success',
-                'data': [],
-                'count': 0,
-                'message': 'No data available. Waiting for metric collection.'
-            })
-        
-        # 간단한 포맷 (status.js에서 사용하기 쉽게)
-        formatted_data = []
-        for metric in metrics:
-            formatted_data.append({
-                'model': metric.model_name,
-                'p95_latency_ms': round(metric.p95_latency_ms, 2) if metric.p95_latency_ms else None,
-                'collected_at': metric.collected_at.isoformat()
-            })
-        
-        # P95 기준으로 정렬
-        formatted_data.sort(key=lambda x: x.get('p95_latency_ms', 0) or 0, reverse=True)
-        
-        return Response({
-            'status': 'success',
-            'data': formatted_data,
-            'count': len(formatted_data),
-            'last_updated': metrics.first().collected_at.isoformat()
-        })
+        since = _parse_since(request.GET.get('since'))
+    except ValueError:
+        return Response(
+            {
+                'error': 'Invalid parameter',
+                'message': 'since must be a generation number or an ISO 8601 timestamp'
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        return _snapshot_response(request, snapshots.P95, since)
         
     except Exception as e:
         logger.error(f"Error fetching P95 metrics: {str(e)}", exc_info=True)
@@ -137,6 +263,7 @@ def get_model_p95_only(request):
         )
 
 
+@conditional_on_generation
 @api_view(['GET'])
 def get_model_metrics_history(request):
     """
@@ -145,77 +272,339 @@ def get_model_metrics_history(request):
     Query Parameters:
         - model_name: 모델 이름 (선택)
         - metric_name: 메트릭 이름 (기본값: request_duration_seconds)
-        - hours: 조회할 시간 (기본값: 1시간)
+        - time_range: 시간 범위 (기본값: 5m)
+        - job: Prometheus job (선택)
+        - hours: 마지막 수집 시각 기준으로 조회할 시간 (기본값: 1시간)
+        - max_points: 모델당 최대 포인트 수 (선택, min/max 버킷 다운샘플링)
+        - resolution: 다운샘플링 버킷 폭 (선택, 예: 5m, 1h)
+        - fields: 포인트마다 남길 키 (선택, 쉼표 구분, 예: p95_latency_ms)
+        - format: rows (기본값, data_points 객체 리스트) 또는 columnar
+          (모델마다 timestamps(에포크 밀리초)와 p95_latency_ms 병렬 배열)
     
     Returns:
         JSON 형태의 시간별 모델별 P95 메트릭 데이터
     """
+    history_format = request.GET.get('format', 'rows')
+    if history_format not in HISTORY_FORMATS:
+        return Response(
+            {
+                'error': 'Invalid parameter',
+                'message': f"format must be one of: {', '.join(HISTORY_FORMATS)}"
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    columnar = history_format == 'columnar'
+    
     try:
-        model_name = request.GET.get('model_name')
-        metric_name = request.GET.get('metric_name', 'request_duration_seconds')
-        hours = int(request.GET.get('hours', 1))
-        
-        # 시간 범위 계산
-        end_time = timezone.now()
-        start_time = end_time - timedelta(hours=hours)
-        
-        # 쿼리 필터
-        filters = {
-            'metric_name': metric_name,
-            'timestamp__gte': start_time,
-            'timestamp__lte': end_time
-        }
-        
-        if model_name:
-            filters['model_name'] = model_name
+        options = parse_history_options(request.GET)
+    except ValueError as e:
+        return Response(
+            {
+                'error': 'Invalid parameter',
+                'message': str(e)
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        start_time, end_time, filters = _history_filters(request, options['hours'])
+        model_rows, source = load_points(filters, start_time, end_time, options['bucket_seconds'])
         
-        # DB에서 히스토리 조회
-        history = ModelMetricHistory.objects.filter(**filters).order_by('timestamp')
+        formatted_data = format_series(model_rows, start_time, end_time, options['bucket_seconds'], columnar)
+        response_data = history_payload(formatted_data, start_time, end_time, options, source, columnar)
         
-        if not history.exists():
-            return Response({
-                'status': 'success',
-                'data': [],
-                'count': 0
-            })
+        return Response(select_fields(response_data, parse_fields(request.GET.get('fields'))))
         
-        # 모델별로 그룹핑
-        model_data = {}
-        for record in history:
-            if record.model_name not in model_data:
-                model_data[record.model_name] = {
-                    'model': record.model_name,
-                    'data_points': []
-                }
-            
-            model_data[record.model_name]['data_points'].append({
-                'timestamp': record.timestamp.isoformat(),
-                'p95_latency_ms': round(record.p95_latency_ms, 2)
-            })
+    except Exception as e:
+        logger.error(f"Error fetching metrics history: {str(e)}", exc_info=True)
+        return Response(
+            {
+                'error': 'Internal server error',
+                'message': str(e)
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+def get_model_metrics_history_batch(request):
+    """
+    여러 모델·구간의 히스토리를 한 번에 조회하는 API endpoint (대시보드용)
+    
+    쿼리들을 (메트릭, 시간 범위, job, 원본/롤업)으로 묶어 묶음마다 한 번만 DB를 읽고
+    쿼리별로 모델과 구간을 잘라 /api/metrics/history/와 같은 형태로 돌려줍니다 (api/history.py).
+    
+    Request Body (JSON):
+        - queries: 쿼리 리스트 (최대 MAX_BATCH_QUERIES개). 각 쿼리는
+          id(선택, 응답에 그대로 돌려줌), model_name, metric_name, time_range, job, hours,
+          max_points, resolution - 의미와 기본값은 /api/metrics/history/와 같음
+        - format: rows (기본값) 또는 columnar
+        - fields: 포인트마다 남길 키 리스트 (선택)
+    
+    Returns:
+        queries 순서대로 각 쿼리의 히스토리 응답을 담은 `results`
+    """
+    body = request.data if isinstance(request.data, dict) else {}
+    queries = body.get('queries')
+    history_format = body.get('format', 'rows')
+    fields = body.get('fields')
+    
+    if not isinstance(queries, list) or not queries or len(queries) > MAX_BATCH_QUERIES:
+        message = f'queries must be a list of 1 to {MAX_BATCH_QUERIES} objects'
+    elif history_format not in HISTORY_FORMATS:
+        message = f"format must be one of: {', '.join(HISTORY_FORMATS)}"
+    elif fields is not None and not (isinstance(fields, list) and all(isinstance(f, str) for f in fields)):
+        message = 'fields must be a list of strings'
+    else:
+        message = None
+    
+    options = []
+    for index, query in enumerate(queries if message is None else []):
+        try:
+            if not isinstance(query, dict):
+                raise ValueError('query must be an object')
+            for field in BATCH_STRING_FIELDS:
+                if query.get(field) is not None and not isinstance(query[field], str):
+                    raise ValueError(f'{field} must be a string')
+            options.append({**query, **parse_history_options(query)})
+        except ValueError as e:
+            message = f'queries[{index}]: {e}'
+            break
+    
+    if message:
+        return Response(
+            {
+                'error': 'Invalid parameter',
+                'message': message
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        # 모든 쿼리가 같은 기준 시각(마지막 수집 시각)으로 끝나므로 패널끼리 시간축이 맞음
+        generation = _request_generation(request)
+        end_time = generation_datetime(generation) if generation else timezone.now()
         
-        formatted_data = list(model_data.values())
+        results = run_batch(options, end_time, history_format == 'columnar')
+        field_set = set(fields) if fields else None
         
         return Response({
             'status': 'success',
-            'data': formatted_data,
-            'count': len(formatted_data),
-            'time_range': {
-                'start': start_time.isoformat(),
-                'end': end_time.isoformat(),
-                'hours': hours
-            }
+            'results': [
+                {'id': query.get('id', index), **select_fields(result, field_set)}
+                for index, (query, result) in enumerate(zip(options, results))
+            ],
+            'count': len(results)
         })
         
-    except ValueError:
+    except Exception as e:
+        logger.error(f"Error fetching metrics history batch: {str(e)}", exc_info=True)
         return Response(
+            {
+                'error': 'Internal server error',
+                'message': str(e)
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@conditional_on_generation
+@require_GET
+def export_model_metrics_history(request):
+    """
+    긴 구간의 P95 히스토리를 스트리밍으로 내보내는 API endpoint
+    
+    DB 커서에서 조금씩 읽어 EXPORT_CHUNK_SIZE 행씩 내보내므로 구간 길이(30일 등)와
+    관계없이 요청당 메모리가 일정하고, 첫 바이트가 곧바로 전송됩니다.
+    원본 행은 (모델, 시간) 순서로 history_target_model_ts_idx 인덱스를 따라 읽고,
+    원본 보관 기간이 지난 날은 압축 블록에서 풀어 같은 순서로 섞습니다 (api/blockstore.py).
+    
+    Query Parameters:
+        - model_name, metric_name, time_range, job, hours: /api/metrics/history/와 동일
+        - format: ndjson (기본값, 한 줄에 포인트 하나) 또는 json (history와 같은 형태)
+    
+    Returns:
+        application/x-ndjson 또는 application/json 스트리밍 응답
+    """
+    try:
+        hours = parse_hours(request.GET.get('hours', 1))
+    except ValueError as e:
+        return JsonResponse(
             {
                 'error': 'Invalid parameter',
-                'message': 'hours must be an integer'
+                'message': str(e)
             },
-            status=status.HTTP_400_BAD_REQUEST
+            status=400
         )
+    
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in _EXPORT_WRITERS:
+        return JsonResponse(
+            {
+                'error': 'Invalid parameter',
+                'message': f"format must be one of: {', '.join(_EXPORT_WRITERS)}"
+            },
+            status=400
+        )
+    
+    # 보관 기간이 지나 압축 블록으로 묶인 날도 히스토리 API와 같이 포함
+    start_time, end_time, filters = _history_filters(request, hours)
+    rows = iter_model_points(filters, start_time, end_time)
+    
+    writer, content_type = _EXPORT_WRITERS[export_format]
+    return StreamingHttpResponse(writer(rows), content_type=content_type)
+
+
+def _iter_row_batches(rows):
+    """행 이터레이터를 EXPORT_CHUNK_SIZE개씩 묶습니다 (청크마다 한 번씩 전송)."""
+    while True:
+        batch = list(islice(rows, EXPORT_CHUNK_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def _write_ndjson(rows):
+    """한 줄에 포인트 하나: {"model": ..., "timestamp": ..., "p95_latency_ms": ...}"""
+    for batch in _iter_row_batches(rows):
+        yield ''.join(
+            f'{{"model":{json.dumps(model, ensure_ascii=False)},'
+            f'"timestamp":"{timestamp.isoformat()}","p95_latency_ms":{round(p95, 2)}}}\n'
+            for model, timestamp, p95 in batch
+        )
+
+
+def _write_json(rows):
+    """/api/metrics/history/와 같은 형태(모델별 data_points)를 모델 순서대로 이어서 씁니다."""
+    yield '{"status":"success","data":['
+    current = None
+    count = 0
+    for batch in _iter_row_batches(rows):
+        parts = []
+        for model, timestamp, p95 in batch:
+            if model != current:
+                if current is not None:
+                    parts.append(']},')
+                parts.append(f'{{"model":{json.dumps(model, ensure_ascii=False)},"data_points":[')
+                current = model
+                count += 1
+            else:
+                parts.append(',')
+            parts.append(f'{{"timestamp":"{timestamp.isoformat()}","p95_latency_ms":{round(p95, 2)}}}')
+        yield ''.join(parts)
+    yield (']}' if current is not None else '') + f'],"count":{count}}}'
+
+
+_EXPORT_WRITERS = {
+    'ndjson': (_write_ndjson, 'application/x-ndjson'),
+    'json': (_write_json, 'application/json'),
+}
+
+
+async def metrics_stream(request):
+    """
+    P95 변경을 Server-Sent Events로 밀어주는 스트림 endpoint (status.js용)
+    
+    연결 직후 snapshot 이벤트로 /api/metrics/p95/와 같은 본문을 보내고,
+    이후에는 수집될 때마다 바뀐 모델만 담은 delta 이벤트를 보냅니다 (api/events.py).
+    연결을 오래 유지하므로 ASGI 서버(backend/asgi.py)로 실행해야 하며, WSGI에서는 503으로 응답합니다.
+    
+    Query Parameters:
+        - metric_name: 메트릭 이름 (기본값: request_duration_seconds)
+        - time_range: 시간 범위 (기본값: 5m)
+        - job: Prometheus job (선택)
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    
+    if not isinstance(request, ASGIRequest):
+        # WSGI(runserver 등)는 StreamingHttpResponse의 비동기 이터레이터를 끝까지 모은 뒤에 보내므로
+        # 끝나지 않는 스트림은 아무것도 보내지 못하고 워커 스레드만 붙잡음. 503으로 거절해
+        # EventSource가 실패하고 status.js가 폴링으로 전환하게 함
+        response = HttpResponse(
+            'Live stream requires an ASGI server (see DEPLOYMENT_GUIDE.md)',
+            status=503,
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Cache-Control'] = 'no-store'
+        return response
+    
+    key = (
+        request.GET.get('metric_name', 'request_duration_seconds'),
+        request.GET.get('time_range', '5m'),
+        request.GET.get('job'),
+    )
+    channel, queue, snapshot_frame = await events.broadcaster.subscribe(key)
+    
+    async def stream():
+        try:
+            yield f'retry: {events.RETRY_MILLISECONDS}\n\n'.encode() + snapshot_frame
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # 프록시가 유휴 연결을 끊지 않도록 주석 한 줄
+                    yield b': keepalive\n\n'
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            events.broadcaster.unsubscribe(channel, queue)
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx 응답 버퍼링 끄기
+    return response
+
+
+@conditional_on_generation
+@api_view(['GET'])
+def get_slo_status(request):
+    """
+    모델별 SLO 오류 예산 소진율을 조회하는 API endpoint
+    
+    수집기가 증분 갱신하는 창별 집계(api/slo.py)만 읽으므로 히스토리를 조회하지 않습니다.
+    
+    Query Parameters:
+        - metric_name: 메트릭 이름 (기본값: request_duration_seconds)
+        - time_range: 시간 범위 (기본값: 5m)
+        - job: Prometheus job (선택)
+        - model_name: 모델 이름 (선택)
+        - firing: true이면 알림 조건이 성립 중인 모델만
+    
+    Returns:
+        모델별 목표, 창(5m/1h/6h/3d)별 이벤트 수·나쁜 이벤트 수·소진율, 성립 중인 알림 조건
+    """
+    try:
+        states = SloState.objects.filter(
+            metric_name=request.GET.get('metric_name', 'request_duration_seconds'),
+            time_range=request.GET.get('time_range', '5m'),
+        ).order_by('model_name', 'job')
+        
+        model_name = request.GET.get('model_name')
+        if model_name:
+            states = states.filter(model_name=model_name)
+        
+        job = request.GET.get('job')
+        if job:
+            states = states.filter(job=job)
+        
+        data = [slo.summarize(state) for state in states]
+        if request.GET.get('firing', '').lower() in ('1', 'true', 'yes'):
+            data = [item for item in data if item['alerts']]
+        
+        return Response({
+            'status': 'success',
+            'data': data,
+            'count': len(data),
+            'firing': sum(1 for item in data if item['alerts']),
+            'windows': list(slo.WINDOWS),
+            'rules': slo.BURN_RATE_RULES
+        })
+        
     except Exception as e:
-        logger.error(f"Error fetching metrics history: {str(e)}", exc_info=True)
+        logger.error(f"Error fetching SLO status: {str(e)}", exc_info=True)
         return Response(
             {
                 'error': 'Internal server error',
@@ -229,27 +618,49 @@ def get_model_metrics_history(request):
 def health_check(request):
     """
     헬스 체크 엔드포인트
-    마지막 메트릭 수집 시간을 반환
+    마지막 메트릭 수집 시간과 최근 수집 실행 추이를 반환
+    
+    수집기가 실행마다 캐시에 남기는 요약(api/ledger.py)만 읽으므로 메트릭 테이블을 조회하지 않습니다.
+    
+    Returns:
+        - status: healthy, degraded(마지막 실행이 일부/전부 실패), stale(성공한 수집이 10분 넘게 없음), warning(수집 기록 없음)
+        - last_collection, minutes_ago: 마지막으로 성공한 수집 기준
+        - model_count: 마지막으로 성공한 수집 후 저장된 서로 다른 모델 수
+        - models_written: 마지막으로 성공한 수집이 저장한 (모델, 메트릭, 시간 범위, job) 행 수
+        - last_run: 마지막 실행 기록 (소요 시간, 쿼리 수, 실패 수 등)
+        - trend: 최근 실행의 소요 시간 추이와 실패 횟수
     """
     try:
-        latest_metric = ModelMetric.objects.order_by('-collected_at').first()
+        summary = health_summary()
         
-        if not latest_metric:
+        if not summary or not summary['last_success']:
             return Response({
                 'status': 'warning',
                 'message': 'No metrics collected yet',
-                'last_collection': None
+                'last_collection': None,
+                'last_run': summary['last_run'] if summary else None
             })
         
+        last_success = summary['last_success']
+        last_collection = datetime.fromisoformat(last_success['finished_at'])
+        
         # 마지막 수집이 10분 이상 지났는지 확인
-        time_diff = timezone.now() - latest_metric.collected_at
-        is_stale = time_diff > timedelta(minutes=10)
+        time_diff = timezone.now() - last_collection
+        if time_diff > timedelta(minutes=10):
+            health_status = 'stale'
+        elif summary['last_run']['status'] != 'success':
+            health_status = 'degraded'
+        else:
+            health_status = 'healthy'
         
         return Response({
-            'status': 'stale' if is_stale else 'healthy',
-            'last_collection': latest_metric.collected_at.isoformat(),
+            'status': health_status,
+            'last_collection': last_collection.isoformat(),
             'minutes_ago': round(time_diff.total_seconds() / 60, 1),
-            'model_count': ModelMetric.objects.count()
+            'model_count': last_success['model_count'],
+            'models_written': last_success['models_written'],
+            'last_run': summary['last_run'],
+            'trend': summary['trend']
         })
         
     except Exception as e:
@@ -261,3 +672,13 @@ def health_check(request):
             },
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+def prometheus_metrics(request):
+    """
+    springboard 자체 메트릭을 Prometheus 텍스트 형식으로 노출하는 엔드포인트
+    
+    뷰별 요청 처리 시간·SQL 쿼리 수와 이 프로세스에서 실행된 수집기 메트릭을 포함합니다.
+    DRF 렌더러를 거치지 않도록 일반 Django 뷰로 둡니다.
+    """
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
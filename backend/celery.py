@@ -1,7 +1,7 @@
 """
 Celery 설정
 
-5분마다 메트릭을 수집하는 주기적 작업을 설정합니다.
+5분마다 메트릭을 수집하고 매일 히스토리를 정리하는 주기적 작업을 설정합니다.
 """
 
 import os
@@ -27,6 +27,10 @@ app.conf.beat_schedule = {
         # 또는 crontab 사용:
         # 'schedule': crontab(minute='*/5'),  # 5분마다
     },
+    'compact-metrics-daily': {
+        'task': 'api.tasks.compact_metrics_task',
+        'schedule': crontab(hour=4, minute=17),  # 매일 04:17 (수집 경계와 겹치지 않게)
+    },
 }
 
 # 타임존 설정
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,6 +83,24 @@ DATABASES = {
 }
 
 
+# Cache
+# 수집기가 만든 API 응답 스냅샷(api/snapshots.py)을 웹 서버와 공유하므로
+# 프로세스 간에 공유되는 백엔드를 사용 (LocMemCache는 프로세스마다 따로라 사용 불가)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'django',
+    }
+}
+# Redis 사용 시 (여러 서버에서 공유):
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': 'redis://localhost:6379/1',
+#     }
+# }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -126,14 +145,53 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Prometheus configuration
 PROMETHEUS_URL = 'http://localhost:9090'
 
+# 수집 설정 파일 (tracked_metrics, 시간 범위, job 목록 등 - config.yaml.example 참고)
+METRICS_CONFIG_PATH = BASE_DIR / 'config.yaml'
+
+# 상주형 수집기(run_collector) 설정
+COLLECTOR_INTERVAL = 300  # 수집 주기 (초)
+COLLECTOR_JITTER = 5  # 정렬된 경계에 더할 최대 지터 (초)
+
+# 수집기 자체 메트릭 내보내기 (None이면 사용 안 함)
+COLLECTOR_METRICS_TEXTFILE = None  # 예: '/var/lib/node_exporter/textfile/springboard.prom'
+COLLECTOR_PUSHGATEWAY_URL = None  # 예: 'http://pushgateway:9091'
+
+# 히스토리 보관 정책 (compact_metrics)
+METRICS_RAW_RETENTION_DAYS = 30  # 원본 히스토리 보관 기간 (지나면 시간/일 롤업과 압축 블록만 남김)
+METRICS_HOURLY_ROLLUP_RETENTION_DAYS = 400  # 1시간 롤업 보관 기간 (None이면 계속 보관, 1일 롤업은 항상 보관)
+METRICS_VACUUM_FREE_RATIO = 0.2  # SQLite 빈 페이지 비율이 이 이상이면 VACUUM
+METRICS_PACK_EXPIRED_HISTORY = True  # 지우는 원본을 하루·모델 단위 압축 블록으로 장기 보관
+METRICS_COLLECTOR_RUN_RETENTION_DAYS = 30  # 수집 실행 기록(CollectorRun) 보관 기간
+METRICS_HISTORY_MAX_DAYS = 400  # 히스토리 API hours 파라미터 상한 (1시간 롤업 보관 기간과 같게)
+
+# 변경분 조회(since=) - P95가 마지막으로 알린 값보다 두 기준을 모두 넘게 움직여야 변경으로 봄
+METRICS_CHANGE_MIN_DELTA_MS = 1.0  # 최소 변화량 (ms)
+METRICS_CHANGE_MIN_RATIO = 0.02  # 최소 변화율 (마지막으로 알린 값 대비)
+METRICS_PRUNE_MISSING_MODELS = True  # 조회에 성공한 결과에서 사라진 모델은 지우고 removed로 알림
+METRICS_TOMBSTONE_RETENTION_DAYS = 7  # 삭제 기록 보관 기간 (이보다 오래된 since는 전체 응답)
+
+# 실시간 스트림(/api/metrics/stream/) 알림 채널
+METRICS_EVENTS_REDIS_URL = None  # 예: 'redis://localhost:6379/1' (None이면 아래 파일 감시 - 수집기와 같은 호스트)
+METRICS_EVENTS_FILE = BASE_DIR / '.cache' / 'generation'
+
+# SLA 알림 웹훅 전송 (임계값과 webhook_url은 config.yaml의 sla 섹션)
+SLA_WEBHOOK_TIMEOUT = 5  # 요청 타임아웃 (초)
+SLA_WEBHOOK_MAX_RETRIES = 3  # 연결 오류/5xx/429일 때 재시도 횟수 (1, 2, 4초 간격)
+SLA_WEBHOOK_BATCH_SIZE = 100  # 요청 하나에 담을 최대 알림 수
+SLA_WEBHOOK_FLUSH_SECONDS = 15  # collect_metrics 종료 전 남은 알림 전송을 기다릴 최대 시간 (초)
+
 # REST Framework settings
 REST_FRAMEWORK = {
+    # Accept 헤더로 선택 (첫 번째가 기본값) - api/renderers.py
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
     ],
+    # format 파라미터는 응답 형태(히스토리 columnar, 내보내기 ndjson 등)에 쓰므로 렌더러 선택에 쓰지 않음
+    'URL_FORMAT_OVERRIDE': None,
 }
 
 # Celery Configuration
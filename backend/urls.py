@@ -16,8 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from api.views import prometheus_metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
+    # springboard 자체 메트릭 (Prometheus 스크레이프용)
+    path('metrics', prometheus_metrics, name='prometheus_metrics'),
 ]
@@ -6,6 +6,7 @@ Prometheus P95 메트릭 조회 예제
 """
 
 from query_p95_metrics import PrometheusP95Query
+from range_cache import RangeChunkCache
 import json
 
 
@@ -49,7 +50,8 @@ def example_time_series():
     print("예제 3: 1시간 동안의 P95 추이")
     print("="*60)
     
-    prom = PrometheusP95Query("http://localhost:9090")
+    # 과거 청크는 로컬 캐시에서 읽고 최신 구간만 조회
+    prom = PrometheusP95Query("http://localhost:9090", range_cache=RangeChunkCache())
     
     results = prom.query_p95_range_by_model(
         metric_name="request_duration_seconds",
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Prometheus histogram_quantile 로컬 계산 모듈
+
+`sum(rate(<metric>_bucket[...])) by (le, <model_label>)` 결과(버킷 rate)를 한 번만
+조회한 뒤, 여러 백분위수를 NumPy로 한꺼번에 계산합니다.
+
+보간 규칙은 Prometheus(promql/quantile.go)의 bucketQuantile을 그대로 따르므로
+서버에서 histogram_quantile()로 계산한 값과 동일한 결과를 냅니다.
+"""
+
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+# promql/quantile.go 의 smallDeltaTolerance
+SMALL_DELTA_TOLERANCE = 1e-12
+
+# Go의 minNormal (math.Float64frombits(0x0010000000000000))
+_MIN_NORMAL = np.finfo(np.float64).tiny
+_MAX_FLOAT = np.finfo(np.float64).max
+
+
+def _almost_equal(a: np.ndarray, b: np.ndarray, epsilon: float) -> np.ndarray:
+    """
+    Prometheus util/almost.Equal 의 벡터화 버전입니다.
+
+    Args:
+        a, b: 비교할 배열
+        epsilon: 상대 허용 오차
+
+    Returns:
+        원소별 근사 일치 여부
+    """
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        abs_sum = np.abs(a) + np.abs(b)
+        diff = np.abs(a - b)
+        tiny = (a == 0) | (b == 0) | (abs_sum < _MIN_NORMAL)
+        relative = diff / np.minimum(abs_sum, _MAX_FLOAT)
+        close = np.where(tiny, diff < epsilon * _MIN_NORMAL, relative < epsilon)
+    return (a == b) | (np.isnan(a) & np.isnan(b)) | close
+
+
+def bucket_quantiles(
+    quantiles: Sequence[float],
+    upper_bounds: np.ndarray,
+    counts: np.ndarray
+) -> np.ndarray:
+    """
+    같은 버킷 구성을 가진 여러 시리즈의 분위수를 한 번에 계산합니다.
+
+    Args:
+        quantiles: 계산할 분위수 리스트 (0.0 ~ 1.0)
+        upper_bounds: 오름차순 정렬되고 중복이 합쳐진 버킷 상한(le), shape (B,)
+        counts: 시리즈별 누적 버킷 값, shape (S, B)
+
+    Returns:
+        분위수별 시리즈별 결과, shape (Q, S)
+    """
+    qs = np.asarray(quantiles, dtype=np.float64)
+    upper_bounds = np.asarray(upper_bounds, dtype=np.float64)
+    counts = np.array(counts, dtype=np.float64, copy=True)
+    num_series, num_buckets = counts.shape
+
+    result = np.full((len(qs), num_series), np.nan)
+
+    # 마지막 버킷이 +Inf가 아니거나 버킷이 2개 미만이면 NaN
+    if num_buckets >= 2 and math.isinf(upper_bounds[-1]) and upper_bounds[-1] > 0:
+        # 단조 증가 보정 (ensureMonotonicAndIgnoreSmallDeltas)
+        prev = counts[:, 0]
+        for j in range(1, num_buckets):
+            curr = counts[:, j]
+            keep_prev = (curr != prev) & (
+                _almost_equal(prev, curr, SMALL_DELTA_TOLERANCE) | (curr < prev)
+            )
+            counts[:, j] = np.where(keep_prev, prev, curr)
+            prev = counts[:, j]
+
+        observations = counts[:, -1]
+        rank = qs[:, None] * observations[None, :]
+        series_idx = np.broadcast_to(np.arange(num_series), rank.shape)
+
+        # sort.Search(len(buckets)-1, buckets[i].Count >= rank) 과 동일한 이진 탐색
+        lo = np.zeros(rank.shape, dtype=np.intp)
+        hi = np.full(rank.shape, num_buckets - 1, dtype=np.intp)
+        active = lo < hi
+        while active.any():
+            mid = (lo + hi) // 2
+            found = counts[series_idx, mid] >= rank
+            lo = np.where(active & ~found, mid + 1, lo)
+            hi = np.where(active & found, mid, hi)
+            active = lo < hi
+        b = lo
+
+        prev_idx = np.maximum(b - 1, 0)
+        has_prev = b > 0
+        prev_count = np.where(has_prev, counts[series_idx, prev_idx], 0.0)
+        bucket_start = np.where(has_prev, upper_bounds[prev_idx], 0.0)
+        bucket_end = upper_bounds[b]
+        count = counts[series_idx, b]
+
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            count = np.where(has_prev, count - prev_count, count)
+            rank = np.where(has_prev, rank - prev_count, rank)
+            interpolated = bucket_start + (bucket_end - bucket_start) * (rank / count)
+
+        interpolated = np.where(
+            b == num_buckets - 1, upper_bounds[num_buckets - 2], interpolated
+        )
+        interpolated = np.where(
+            (b == 0) & (upper_bounds[0] <= 0), upper_bounds[0], interpolated
+        )
+        valid = (observations != 0)[None, :]
+        result = np.where(valid, interpolated, np.nan)
+
+    # 분위수 자체가 범위를 벗어난 경우가 가장 먼저 처리됨
+    result[np.isnan(qs)] = np.nan
+    result[qs < 0] = -np.inf
+    result[qs > 1] = np.inf
+    return result
+
+
+def format_sample_value(value: float) -> str:
+    """
+    Prometheus API 응답과 같은 형식으로 샘플 값을 문자열로 변환합니다.
+
+    Args:
+        value: 샘플 값
+
+    Returns:
+        "NaN", "+Inf", "-Inf" 또는 숫자 문자열
+    """
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def histogram_quantiles_from_vector(
+    quantiles: Sequence[float],
+    bucket_result: List[Dict]
+) -> Dict[float, List[Dict]]:
+    """
+    버킷 rate instant vector 결과로부터 분위수별 vector 결과를 계산합니다.
+
+    Args:
+        quantiles: 계산할 분위수 리스트 (0.0 ~ 1.0)
+        bucket_result: `sum(rate(..._bucket[...])) by (le, ...)` 응답의 data.result
+
+    Returns:
+        분위수별로 Prometheus instant vector 형식(`metric`, `value`)의 결과 리스트
+    """
+    # le를 제외한 레이블 조합별로 버킷을 모읍니다 (같은 상한은 합산)
+    groups: Dict[Tuple, Dict] = {}
+    for item in bucket_result:
+        metric = item.get('metric', {})
+        try:
+            upper_bound = float(metric.get('le'))
+            timestamp, value = item['value']
+            value = float(value)
+        except (TypeError, ValueError, KeyError):
+            continue
+
+        labels = tuple(sorted((k, v) for k, v in metric.items() if k not in ('le', '__name__')))
+        group = groups.setdefault(labels, {'timestamp': timestamp, 'buckets': {}})
+        buckets = group['buckets']
+        buckets[upper_bound] = buckets.get(upper_bound, 0.0) + value
+
+    # 버킷 구성이 같은 시리즈끼리 묶어서 한 번에 계산
+    layouts: Dict[Tuple[float, ...], List[Tuple]] = {}
+    for labels, group in groups.items():
+        layout = tuple(sorted(group['buckets']))
+        layouts.setdefault(layout, []).append(labels)
+
+    results: Dict[float, List[Dict]] = {q: [] for q in quantiles}
+    for layout, members in layouts.items():
+        upper_bounds = np.array(layout, dtype=np.float64)
+        counts = np.array(
+            [[groups[labels]['buckets'][le] for le in layout] for labels in members],
+            dtype=np.float64
+        ).reshape(len(members), len(layout))
+        values = bucket_quantiles(quantiles, upper_bounds, counts)
+
+        for qi, q in enumerate(quantiles):
+            for si, labels in enumerate(members):
+                results[q].append({
+                    'metric': dict(labels),
+                    'value': [groups[labels]['timestamp'], format_sample_value(values[qi, si])]
+                })
+
+    return results
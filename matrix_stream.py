@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Prometheus range(matrix) 응답의 스트리밍 파서
+
+`response.json()`은 응답 전체를 한 번에 파이썬 리스트/문자열로 만들기 때문에
+긴 구간 · 높은 카디널리티 쿼리에서는 메모리 사용량이 응답 크기에 비례해 커집니다.
+이 모듈은 바이트가 도착하는 대로 `"result": [` 이후의 시리즈를 하나씩 디코딩해서
+(레이블, 타임스탬프 배열, 값 배열) 형태로 넘기므로, 한 번에 메모리에 올라가는 것은
+시리즈 하나와 아직 처리하지 않은 수신 버퍼뿐입니다.
+"""
+
+import codecs
+import json
+import re
+from typing import Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+
+# (레이블, 에포크 초 타임스탬프 배열, 값 배열)
+Series = Tuple[Dict[str, str], np.ndarray, np.ndarray]
+
+_RESULT_MARKER = re.compile(r'"result"\s*:\s*\[')
+_SEPARATOR = re.compile(r'[\s,]*')
+
+
+def series_from_item(item: Dict) -> Series:
+    """
+    matrix 결과의 항목 하나(`{"metric": ..., "values": [[ts, "v"], ...]}`)를 배열로 바꿉니다.
+
+    Args:
+        item: matrix result 항목
+
+    Returns:
+        (레이블, float64 타임스탬프 배열, float64 값 배열)
+    """
+    values = item.get('values') or []
+    timestamps = np.fromiter((point[0] for point in values), dtype=np.float64, count=len(values))
+    # Prometheus는 값을 "NaN", "+Inf" 같은 문자열로 보내며 float64 변환이 그대로 처리함
+    samples = np.array([point[1] for point in values], dtype=np.float64)
+    return item.get('metric', {}), timestamps, samples
+
+
+def matrix_series_from_result(results: Dict) -> Iterator[Series]:
+    """
+    이미 파싱된 query_range 응답을 iter_matrix_series()와 같은 형태로 넘깁니다.
+
+    Args:
+        results: Prometheus query_range 응답
+
+    Yields:
+        (레이블, 타임스탬프 배열, 값 배열)
+    """
+    if not results or results.get('status') != 'success':
+        return
+    for item in results.get('data', {}).get('result', []):
+        yield series_from_item(item)
+
+
+class _MatrixStreamParser:
+    """바이트 청크를 받아 result 배열의 항목을 하나씩 디코딩하는 파서"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._eof = False
+
+    def _fill(self, min_chars: int) -> bool:
+        """버퍼가 min_chars 이상 늘어날 때까지 읽습니다. 더 읽은 것이 없으면 False."""
+        pending = []
+        received = 0
+        while received < min_chars and not self._eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                text = self._utf8.decode(b'', final=True)
+            else:
+                text = self._utf8.decode(chunk)
+            pending.append(text)
+            received += len(text)
+        if not received:
+            return False
+        self._buffer += ''.join(pending)
+        return True
+
+    def __iter__(self) -> Iterator[Series]:
+        # 1) "result": [ 위치까지 읽기 (그 앞은 status, resultType 정도라 짧음)
+        while True:
+            match = _RESULT_MARKER.search(self._buffer)
+            if match:
+                self._buffer = self._buffer[match.end():]
+                break
+            if not self._fill(1):
+                # result 배열이 없는 응답 (오류 본문 등) - 전체를 일반 JSON으로 처리
+                yield from self._from_whole_body()
+                return
+
+        # 2) 시리즈를 하나씩 디코딩하고, 처리한 부분은 버퍼에서 버림
+        while True:
+            pos = _SEPARATOR.match(self._buffer).end()
+            if pos >= len(self._buffer):
+                if not self._fill(1):
+                    raise ValueError('matrix 응답이 중간에 끊겼습니다')
+                continue
+            if self._buffer[pos] == ']':
+                return
+
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                # 시리즈가 아직 다 도착하지 않음 - 남은 길이만큼 더 읽어서
+                # 긴 시리즈도 디코딩 재시도 비용이 선형으로 유지되게 함
+                if not self._fill(max(len(self._buffer) - pos, 1)):
+                    raise
+                continue
+
+            self._buffer = self._buffer[end:]
+            yield series_from_item(item)
+
+    def _from_whole_body(self) -> Iterator[Series]:
+        body = json.loads(self._buffer)
+        if body.get('status') != 'success':
+            raise ValueError(f"Prometheus 오류 응답: {body.get('error', body)}")
+        yield from matrix_series_from_result(body)
+
+
+def iter_matrix_series(chunks: Iterable[bytes]) -> Iterator[Series]:
+    """
+    query_range 응답 본문의 바이트 청크를 받아 시리즈를 도착하는 대로 넘깁니다.
+
+    Args:
+        chunks: 응답 본문 바이트 청크 (예: response.iter_content())
+
+    Yields:
+        (레이블, float64 타임스탬프 배열, float64 값 배열)
+
+    Raises:
+        ValueError: 응답이 중간에 끊겼거나 Prometheus 오류 응답인 경우
+    """
+    return iter(_MatrixStreamParser(chunks))
+
+
+def iter_series_points(series: Iterable[Series], model_label: str = 'model') -> Iterator[Tuple[str, float, float]]:
+    """
+    시리즈를 (모델, 타임스탬프, 값) 튜플로 펼칩니다.
+
+    Args:
+        series: iter_matrix_series() 등이 넘기는 시리즈
+        model_label: 모델을 구분하는 레이블 이름
+
+    Yields:
+        (모델 이름, 에포크 초 타임스탬프, 값) 튜플
+    """
+    for metric, timestamps, values in series:
+        model_name = metric.get(model_label, 'Unknown')
+        for timestamp, value in zip(timestamps.tolist(), values.tolist()):
+            yield model_name, timestamp, value
+
@@ -6,28 +6,672 @@ Prometheus 모델별 P95 메트릭 조회 스크립트
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import argparse
 
+from histogram_quantile import histogram_quantiles_from_vector
+from matrix_stream import Series, iter_matrix_series, matrix_series_from_result, series_from_item
+from range_cache import DEFAULT_CACHE_PATH, RangeChunkCache
+
+# on_query 콜백에 넘기는 요청 결과
+# sharded: 너무 커서 실패했지만 query_many_sharded()가 샤드로 나눠 다시 조회하는 요청 (실패가 아님)
+QUERY_SUCCESS = 'success'
+QUERY_ERROR = 'error'
+QUERY_SHARDED = 'sharded'
+
+
+def parse_duration(duration: str) -> int:
+    """
+    duration 문자열을 초 단위로 변환합니다.
+    
+    Args:
+        duration: 시간 문자열 (예: 30s, 5m, 1h, 7d)
+        
+    Returns:
+        초 단위 시간
+    """
+    unit = duration[-1]
+    value = int(duration[:-1])
+    
+    multipliers = {
+        's': 1,
+        'm': 60,
+        'h': 3600,
+        'd': 86400
+    }
+    
+    return value * multipliers.get(unit, 60)
+
+
+# RE2 정규식 메타 문자 (Prometheus 레이블 매처용 이스케이프)
+_RE2_META = set('\\.+*?()|[]{}^$')
+
+
+def label_regex(values: List[str]) -> str:
+    """
+    레이블 값 목록 중 하나와 정확히 일치하는 PromQL 정규식 매처 값을 만듭니다.
+    
+    Args:
+        values: 레이블 값 리스트 (빈 문자열은 레이블이 없는 시리즈와 일치)
+        
+    Returns:
+        `=~"..."` 안에 그대로 넣을 수 있도록 이스케이프된 문자열
+    """
+    pattern = '|'.join(
+        ''.join(f'\\{ch}' if ch in _RE2_META else ch for ch in value)
+        for value in values
+    )
+    # PromQL 문자열 리터럴 이스케이프
+    return pattern.replace('\\', '\\\\').replace('"', '\\"')
+
 
 class PrometheusP95Query:
     """Prometheus에서 모델별 P95 메트릭을 조회하는 클래스"""
     
-    def __init__(self, prometheus_url: str):
+    # 이 길이를 넘는 PromQL은 URL 길이 제한을 피하기 위해 POST로 전송
+    POST_QUERY_THRESHOLD = 2048
+    
+    # 재시도할 HTTP 상태 코드 (과부하/게이트웨이 오류)
+    RETRY_STATUS_CODES = (429, 502, 503, 504)
+    
+    # range 쿼리 캐시 청크 하나에 들어가는 스텝 수 (1m 스텝이면 4시간)
+    RANGE_CHUNK_POINTS = 240
+    
+    # 이 시간(초)보다 최근 데이터가 포함된 청크는 아직 바뀔 수 있으므로 캐시하지 않음
+    RANGE_SETTLE_SECONDS = 300
+    
+    # range 응답을 스트리밍으로 읽을 때 한 번에 받는 바이트 수
+    STREAM_CHUNK_SIZE = 64 * 1024
+    
+    # 너무 큰 쿼리를 모델 레이블 값으로 나눌 때 한 번에 나누는 샤드 수와 최대 분할 단계
+    SHARD_FANOUT = 4
+    MAX_SHARD_DEPTH = 4
+    
+    def __init__(
+        self,
+        prometheus_url: str,
+        timeout: float = 10,
+        max_concurrency: int = 8,
+        max_retries: int = 2,
+        backoff_factor: float = 0.5,
+        on_query: Optional[Callable[[str, Dict, float, str], None]] = None,
+        range_cache: Optional[RangeChunkCache] = None
+    ):
         """
         Args:
             prometheus_url: Prometheus 서버 URL (예: http://localhost:9090)
+            timeout: 쿼리별 기본 타임아웃 (초)
+            max_concurrency: 동시에 실행할 최대 쿼리 수 (커넥션 풀 크기)
+            max_retries: 일시적 오류 시 재시도 횟수
+            backoff_factor: 재시도 대기 시간의 기준값 (초, 지수 증가)
+            on_query: 요청이 끝날 때마다 (endpoint, params, 소요 시간(초), 결과)로 호출되는 콜백
+                (결과는 QUERY_SUCCESS, QUERY_ERROR, QUERY_SHARDED 중 하나)
+            range_cache: 과거 구간 range 쿼리 결과를 재사용할 청크 캐시 (None이면 캐시 안 함)
         """
         self.prometheus_url = prometheus_url.rstrip('/')
         self.api_url = f"{self.prometheus_url}/api/v1"
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.on_query = on_query
+        self.range_cache = range_cache
+        
+        # keep-alive 커넥션을 재사용하는 세션
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self) -> None:
+        """스레드 풀, 커넥션 풀, range 캐시를 정리합니다."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+        if self.range_cache is not None:
+            self.range_cache.close()
+    
+    def _request(
+        self,
+        endpoint: str,
+        params: Dict,
+        timeout: Optional[float] = None,
+        shardable: bool = False
+    ) -> Dict:
+        """
+        Prometheus HTTP API를 호출합니다.
+        
+        긴 쿼리는 POST(form)로 보내고, 연결 오류·타임아웃·과부하 응답은
+        지수 백오프로 재시도합니다.
+        
+        Args:
+            endpoint: API 경로 (예: query, query_range)
+            params: 요청 파라미터
+            timeout: 이 요청의 타임아웃 (초, 기본값: self.timeout)
+            shardable: 호출한 쪽이 너무 큰 쿼리를 샤드로 나눠 다시 조회하는 경우 True
+                (응답 대기 타임아웃을 재시도하지 않고 바로 넘김)
+            
+        Returns:
+            Prometheus API 응답 (JSON)
+            
+        Raises:
+            requests.exceptions.RequestException: 재시도 후에도 실패한 경우
+        """
+        started = time.perf_counter()
+        outcome = QUERY_ERROR
+        try:
+            data = self._send(endpoint, params, timeout, shardable=shardable).json()
+            outcome = QUERY_SUCCESS
+            return data
+        except requests.exceptions.RequestException as e:
+            # 샤드로 나눠 다시 조회할 요청은 실패로 세지 않음
+            if shardable and self._is_oversized(e, shardable=True):
+                outcome = QUERY_SHARDED
+            raise
+        finally:
+            # 재시도와 응답 파싱까지 포함한 전체 소요 시간을 보고
+            if self.on_query is not None:
+                self.on_query(endpoint, params, time.perf_counter() - started, outcome)
+    
+    def _send(
+        self,
+        endpoint: str,
+        params: Dict,
+        timeout: Optional[float] = None,
+        stream: bool = False,
+        shardable: bool = False
+    ) -> requests.Response:
+        """
+        요청을 보내고 성공한 응답 객체를 반환합니다. 일시적 오류는 재시도합니다.
+        
+        Args:
+            endpoint: API 경로 (예: query, query_range)
+            params: 요청 파라미터
+            timeout: 이 요청의 타임아웃 (초, 기본값: self.timeout)
+            stream: True이면 본문을 읽지 않은 상태로 반환 (호출한 쪽에서 close 필요)
+            shardable: 호출한 쪽이 너무 큰 쿼리를 샤드로 나눠 다시 조회하는 경우 True
+            
+        Returns:
+            상태 코드가 2xx인 응답
+            
+        Raises:
+            requests.exceptions.RequestException: 재시도 후에도 실패한 경우
+        """
+        url = f"{self.api_url}/{endpoint}"
+        timeout = timeout or self.timeout
+        use_post = len(params.get('query', '')) > self.POST_QUERY_THRESHOLD
+        
+        attempt = 0
+        while True:
+            try:
+                if use_post:
+                    response = self.session.post(url, data=params, timeout=timeout, stream=stream)
+                else:
+                    response = self.session.get(url, params=params, timeout=timeout, stream=stream)
+                response.raise_for_status()
+                return response
+            except requests.exceptions.RequestException as e:
+                if attempt >= self.max_retries or not self._is_retryable(e, shardable):
+                    raise
+                # 지수 백오프 + 지터
+                delay = self.backoff_factor * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+                attempt += 1
+    
+    def _iter_range_stream(self, params: Dict, timeout: Optional[float] = None) -> Iterator[Series]:
+        """
+        query_range 응답을 받는 대로 파싱해서 시리즈를 하나씩 넘깁니다.
+        
+        Args:
+            params: query_range 파라미터 (query, start, end, step)
+            timeout: 타임아웃 (초, 기본값: self.timeout)
+            
+        Yields:
+            (레이블, 타임스탬프 배열, 값 배열)
+            
+        Raises:
+            requests.exceptions.RequestException: 요청이 실패한 경우
+            ValueError: 응답이 끊겼거나 형식이 잘못된 경우
+        """
+        started = time.perf_counter()
+        outcome = QUERY_ERROR
+        try:
+            response = self._send('query_range', params, timeout, stream=True)
+            try:
+                yield from iter_matrix_series(response.iter_content(self.STREAM_CHUNK_SIZE))
+                outcome = QUERY_SUCCESS
+            finally:
+                response.close()
+        finally:
+            if self.on_query is not None:
+                self.on_query('query_range', params, time.perf_counter() - started, outcome)
+    
+    def _is_retryable(self, error: requests.exceptions.RequestException, shardable: bool = False) -> bool:
+        """
+        재시도할 가치가 있는 오류인지 판단합니다.
+        
+        Args:
+            error: 요청 중 발생한 예외
+            shardable: 샤딩으로 다시 조회할 수 있는 쿼리인지 여부 (_is_oversized() 참고)
+            
+        Returns:
+            일시적 오류이면 True
+        """
+        # 쿼리 자체가 너무 커서 실패한 경우는 같은 쿼리를 다시 보내지 않고 샤딩으로 처리
+        if self._is_oversized(error, shardable):
+            return False
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in self.RETRY_STATUS_CODES
+    
+    def _is_oversized(self, error: Exception, shardable: bool = False) -> bool:
+        """
+        쿼리가 너무 커서(샘플 수 제한, 쿼리 타임아웃) 실패했는지 판단합니다.
+        
+        - 422 + "too many samples": query.max-samples 초과
+        - 503 + errorType "timeout": query.timeout 초과
+        - 응답 대기 중 클라이언트 타임아웃 (ReadTimeout): shardable인 경우만
+        
+        ReadTimeout은 쿼리가 커서일 수도 있지만 네트워크나 서버 부하 때문일 수도 있으므로,
+        샤드로 나눠 다시 조회하는 query_many_sharded()에서만 너무 큰 쿼리로 봅니다.
+        range 쿼리나 레이블 값 조회처럼 나눌 방법이 없는 요청에서는 일시적 오류로 재시도합니다.
+        
+        Args:
+            error: 요청 중 발생한 예외
+            shardable: 샤딩으로 다시 조회할 수 있는 쿼리인지 여부
+            
+        Returns:
+            더 작은 쿼리로 나누면 성공할 가능성이 있으면 True
+        """
+        if isinstance(error, requests.exceptions.ReadTimeout):
+            return shardable
+        response = getattr(error, 'response', None)
+        if response is None or response.status_code not in (422, 503):
+            return False
+        try:
+            body = response.json()
+        except ValueError:
+            return False
+        if response.status_code == 422:
+            return 'too many samples' in body.get('error', '')
+        return body.get('errorType') == 'timeout'
+    
+    def query_many(
+        self,
+        requests_list: List[Tuple[str, Dict]],
+        timeout: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        여러 쿼리를 커넥션 풀 위에서 동시에 실행합니다.
+        
+        동시 실행 수는 max_concurrency로 제한되며, 전체 소요 시간은
+        가장 느린 쿼리에 의해 결정됩니다.
+        
+        Args:
+            requests_list: (endpoint, params) 튜플 리스트
+            timeout: 쿼리별 타임아웃 (초, 기본값: self.timeout)
+            
+        Returns:
+            요청 순서와 같은 순서의 응답 리스트 (실패한 쿼리는 빈 딕셔너리)
+        """
+        results = []
+        for (endpoint, params), outcome in zip(requests_list, self._gather(requests_list, timeout)):
+            if isinstance(outcome, Exception):
+                print(f"❌ 프로메테우스 쿼리 실패 ({params.get('query', endpoint)}): {outcome}")
+                results.append({})
+            else:
+                results.append(outcome)
+        return results
+    
+    def _gather(
+        self,
+        requests_list: List[Tuple[str, Dict]],
+        timeout: Optional[float] = None,
+        shardable: Union[bool, List[bool]] = False
+    ) -> List[Union[Dict, Exception]]:
+        """
+        요청을 동시에 실행하고, 요청 순서대로 응답 또는 발생한 예외를 반환합니다.
+        
+        shardable은 모든 요청에 같은 값이거나 요청별 값의 리스트입니다 (_request() 참고).
+        """
+        if isinstance(shardable, bool):
+            shardable = [shardable] * len(requests_list)
+        executor = self._get_executor()
+        futures = [
+            executor.submit(self._request, endpoint, params, timeout, flag)
+            for (endpoint, params), flag in zip(requests_list, shardable)
+        ]
+        
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except requests.exceptions.RequestException as e:
+                outcomes.append(e)
+        return outcomes
+    
+    def query_many_sharded(self, specs: List[Dict], timeout: Optional[float] = None) -> List[Dict]:
+        """
+        instant 쿼리들을 동시에 실행하고, 너무 커서 실패한 쿼리는 모델 레이블 값으로 나눠 다시 조회합니다.
+        
+        실패한 쿼리마다 레이블 값 목록을 조회해 SHARD_FANOUT개의 `model=~"a|b|..."` 샤드로 나누고,
+        모든 샤드를 한 번에 동시에 실행합니다. 샤드도 너무 크면 MAX_SHARD_DEPTH 단계까지 더 나눕니다.
+        샤드 결과는 하나의 vector로 합쳐지므로 호출한 쪽에서는 샤딩 여부를 알 필요가 없습니다.
+        일부 샤드가 끝내 실패하면 나머지 결과에 `warnings`와 실패한 샤드 수 `failed_shards`를 붙여 반환합니다.
+        
+        모든 분할은 호출한 스레드에서 조율하므로 스레드 풀 안에서 다시 기다리는 일이 없습니다.
+        
+        Args:
+            specs: 쿼리 명세 리스트
+                - build: 모델 레이블 값 리스트(None이면 전체)를 받아 PromQL을 만드는 함수
+                - selector: 레이블 값 조회에 쓸 시리즈 셀렉터 (예: `metric_bucket{job="api"}`)
+                - model_label: 샤딩 기준 레이블 이름
+                - lookback: 레이블 값을 찾을 기간 (초)
+            timeout: 쿼리별 타임아웃 (초, 기본값: self.timeout)
+            
+        Returns:
+            specs와 같은 순서의 응답 리스트 (실패한 쿼리는 빈 딕셔너리)
+        """
+        results: List[Dict] = [{} for _ in specs]
+        first = self._gather([('query', {'query': spec['build'](None)}) for spec in specs], timeout, shardable=True)
+        
+        oversized = []
+        for index, (spec, outcome) in enumerate(zip(specs, first)):
+            if not isinstance(outcome, Exception):
+                results[index] = outcome
+            elif self._is_oversized(outcome, shardable=True):
+                oversized.append(index)
+            else:
+                print(f"❌ 프로메테우스 쿼리 실패 ({spec['build'](None)}): {outcome}")
+        
+        if not oversized:
+            return results
+        
+        # 샤드를 나눌 모델 레이블 값 조회
+        now = time.time()
+        label_outcomes = self._gather([
+            (f"label/{specs[index]['model_label']}/values", {
+                'match[]': specs[index]['selector'],
+                'start': now - specs[index].get('lookback', 3600),
+                'end': now,
+            })
+            for index in oversized
+        ], timeout)
+        
+        shards = []
+        shard_results = {}
+        failed_shards = {}
+        for index, outcome in zip(oversized, label_outcomes):
+            if isinstance(outcome, Exception) or outcome.get('status') != 'success':
+                print(f"❌ 샤딩용 레이블 값 조회 실패 ({specs[index]['selector']}): {outcome}")
+                continue
+            # 빈 문자열은 모델 레이블이 없는 시리즈를 위한 값
+            values = sorted(set(outcome.get('data') or [])) + ['']
+            groups = self._split_shards(values)
+            print(f"🔀 쿼리가 너무 커서 {specs[index]['model_label']} 값 {len(values) - 1}개를 "
+                  f"{len(groups)}개 샤드로 나눠 조회합니다")
+            shard_results[index] = []
+            failed_shards[index] = 0
+            shards.extend((index, group, 1) for group in groups)
+        
+        while shards:
+            # 더 나눌 수 없는 샤드(값 1개, 최대 단계)는 일반 쿼리처럼 재시도하고 실패로 셈
+            splittable = [len(group) > 1 and depth < self.MAX_SHARD_DEPTH for _, group, depth in shards]
+            outcomes = self._gather([
+                ('query', {'query': specs[index]['build'](group)}) for index, group, _ in shards
+            ], timeout, shardable=splittable)
+            next_shards = []
+            for (index, group, depth), can_split, outcome in zip(shards, splittable, outcomes):
+                if not isinstance(outcome, Exception):
+                    shard_results[index].append(outcome)
+                elif can_split and self._is_oversized(outcome, shardable=True):
+                    next_shards.extend((index, sub, depth + 1) for sub in self._split_shards(group))
+                else:
+                    print(f"❌ 샤드 쿼리 실패 ({len(group)}개 값): {outcome}")
+                    failed_shards[index] += 1
+            shards = next_shards
+        
+        for index, responses in shard_results.items():
+            results[index] = self._merge_shard_results(responses, failed_shards[index])
+        return results
+    
+    def _split_shards(self, values: List[str]) -> List[List[str]]:
+        """레이블 값 리스트를 최대 SHARD_FANOUT개의 연속된 그룹으로 나눕니다."""
+        size = -(-len(values) // self.SHARD_FANOUT)
+        return [values[i:i + size] for i in range(0, len(values), size)]
+    
+    def _merge_shard_results(self, responses: List[Dict], failed: int) -> Dict:
+        """
+        샤드 응답들을 하나의 응답으로 합칩니다.
+        
+        샤드마다 모델 레이블 값이 겹치지 않으므로 시리즈를 이어 붙이기만 하면 됩니다.
+        """
+        responses = [response for response in responses if response.get('status') == 'success']
+        if not responses:
+            return {}
+        
+        merged = {
+            'status': 'success',
+            'data': {
+                'resultType': responses[0].get('data', {}).get('resultType', 'vector'),
+                'result': [
+                    item for response in responses
+                    for item in response.get('data', {}).get('result', [])
+                ],
+            },
+        }
+        warnings = [warning for response in responses for warning in response.get('warnings', [])]
+        if failed:
+            warnings.append(f'{failed}개 샤드 조회 실패 - 일부 모델 결과가 빠졌을 수 있습니다')
+            merged['failed_shards'] = failed
+        if warnings:
+            merged['warnings'] = warnings
+        return merged
+    
+    def iter_query_many(
+        self,
+        requests_list: List[Tuple[str, Dict]],
+        timeout: Optional[float] = None
+    ) -> Iterator[Tuple[int, Dict]]:
+        """
+        여러 쿼리를 동시에 실행하고, 끝나는 순서대로 결과를 돌려줍니다.
+        
+        query_many()와 달리 진행 중인 요청을 max_concurrency개로 유지하면서
+        결과를 하나씩 넘기므로, 쿼리가 많아도 메모리에 쌓이는 응답 수가 제한됩니다.
+        
+        Args:
+            requests_list: (endpoint, params) 튜플 리스트
+            timeout: 쿼리별 타임아웃 (초, 기본값: self.timeout)
+            
+        Yields:
+            (requests_list 내 인덱스, 응답) 튜플 (실패한 쿼리는 빈 딕셔너리)
+        """
+        yield from self._iter_concurrent(
+            lambda endpoint, params: self._request(endpoint, params, timeout),
+            requests_list,
+            failed={}
+        )
+    
+    def iter_range_series_many(
+        self,
+        params_list: List[Dict],
+        timeout: Optional[float] = None
+    ) -> Iterator[Tuple[int, Optional[List[Series]]]]:
+        """
+        여러 range 쿼리를 동시에 스트리밍으로 읽고, 끝나는 순서대로 시리즈 배열을 돌려줍니다.
+        
+        응답 JSON 전체를 만들지 않고 시리즈별 float64 배열로만 보관하므로,
+        구간을 고정 크기 청크로 나눠 요청하면 전체 기간과 무관하게 메모리 사용량이 일정합니다.
+        
+        Args:
+            params_list: query_range 파라미터 리스트
+            timeout: 쿼리별 타임아웃 (초, 기본값: self.timeout)
+            
+        Yields:
+            (params_list 내 인덱스, 시리즈 리스트) 튜플 (실패한 쿼리는 None)
+        """
+        yield from self._iter_concurrent(
+            lambda endpoint, params: list(self._iter_range_stream(params, timeout)),
+            [('query_range', params) for params in params_list],
+            failed=None
+        )
+    
+    def _iter_concurrent(self, fetch: Callable, requests_list: List[Tuple[str, Dict]], failed):
+        """
+        fetch(endpoint, params)를 max_concurrency개까지 동시에 실행하고 끝나는 순서대로 넘깁니다.
+        
+        실패한 요청은 메시지를 출력하고 failed 값을 넘깁니다.
+        """
+        executor = self._get_executor()
+        queue = iter(enumerate(requests_list))
+        pending = {}
+        
+        def submit_next() -> None:
+            for index, (endpoint, params) in queue:
+                future = executor.submit(fetch, endpoint, params)
+                pending[future] = (index, endpoint, params)
+                return
+        
+        for _ in range(self.max_concurrency):
+            submit_next()
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, endpoint, params = pending.pop(future)
+                try:
+                    result = future.result()
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"❌ 프로메테우스 쿼리 실패 ({params.get('query', endpoint)}): {e}")
+                    result = failed
+                submit_next()
+                yield index, result
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """동시 실행 수가 max_concurrency로 제한된 스레드 풀을 반환합니다."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix='prometheus-query'
+            )
+        return self._executor
+    
+    def quantile_expr(
+        self,
+        percentile: float,
+        metric_name: str = "request_duration_seconds",
+        time_range: str = "5m",
+        model_label: str = "model",
+        job: Optional[str] = "api",
+        models: Optional[List[str]] = None
+    ) -> str:
+        """
+        모델별 백분위수를 구하는 histogram_quantile PromQL 식을 만듭니다.
+        
+        Args:
+            percentile: 백분위수 (0.0 ~ 1.0)
+            metric_name: 히스토그램 메트릭 이름 (_bucket 제외)
+            time_range: rate 윈도우 (예: 5m)
+            model_label: 모델을 구분하는 레이블 이름
+            job: job 레이블 값
+            models: 이 모델 레이블 값들로만 제한 (샤딩용, None이면 전체)
+            
+        Returns:
+            `histogram_quantile(<percentile>, sum(rate(...)) by (le, <model_label>))` 식
+        """
+        bucket_rate = self._bucket_rate_expr(metric_name, time_range, model_label, job, models)
+        return f'histogram_quantile({percentile}, {bucket_rate})'
+    
+    def _bucket_rate_expr(
+        self,
+        metric_name: str,
+        time_range: str,
+        model_label: str,
+        job: Optional[str] = "api",
+        models: Optional[List[str]] = None
+    ) -> str:
+        """
+        모델별 버킷 rate를 구하는 PromQL 식을 만듭니다.
+        
+        Args:
+            metric_name: 히스토그램 메트릭 이름 (_bucket 제외)
+            time_range: rate 윈도우 (예: 5m)
+            model_label: 모델을 구분하는 레이블 이름
+            job: job 레이블 값 (None이면 job 매처를 붙이지 않음)
+            models: 이 모델 레이블 값들로만 제한 (샤딩용, None이면 전체)
+            
+        Returns:
+            `sum(rate(<metric>_bucket[...])) by (le, <model_label>)` 식
+        """
+        selector = self._series_selector(metric_name, job, model_label, models)
+        return f'sum(rate({selector}[{time_range}])) by (le, {model_label})'
+    
+    def _series_selector(
+        self,
+        metric_name: str,
+        job: Optional[str] = "api",
+        model_label: str = "model",
+        models: Optional[List[str]] = None
+    ) -> str:
+        """`<metric>_bucket{job="...", <model_label>=~"..."}` 시리즈 셀렉터를 만듭니다."""
+        matchers = []
+        if job:
+            matchers.append(f'job="{job}"')
+        if models is not None:
+            matchers.append(f'{model_label}=~"{label_regex(models)}"')
+        matcher = f'{{{", ".join(matchers)}}}' if matchers else ''
+        return f'{metric_name}_bucket{matcher}'
+    
+    def _sharded_spec(self, target: Dict, percentile: Optional[float] = None) -> Dict:
+        """
+        query_many_sharded()에 넘길 쿼리 명세를 만듭니다.
+        
+        Args:
+            target: `metric_name`, `time_range`, `model_label`, `job` 키를 가진 딕셔너리
+            percentile: 서버에서 계산할 백분위수 (None이면 버킷 rate 쿼리)
+            
+        Returns:
+            build, selector, model_label, lookback 키를 가진 명세
+        """
+        metric_name = target['metric_name']
+        time_range = target['time_range']
+        model_label = target.get('model_label', 'model')
+        job = target.get('job', 'api')
+        
+        def build(models: Optional[List[str]]) -> str:
+            if percentile is None:
+                return self._bucket_rate_expr(metric_name, time_range, model_label, job, models)
+            return self.quantile_expr(percentile, metric_name, time_range, model_label, job, models)
+        
+        return {
+            'build': build,
+            'selector': self._series_selector(metric_name, job),
+            'model_label': model_label,
+            'lookback': self._parse_duration(time_range),
+        }
     
     def query_p95_by_model(
         self, 
         metric_name: str = "request_duration_seconds",
         time_range: str = "5m",
-        model_label: str = "model"
+        model_label: str = "model",
+        job: Optional[str] = "api"
     ) -> Dict:
         """
         모델별 P95 메트릭을 조회합니다.
@@ -36,35 +680,27 @@ class PrometheusP95Query:
             metric_name: 조회할 메트릭 이름
             time_range: 시간 범위 (예: 5m, 1h, 24h)
             model_label: 모델을 구분하는 레이블 이름
+            job: job 레이블 값
             
         Returns:
             모델별 P95 값을 담은 딕셔너리
         """
-        # PromQL 쿼리: 모델별로 P95 계산
-        query = f'histogram_quantile(0.95, sum(rate({metric_name}_bucket{{job="api"}}[{time_range}])) by (le, {model_label}))'
-        
-        params = {
-            'query': query
+        # PromQL 쿼리: 모델별로 P95 계산 (너무 크면 모델 레이블 값으로 나눠 조회)
+        target = {
+            'metric_name': metric_name,
+            'time_range': time_range,
+            'model_label': model_label,
+            'job': job,
         }
-        
-        try:
-            response = requests.get(
-                f"{self.api_url}/query",
-                params=params,
-                timeout=10
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"❌ 프로메테우스 쿼리 실패: {e}")
-            return {}
+        return self.query_many_sharded([self._sharded_spec(target, 0.95)])[0]
     
     def query_p95_range_by_model(
         self,
         metric_name: str = "request_duration_seconds",
         duration: str = "1h",
         step: str = "1m",
-        model_label: str = "model"
+        model_label: str = "model",
+        job: Optional[str] = "api"
     ) -> Dict:
         """
         시간 범위 동안의 모델별 P95 메트릭을 조회합니다.
@@ -74,44 +710,294 @@ class PrometheusP95Query:
             duration: 조회할 시간 길이 (예: 1h, 6h, 24h)
             step: 데이터 포인트 간격 (예: 1m, 5m)
             model_label: 모델을 구분하는 레이블 이름
+            job: job 레이블 값
             
         Returns:
             시간별 모델별 P95 값을 담은 딕셔너리
         """
-        # 종료 시간은 현재, 시작 시간은 duration만큼 이전
-        end_time = datetime.now()
+        query = self.quantile_expr(0.95, metric_name, "5m", model_label, job)
+        start, end, step_seconds = self._range_window(duration, step)
+        
+        try:
+            return self.query_range(query, start, end, step_seconds, timeout=30)
+        except requests.exceptions.RequestException as e:
+            print(f"❌ 프로메테우스 range 쿼리 실패: {e}")
+            return {}
+    
+    def iter_p95_range_by_model(
+        self,
+        metric_name: str = "request_duration_seconds",
+        duration: str = "1h",
+        step: str = "1m",
+        model_label: str = "model",
+        job: Optional[str] = "api"
+    ) -> Iterator[Series]:
+        """
+        query_p95_range_by_model()의 스트리밍 버전. 모델별 시리즈를 도착하는 대로 넘깁니다.
+        
+        Args:
+            metric_name: 조회할 메트릭 이름
+            duration: 조회할 시간 길이 (예: 1h, 6h, 24h)
+            step: 데이터 포인트 간격 (예: 1m, 5m)
+            model_label: 모델을 구분하는 레이블 이름
+            job: job 레이블 값
+            
+        Yields:
+            (레이블, 타임스탬프 배열, 값 배열)
+        """
+        query = self.quantile_expr(0.95, metric_name, "5m", model_label, job)
+        start, end, step_seconds = self._range_window(duration, step)
+        
+        try:
+            yield from self.iter_range_series(query, start, end, step_seconds, timeout=30)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"❌ 프로메테우스 range 쿼리 실패: {e}")
+    
+    def _range_window(self, duration: str, step: str) -> Tuple[int, int, int]:
+        """
+        range 쿼리 구간을 계산합니다.
         
-        # duration 파싱 (간단한 구현)
-        duration_seconds = self._parse_duration(duration)
-        start_time = end_time - timedelta(seconds=duration_seconds)
+        종료 시간은 현재 시각을 스텝 경계로 내린 값, 시작 시간은 duration만큼 이전입니다.
+        스텝에 정렬해야 같은 구간을 다시 조회할 때 캐시된 청크와 포인트가 일치합니다.
         
-        query = f'histogram_quantile(0.95, sum(rate({metric_name}_bucket{{job="api"}}[5m])) by (le, {model_label}))'
+        Returns:
+            (시작, 종료, 스텝) 에포크 초
+        """
+        step_seconds = self._parse_duration(step)
+        end = int(time.time()) // step_seconds * step_seconds
+        start = end - self._parse_duration(duration) // step_seconds * step_seconds
+        return start, end, step_seconds
+    
+    def iter_range_series(
+        self,
+        query: str,
+        start: int,
+        end: int,
+        step: int,
+        timeout: float = 30
+    ) -> Iterator[Series]:
+        """
+        range 쿼리 결과를 시리즈 단위로 넘깁니다.
         
-        params = {
-            'query': query,
-            'start': start_time.timestamp(),
-            'end': end_time.timestamp(),
-            'step': step
-        }
+        range_cache가 없으면 응답을 받는 대로 스트리밍 파싱하므로 전체 응답 JSON을
+        메모리에 만들지 않습니다. range_cache가 있으면 query_range()처럼 청크로 나누되
+        합치지 않고, 청크를 시간 순서대로 하나씩 읽어(캐시 또는 조회) 요청 구간의 시리즈를 넘긴 뒤
+        최신 구간을 스트리밍으로 넘깁니다. 캐시에 없는 청크는 max_concurrency개까지 미리 조회하므로
+        메모리에는 그만큼의 청크만 올라갑니다.
+        
+        캐시를 쓰면 같은 레이블의 시리즈가 청크마다 한 번씩 (시간 순서대로) 나올 수 있습니다.
+        
+        Args:
+            query: PromQL
+            start: 시작 시각 (에포크 초)
+            end: 종료 시각 (에포크 초)
+            step: 스텝 (초)
+            timeout: 타임아웃 (초)
+            
+        Yields:
+            (레이블, 타임스탬프 배열, 값 배열)
+            
+        Raises:
+            requests.exceptions.RequestException: 조회에 실패한 경우
+            ValueError: 응답이 끊겼거나 형식이 잘못된 경우
+        """
+        if self.range_cache is None:
+            yield from self._iter_range_stream({
+                'query': query, 'start': start, 'end': end, 'step': step
+            }, timeout)
+            return
+        
+        cache_key = f"{self.api_url}\n{query}"
+        chunks = list(self._range_chunks(query, start, end, step))
+        live_params = chunks.pop()[1] if chunks and chunks[-1][0] is None else None
+        
+        executor = self._get_executor()
+        pending = deque()
+        queue = iter(chunks)
+        
+        def submit_next() -> None:
+            for chunk_start, params in queue:
+                pending.append(executor.submit(self._load_range_chunk, cache_key, chunk_start, params, timeout))
+                return
         
         try:
-            response = requests.get(
-                f"{self.api_url}/query_range",
-                params=params,
-                timeout=30
+            for _ in range(self.max_concurrency):
+                submit_next()
+            while pending:
+                result = pending.popleft().result()
+                submit_next()
+                for item in result:
+                    metric, timestamps, values = series_from_item(item)
+                    # 캐시 청크는 청크 전체이므로 요청 구간만 남김
+                    mask = (timestamps >= start) & (timestamps <= end)
+                    if mask.any():
+                        yield metric, timestamps[mask], values[mask]
+        finally:
+            for future in pending:
+                future.cancel()
+        
+        if live_params is not None:
+            yield from self._iter_range_stream(live_params, timeout)
+    
+    def _range_chunks(self, query: str, start: int, end: int, step: int) -> Iterator[Tuple[Optional[int], Dict]]:
+        """
+        range 쿼리 구간을 캐시 청크로 나눕니다.
+        
+        Yields:
+            (청크 시작 시각, query_range 파라미터) 튜플. 아직 바뀔 수 있는 최신 구간은
+            청크 시작 시각이 None이며 항상 마지막입니다.
+        """
+        chunk_seconds = step * self.RANGE_CHUNK_POINTS
+        settled_before = time.time() - self.RANGE_SETTLE_SECONDS
+        
+        chunk_start = start // chunk_seconds * chunk_seconds
+        while chunk_start <= end:
+            chunk_end = chunk_start + chunk_seconds - step
+            if chunk_end > settled_before:
+                # 여기부터 끝까지는 아직 바뀔 수 있는 구간 - 한 번에 실시간 조회
+                yield None, {'query': query, 'start': max(chunk_start, start), 'end': end, 'step': step}
+                return
+            # 캐시에 저장할 수 있도록 요청 구간과 무관하게 청크 전체를 조회
+            yield chunk_start, {'query': query, 'start': chunk_start, 'end': chunk_end, 'step': step}
+            chunk_start += chunk_seconds
+    
+    def _store_range_chunk(
+        self,
+        cache_key: str,
+        chunk_start: Optional[int],
+        params: Dict,
+        response: Dict
+    ) -> List[Dict]:
+        """
+        청크 조회 응답을 검사하고, 확정된 청크는 캐시에 저장합니다.
+        
+        Returns:
+            청크의 matrix result 리스트
+            
+        Raises:
+            requests.exceptions.RequestException: 응답이 성공이 아닌 경우
+        """
+        if response.get('status') != 'success':
+            raise requests.exceptions.RequestException(
+                f"range 청크 조회 실패: {response.get('error', 'no response')}"
             )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"❌ 프로메테우스 range 쿼리 실패: {e}")
-            return {}
+        result = response.get('data', {}).get('result', [])
+        # 부분 결과일 수 있는 경고 응답은 캐시하지 않음
+        if chunk_start is not None and not response.get('warnings'):
+            self.range_cache.put(cache_key, params['step'], chunk_start, result)
+        return result
+    
+    def _load_range_chunk(self, cache_key: str, chunk_start: int, params: Dict, timeout: float) -> List[Dict]:
+        """확정된 청크를 캐시에서 읽고, 없으면 조회해서 저장합니다 (스레드 풀에서 실행)."""
+        cached = self.range_cache.get(cache_key, params['step'], chunk_start)
+        if cached is not None:
+            return cached
+        return self._store_range_chunk(
+            cache_key, chunk_start, params, self._request('query_range', params, timeout=timeout)
+        )
+    
+    def query_range(self, query: str, start: int, end: int, step: int, timeout: float = 30) -> Dict:
+        """
+        range 쿼리를 실행합니다. range_cache가 있으면 과거 청크는 캐시에서 읽습니다.
+        
+        구간을 RANGE_CHUNK_POINTS 스텝 단위의 정렬된 청크로 나눈 뒤
+        확정된(RANGE_SETTLE_SECONDS 이전에 끝난) 청크는 캐시에서 읽거나 청크 전체를 조회해서 저장하고,
+        아직 열려 있는 최신 구간만 한 번의 쿼리로 조회해서 결과를 합칩니다.
+        
+        Args:
+            query: PromQL
+            start: 시작 시각 (에포크 초, step의 배수)
+            end: 종료 시각 (에포크 초, step의 배수)
+            step: 스텝 (초)
+            timeout: 쿼리별 타임아웃 (초)
+            
+        Returns:
+            Prometheus query_range 형식의 응답 (matrix)
+            
+        Raises:
+            requests.exceptions.RequestException: 조회에 실패한 경우
+        """
+        if self.range_cache is None:
+            return self._request('query_range', {
+                'query': query, 'start': start, 'end': end, 'step': step
+            }, timeout=timeout)
+        
+        cache_key = f"{self.api_url}\n{query}"
+        
+        chunks = {}
+        fetches = []
+        for chunk_start, params in self._range_chunks(query, start, end, step):
+            cached = self.range_cache.get(cache_key, step, chunk_start) if chunk_start is not None else None
+            if cached is not None:
+                chunks[chunk_start] = cached
+            else:
+                fetches.append((chunk_start, params))
+        
+        live_result = []
+        responses = self.query_many([('query_range', params) for _, params in fetches], timeout=timeout)
+        for (chunk_start, params), response in zip(fetches, responses):
+            result = self._store_range_chunk(cache_key, chunk_start, params, response)
+            if chunk_start is None:
+                live_result = result
+            else:
+                chunks[chunk_start] = result
+        
+        # 청크 순서대로 시리즈별 포인트를 이어 붙이고 요청 구간만 남김
+        series = {}
+        for result in [chunks[key] for key in sorted(chunks)] + [live_result]:
+            for item in result:
+                key = json.dumps(item.get('metric', {}), sort_keys=True)
+                entry = series.setdefault(key, {'metric': item.get('metric', {}), 'values': []})
+                entry['values'].extend(
+                    point for point in item.get('values', []) if start <= point[0] <= end
+                )
+        
+        return {
+            'status': 'success',
+            'data': {
+                'resultType': 'matrix',
+                'result': [entry for entry in series.values() if entry['values']],
+            },
+        }
+    
+    def query_bucket_rates(
+        self,
+        metric_name: str = "request_duration_seconds",
+        time_range: str = "5m",
+        model_label: str = "model",
+        job: Optional[str] = "api"
+    ) -> Dict:
+        """
+        모델별 히스토그램 버킷 rate를 조회합니다.
+        
+        histogram_quantile()을 서버에서 계산하지 않고, 버킷 rate 자체를
+        가져와 로컬에서 여러 백분위수를 계산할 때 사용합니다.
+        
+        Args:
+            metric_name: 조회할 메트릭 이름
+            time_range: 시간 범위 (예: 5m, 1h, 24h)
+            model_label: 모델을 구분하는 레이블 이름
+            job: job 레이블 값
+            
+        Returns:
+            `le`, 모델 레이블별 버킷 rate를 담은 Prometheus 응답
+        """
+        target = {
+            'metric_name': metric_name,
+            'time_range': time_range,
+            'model_label': model_label,
+            'job': job,
+        }
+        return self.query_many_sharded([self._sharded_spec(target)])[0]
     
     def query_multiple_percentiles(
         self,
         metric_name: str = "request_duration_seconds",
         percentiles: List[float] = [0.50, 0.95, 0.99],
         time_range: str = "5m",
-        model_label: str = "model"
+        model_label: str = "model",
+        local: bool = False,
+        job: Optional[str] = "api"
     ) -> Dict[float, Dict]:
         """
         여러 백분위수를 한 번에 조회합니다.
@@ -121,29 +1007,100 @@ class PrometheusP95Query:
             percentiles: 조회할 백분위수 리스트 (0.0 ~ 1.0)
             time_range: 시간 범위
             model_label: 모델을 구분하는 레이블 이름
+            local: True이면 버킷 rate를 한 번만 조회하고 백분위수는 로컬에서 계산
+            job: job 레이블 값
             
         Returns:
             백분위수별 결과를 담은 딕셔너리
         """
-        results = {}
+        target = {
+            'metric_name': metric_name,
+            'time_range': time_range,
+            'model_label': model_label,
+            'job': job,
+        }
+        return self.query_percentiles_for_targets([target], percentiles, local=local)[0]
+    
+    def query_percentiles_for_targets(
+        self,
+        targets: List[Dict],
+        percentiles: List[float] = [0.50, 0.95, 0.99],
+        local: bool = False
+    ) -> List[Dict[float, Dict]]:
+        """
+        여러 (메트릭, 시간 범위, job) 조합의 백분위수를 동시에 조회합니다.
         
-        for percentile in percentiles:
-            query = f'histogram_quantile({percentile}, sum(rate({metric_name}_bucket{{job="api"}}[{time_range}])) by (le, {model_label}))'
+        모든 조합의 쿼리를 한 번의 query_many_sharded()로 실행하므로, 전체 소요 시간은
+        조합 수가 아니라 가장 느린 쿼리에 의해 결정됩니다. 샘플 수 제한이나 타임아웃으로
+        실패한 쿼리는 모델 레이블 값으로 나눈 샤드로 다시 조회합니다.
+        
+        Args:
+            targets: `metric_name`, `time_range`, `model_label`, `job` 키를 가진 딕셔너리 리스트
+            percentiles: 조회할 백분위수 리스트 (0.0 ~ 1.0)
+            local: True이면 조합마다 버킷 rate를 한 번만 조회하고 백분위수는 로컬에서 계산
             
-            params = {'query': query}
+        Returns:
+            targets와 같은 순서의, 백분위수별 결과 딕셔너리 리스트
+        """
+        if local:
+            responses = self.query_many_sharded([self._sharded_spec(target) for target in targets])
+            return [
+                self._compute_percentiles_locally(response, percentiles)
+                for response in responses
+            ]
+        
+        # 조합별, 백분위수별 쿼리를 모두 동시에 실행
+        responses = self.query_many_sharded([
+            self._sharded_spec(target, percentile)
+            for target in targets
+            for percentile in percentiles
+        ])
+        
+        return [
+            dict(zip(percentiles, responses[i * len(percentiles):(i + 1) * len(percentiles)]))
+            for i in range(len(targets))
+        ]
+    
+    def _compute_percentiles_locally(
+        self,
+        buckets: Dict,
+        percentiles: List[float]
+    ) -> Dict[float, Dict]:
+        """
+        버킷 rate 조회 결과 하나로 모든 백분위수를 계산합니다.
+        
+        결과는 서버의 histogram_quantile() 응답과 같은 형식으로 반환되므로
+        query_multiple_percentiles()의 기존 사용처를 그대로 쓸 수 있습니다.
+        
+        Args:
+            buckets: query_bucket_rates()와 같은 형식의 Prometheus 응답
+            percentiles: 계산할 백분위수 리스트 (0.0 ~ 1.0)
             
-            try:
-                response = requests.get(
-                    f"{self.api_url}/query",
-                    params=params,
-                    timeout=10
-                )
-                response.raise_for_status()
-                results[percentile] = response.json()
-            except requests.exceptions.RequestException as e:
-                print(f"❌ P{int(percentile*100)} 쿼리 실패: {e}")
-                results[percentile] = {}
+        Returns:
+            백분위수별 결과를 담은 딕셔너리
+        """
+        if buckets.get('status') != 'success':
+            return {percentile: {} for percentile in percentiles}
         
+        vectors = histogram_quantiles_from_vector(
+            percentiles,
+            buckets.get('data', {}).get('result', [])
+        )
+        
+        results = {
+            percentile: {
+                'status': 'success',
+                'data': {
+                    'resultType': 'vector',
+                    'result': vectors[percentile]
+                }
+            }
+            for percentile in percentiles
+        }
+        # 샤드 일부가 실패한 버킷 응답이면 모든 백분위수에 같은 모델이 빠져 있음
+        if buckets.get('failed_shards'):
+            for result in results.values():
+                result['failed_shards'] = buckets['failed_shards']
         return results
     
     def _parse_duration(self, duration: str) -> int:
@@ -156,26 +1113,21 @@ class PrometheusP95Query:
         Returns:
             초 단위 시간
         """
-        unit = duration[-1]
-        value = int(duration[:-1])
-        
-        multipliers = {
-            's': 1,
-            'm': 60,
-            'h': 3600,
-            'd': 86400
-        }
-        
-        return value * multipliers.get(unit, 60)
+        return parse_duration(duration)
     
-    def format_results(self, results: Dict, percentile: float = 0.95) -> None:
+    def format_results(self, results: Union[Dict, Iterable[Series]], percentile: float = 0.95) -> None:
         """
         쿼리 결과를 포맷하여 출력합니다.
         
         Args:
-            results: Prometheus API 응답
+            results: Prometheus API 응답, 또는 iter_p95_range_by_model() 등이 넘기는 시리즈 이터레이터
             percentile: 백분위수 (출력용)
         """
+        if not isinstance(results, dict):
+            # 시리즈 스트림은 레이블별로 모아 출력
+            self._print_range_series(results, percentile)
+            return
+        
         if not results or results.get('status') != 'success':
             print("❌ 유효한 결과가 없습니다.")
             return
@@ -184,18 +1136,20 @@ class PrometheusP95Query:
         result_type = data.get('resultType')
         result = data.get('result', [])
         
+        if result_type == 'matrix':
+            self._print_range_series(matrix_series_from_result(results), percentile)
+            return
+        
         if not result:
             print("📊 데이터가 없습니다.")
             return
         
-        print(f"\n{'='*60}")
-        print(f"📊 모델별 P{int(percentile*100)} 레이턴시 메트릭")
-        print(f"{'='*60}\n")
+        self._print_header(percentile)
         
         # 결과를 값 기준으로 정렬
         sorted_results = sorted(
             result,
-            key=lambda x: float(x.get('value', [0, 0])[1]) if result_type == 'vector' else 0,
+            key=lambda x: float(x.get('value', [0, 0])[1]),
             reverse=True
         )
         
@@ -203,22 +1157,44 @@ class PrometheusP95Query:
             metric = item.get('metric', {})
             model_name = metric.get('model', 'Unknown')
             
-            if result_type == 'vector':
-                # 단일 시점 쿼리
-                timestamp, value = item.get('value', [0, 0])
-                value_ms = float(value) * 1000  # 초를 밀리초로 변환
-                print(f"🤖 모델: {model_name:20s} → P{int(percentile*100)}: {value_ms:8.2f}ms")
-            
-            elif result_type == 'matrix':
-                # 시계열 쿼리
-                values = item.get('values', [])
-                if values:
-                    # 최근 값 표시
-                    latest_timestamp, latest_value = values[-1]
-                    value_ms = float(latest_value) * 1000
-                    print(f"🤖 모델: {model_name:20s} → 최근 P{int(percentile*100)}: {value_ms:8.2f}ms (데이터 포인트: {len(values)}개)")
+            # 단일 시점 쿼리
+            timestamp, value = item.get('value', [0, 0])
+            value_ms = float(value) * 1000  # 초를 밀리초로 변환
+            print(f"🤖 모델: {model_name:20s} → P{int(percentile*100)}: {value_ms:8.2f}ms")
+        
+        print(f"\n{'='*60}\n")
+    
+    def _print_range_series(self, series: Iterable[Series], percentile: float) -> None:
+        """
+        시계열 결과를 시리즈마다 최근 값과 포인트 수로 출력합니다.
+        
+        청크 캐시를 쓰면 같은 레이블이 청크마다 시간 순서대로 나오므로
+        레이블별 최근 값과 포인트 수만 모아 두었다가 한 번에 출력합니다.
+        """
+        summary = {}
+        for metric, timestamps, values in series:
+            if not len(values):
+                continue
+            key = json.dumps(metric, sort_keys=True)
+            count = summary[key][2] if key in summary else 0
+            summary[key] = (metric, float(values[-1]), count + len(values))
+        
+        if not summary:
+            print("📊 데이터가 없습니다.")
+            return
         
+        self._print_header(percentile)
+        for metric, last_value, count in summary.values():
+            model_name = metric.get('model', 'Unknown')
+            # 최근 값 표시
+            value_ms = last_value * 1000
+            print(f"🤖 모델: {model_name:20s} → 최근 P{int(percentile*100)}: {value_ms:8.2f}ms (데이터 포인트: {count}개)")
         print(f"\n{'='*60}\n")
+    
+    def _print_header(self, percentile: float) -> None:
+        print(f"\n{'='*60}")
+        print(f"📊 모델별 P{int(percentile*100)} 레이턴시 메트릭")
+        print(f"{'='*60}\n")
 
 
 def main():
@@ -239,6 +1215,9 @@ def main():
   
   # 여러 백분위수 조회
   python query_p95_metrics.py --url http://localhost:9090 --percentiles 50 95 99
+  
+  # 버킷 rate를 한 번만 조회하고 백분위수는 로컬에서 계산
+  python query_p95_metrics.py --url http://localhost:9090 --percentiles 50 95 99 --local-quantiles
         """
     )
     
@@ -285,6 +1264,31 @@ def main():
         help='조회할 백분위수 (예: 50 95 99)'
     )
     
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=8,
+        help='동시에 실행할 최대 쿼리 수 (기본값: 8)'
+    )
+    
+    parser.add_argument(
+        '--local-quantiles',
+        action='store_true',
+        help='버킷 rate를 한 번만 조회하고 백분위수를 로컬에서 계산'
+    )
+    
+    parser.add_argument(
+        '--range-cache',
+        default=DEFAULT_CACHE_PATH,
+        help=f'range 쿼리 청크 캐시 파일 (기본값: {DEFAULT_CACHE_PATH})'
+    )
+    
+    parser.add_argument(
+        '--no-range-cache',
+        action='store_true',
+        help='range 쿼리 청크 캐시를 사용하지 않음'
+    )
+    
     parser.add_argument(
         '--json',
         action='store_true',
@@ -294,7 +1298,10 @@ def main():
     args = parser.parse_args()
     
     # PrometheusP95Query 인스턴스 생성
-    prom_query = PrometheusP95Query(args.url)
+    range_cache = None if args.no_range_cache else RangeChunkCache(args.range_cache)
+    prom_query = PrometheusP95Query(
+        args.url, max_concurrency=args.concurrency, range_cache=range_cache
+    )
     
     # 여러 백분위수 조회
     if args.percentiles:
@@ -303,7 +1310,8 @@ def main():
             metric_name=args.metric,
             percentiles=percentiles,
             time_range=args.time_range,
-            model_label=args.model_label
+            model_label=args.model_label,
+            local=args.local_quantiles
         )
         
         if args.json:
@@ -314,7 +1322,7 @@ def main():
     
     # Range 쿼리
     elif args.duration:
-        results = prom_query.query_p95_range_by_model(
+        range_args = dict(
             metric_name=args.metric,
             duration=args.duration,
             step=args.step,
@@ -322,9 +1330,10 @@ def main():
         )
         
         if args.json:
-            print(json.dumps(results, indent=2))
+            print(json.dumps(prom_query.query_p95_range_by_model(**range_args), indent=2))
         else:
-            prom_query.format_results(results)
+            # 응답 전체를 만들지 않고 시리즈를 받는 대로 출력
+            prom_query.format_results(prom_query.iter_p95_range_by_model(**range_args))
     
     # 기본 instant 쿼리
     else:
@@ -338,6 +1347,8 @@ def main():
             print(json.dumps(results, indent=2))
         else:
             prom_query.format_results(results)
+    
+    prom_query.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Prometheus query_range 결과의 청크 캐시
+
+과거 구간의 range 쿼리 결과는 바뀌지 않으므로, 스텝에 정렬된 청크 단위로
+로컬 SQLite 파일에 저장해 두고 재사용합니다.
+
+- 키: (Prometheus URL + PromQL, step, 청크 시작 시각)
+- 값: 해당 청크의 matrix 결과(result 리스트)를 zlib로 압축한 JSON
+- 전체 크기가 max_bytes를 넘으면 가장 오래 전에 읽힌 청크부터 제거 (LRU)
+
+아직 데이터가 들어오고 있는 최신 청크는 캐시하지 않고 매번 Prometheus에서 조회합니다.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+# 기본 캐시 파일 위치
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'springboard', 'range_chunks.sqlite3'
+)
+
+# 기본 최대 크기 (압축 후 바이트)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class RangeChunkCache:
+    """query_range 청크를 SQLite에 저장하는 크기 제한 LRU 캐시"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path: SQLite 캐시 파일 경로 (상위 디렉터리가 없으면 생성)
+            max_bytes: 캐시 전체의 최대 크기 (압축 후 바이트)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # 쿼리 fan-out 스레드에서 함께 쓰므로 하나의 커넥션을 락으로 보호
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS range_chunks ('
+            ' query TEXT NOT NULL,'
+            ' step INTEGER NOT NULL,'
+            ' chunk_start INTEGER NOT NULL,'
+            ' data BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_access REAL NOT NULL,'
+            ' PRIMARY KEY (query, step, chunk_start))'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS range_chunks_last_access ON range_chunks (last_access)'
+        )
+
+    def get(self, query: str, step: int, chunk_start: int) -> Optional[List[Dict]]:
+        """
+        저장된 청크를 조회합니다.
+
+        Args:
+            query: 캐시 키로 쓰는 쿼리 문자열
+            step: 스텝 (초)
+            chunk_start: 청크 시작 시각 (에포크 초)
+
+        Returns:
+            청크의 matrix result 리스트, 없으면 None
+        """
+        key = (query, step, chunk_start)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM range_chunks WHERE query = ? AND step = ? AND chunk_start = ?',
+                key
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                'UPDATE range_chunks SET last_access = ? '
+                'WHERE query = ? AND step = ? AND chunk_start = ?',
+                (time.time(),) + key
+            )
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, query: str, step: int, chunk_start: int, result: List[Dict]) -> None:
+        """
+        청크를 저장하고, 최대 크기를 넘으면 오래된 청크를 제거합니다.
+
+        Args:
+            query: 캐시 키로 쓰는 쿼리 문자열
+            step: 스텝 (초)
+            chunk_start: 청크 시작 시각 (에포크 초)
+            result: 청크의 matrix result 리스트
+        """
+        data = zlib.compress(json.dumps(result, separators=(',', ':')).encode())
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO range_chunks '
+                '(query, step, chunk_start, data, size, last_access) VALUES (?, ?, ?, ?, ?, ?)',
+                (query, step, chunk_start, data, len(data), time.time())
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """전체 크기가 max_bytes 이하가 될 때까지 가장 오래 전에 읽힌 청크를 지웁니다."""
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM range_chunks').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for rowid, size in self._conn.execute(
+            'SELECT rowid, size FROM range_chunks ORDER BY last_access'
+        ):
+            victims.append((rowid,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany('DELETE FROM range_chunks WHERE rowid = ?', victims)
+
+    def close(self) -> None:
+        """SQLite 커넥션을 닫습니다."""
+        with self._lock:
+            self._conn.close()
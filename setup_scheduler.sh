@@ -21,6 +21,13 @@ echo ""
 echo "   => 5분마다 자동으로 메트릭 수집"
 echo ""
 
+echo "옵션 1-1: 상주형 수집기 사용 (Redis/Celery 불필요)"
+echo "-------------------------------------------"
+echo "python3 manage.py run_collector --interval 300"
+echo ""
+echo "   => 커넥션을 재사용하며 5분 경계마다 수집, SIGTERM 시 정상 종료"
+echo ""
+
 echo "옵션 2: Cron 사용 (간단)"
 echo "-------------------------------------------"
 echo "crontab -e 로 다음 추가:"
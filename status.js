@@ -46,11 +46,17 @@ const THRESHOLDS = {
 const API_BASE_URL = 'http://localhost:8000';
 const USE_REAL_API = true;  // true: Django API 사용, false: Mock 데이터 사용
 
-// Refresh interval (30 seconds)
+// Refresh interval (30 seconds) - 실시간 스트림을 쓸 수 없을 때의 폴링 주기
 const REFRESH_INTERVAL = 30000;
 
+// 실시간 스트림 (Server-Sent Events): 수집될 때마다 서버가 바뀐 모델만 보내줌
+const USE_LIVE_STREAM = true;
+const STREAM_MAX_FAILURES = 3;  // 연속 연결 실패 횟수가 이 이상이면 폴링으로 전환
+
 // Global state
 let refreshTimer = null;
+let eventSource = null;
+let currentMetrics = {};
 
 /**
  * Initialize the status page
@@ -59,10 +65,94 @@ async function initStatusPage() {
     // 먼저 API에서 모델 목록을 가져와서 초기화
     await fetchAndInitializeModels();
     
-    // Auto-refresh every 30 seconds
+    if (USE_REAL_API && USE_LIVE_STREAM && typeof EventSource !== 'undefined') {
+        startLiveStream();
+    } else {
+        startPolling();
+    }
+}
+
+/**
+ * Auto-refresh every 30 seconds
+ */
+function startPolling() {
+    if (refreshTimer) {
+        return;
+    }
     refreshTimer = setInterval(fetchAndUpdateStatus, REFRESH_INTERVAL);
 }
 
+/**
+ * /api/metrics/stream/ 구독 (snapshot: 전체, delta: 바뀐 모델만)
+ * 연결이 계속 실패하거나 서버가 거절하면 폴링으로 전환
+ */
+function startLiveStream() {
+    let failures = 0;
+    eventSource = new EventSource(`${API_BASE_URL}/api/metrics/stream/`);
+    
+    eventSource.addEventListener('snapshot', event => {
+        failures = 0;
+        applyMetrics(convertApiMetrics(JSON.parse(event.data).data));
+    });
+    
+    eventSource.addEventListener('delta', event => {
+        const delta = JSON.parse(event.data);
+        const metrics = { ...currentMetrics };
+        
+        delta.removed.forEach(modelId => delete metrics[modelId]);
+        Object.assign(metrics, convertApiMetrics(delta.changed));
+        
+        // 모든 모델이 같은 시각에 수집되므로 바뀌지 않은 모델도 수집 시각만 갱신
+        const timestamp = new Date(delta.last_updated).getTime();
+        Object.values(metrics).forEach(metric => {
+            metric.timestamp = timestamp;
+        });
+        
+        applyMetrics(metrics);
+    });
+    
+    eventSource.onerror = () => {
+        failures += 1;
+        // 서버가 스트림을 거절하면(예: WSGI에서 503) EventSource는 재접속하지 않고 닫힘
+        if (eventSource.readyState === EventSource.CLOSED || failures >= STREAM_MAX_FAILURES) {
+            console.warn('Live stream unavailable, falling back to polling');
+            eventSource.close();
+            eventSource = null;
+            startPolling();
+        }
+    };
+}
+
+/**
+ * 스트림으로 받은 메트릭 반영 (모델 목록이 바뀌면 카드를 다시 그림)
+ */
+function applyMetrics(metrics) {
+    const modelIds = Object.keys(metrics).sort().join(',');
+    const knownIds = MODELS.map(model => model.id).sort().join(',');
+    
+    if (modelIds !== knownIds) {
+        MODELS = buildModels(metrics);
+        renderModelCards();
+    }
+    
+    currentMetrics = metrics;
+    updateModelStatus(metrics);
+    updateOverallStatus(metrics);
+    updateLastUpdateTime();
+}
+
+/**
+ * 메트릭으로 MODELS 배열 생성
+ */
+function buildModels(metrics) {
+    return Object.entries(metrics).map(([modelId, data]) => ({
+        id: modelId,
+        name: formatModelName(data.model_name || modelId),
+        icon: getModelIcon(data.model_name || modelId),
+        description: `AI Model: ${data.model_name || modelId}`
+    }));
+}
+
 /**
  * API에서 모델 목록을 가져와서 초기화
  */
@@ -72,12 +162,7 @@ async function fetchAndInitializeModels() {
         
         if (metrics && Object.keys(metrics).length > 0) {
             // API 데이터로 MODELS 배열 생성
-            MODELS = Object.entries(metrics).map(([modelId, data]) => ({
-                id: modelId,
-                name: formatModelName(data.model_name || modelId),
-                icon: getModelIcon(data.model_name || modelId),
-                description: `AI Model: ${data.model_name || modelId}`
-            }));
+            MODELS = buildModels(metrics);
         } else {
             // 데이터가 없으면 빈 상태 표시
             MODELS = [];
@@ -87,6 +172,7 @@ async function fetchAndInitializeModels() {
         renderModelCards();
         
         // 상태 업데이트
+        currentMetrics = metrics || {};
         updateModelStatus(metrics);
         updateOverallStatus(metrics);
         updateLastUpdateTime();
@@ -196,8 +282,10 @@ async function fetchMetrics() {
     
     try {
         // Call Django API endpoint
+        // cache: 'no-cache' → 브라우저가 ETag/Last-Modified로 재검증 (변경 없으면 304, 본문 재사용)
         const response = await fetch(`${API_BASE_URL}/api/metrics/p95/`, {
             method: 'GET',
+            cache: 'no-cache',
             headers: {
                 'Content-Type': 'application/json',
             },
@@ -214,20 +302,7 @@ async function fetchMetrics() {
         }
         
         // Convert API response to metrics format
-        const metrics = {};
-        
-        data.data.forEach(item => {
-            // API에서 받은 모델명을 그대로 ID로 사용 (동적)
-            const modelId = item.model;
-            
-            metrics[modelId] = {
-                p95: item.p95_latency_ms,  // 밀리초 단위
-                timestamp: new Date(item.collected_at).getTime(),
-                model_name: item.model
-            };
-        });
-        
-        return metrics;
+        return convertApiMetrics(data.data);
         
     } catch (error) {
         console.error('Failed to fetch from API:', error);
@@ -239,6 +314,26 @@ async function fetchMetrics() {
 }
 
 
+/**
+ * Convert API items ({model, p95_latency_ms, collected_at}) to metrics format
+ */
+function convertApiMetrics(items) {
+    const metrics = {};
+    
+    items.forEach(item => {
+        // API에서 받은 모델명을 그대로 ID로 사용 (동적)
+        const modelId = item.model;
+        
+        metrics[modelId] = {
+            p95: item.p95_latency_ms,  // 밀리초 단위
+            timestamp: new Date(item.collected_at).getTime(),
+            model_name: item.model
+        };
+    });
+    
+    return metrics;
+}
+
 /**
  * Fetch mock metrics (for testing)
  */